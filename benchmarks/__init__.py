@@ -0,0 +1,2 @@
+"""Synthetic workloads and benchmarks for the phases of the model checking
+algorithm."""
@@ -0,0 +1,243 @@
+"""This module contains the generators of synthetic tcc structures and temporal
+formulas used by the benchmarks."""
+
+from __future__ import print_function
+
+import random
+
+from tccMChecker.formula import Formula
+from tccMChecker.formula_parser import unary_formula, binary_formula
+
+
+def get_default_propositions():
+    """
+    Returns the propositions known by :py:class:`~formula.Formula`.
+
+    :returns: Sorted list of propositions.
+    :rtype: List of Strings
+
+    """
+    return sorted(Formula({"": ""}).get_proposition_rules().keys())
+
+
+def get_generator_propositions(domains=None, propositions=None):
+    """
+    Sets the domains of the variables of the generated models and returns
+    the propositions that the generators can use.
+
+    :param domains: Domains of the variables (see
+        :py:meth:`formula.Formula.set_proposition_domains`). By default, the
+        current domains are kept.
+    :type domains: Dictionary, List or String
+
+    :param propositions: Propositions to use. By default, all the declared
+        propositions.
+    :type propositions: List of Strings
+
+    :returns: Propositions that the generators can use.
+    :rtype: List of Strings
+
+    :raises ValueError: If some proposition is not declared in the domains.
+
+    :Example:
+
+    >>> from benchmarks.generators import *
+    >>> get_generator_propositions("b in {0, 1}\\ntc")
+    ['b=0', 'b=1', 'tc']
+    >>> get_generator_propositions(propositions=["b=1", "foo=1"])
+    Traceback (most recent call last):
+    ...
+    ValueError: undeclared propositions: foo=1
+
+    """
+    if domains is not None:
+        Formula.set_proposition_domains(domains)
+    if propositions is None:
+        return get_default_propositions()
+
+    declared = Formula.get_proposition_domains()["propositions"]
+    undeclared = sorted(set(propositions).difference(declared))
+    if undeclared:
+        raise ValueError("undeclared propositions: {}".format(
+            ", ".join(undeclared)))
+    return list(propositions)
+
+
+def generate_store(store_size, propositions, rng):
+    """
+    Generates a consistent store.
+
+    :param store_size: Number of propositions in the store.
+    :type store_size: Integer
+
+    :param propositions: Propositions that the store can use.
+    :type propositions: List of Strings
+
+    :param rng: Random number generator.
+    :type rng: :py:class:`random.Random`
+
+    :returns: Propositions (as formulas) of the store. A proposition is
+        negated at random, and two propositions that exclude each other are
+        never both positive.
+    :rtype: List of :py:class:`~formula.Formula`
+
+    """
+    rules = Formula({"": ""}).get_proposition_rules()
+    candidates = list(propositions)
+    rng.shuffle(candidates)
+
+    store = []
+    excluded = set()
+    for proposition in candidates[:store_size]:
+        if proposition not in excluded and rng.random() < 0.5:
+            store.append(Formula({"": proposition}))
+            for rule in rules.get(proposition, []):
+                if "" in rule:
+                    excluded.add(rule[""])
+        else:
+            store.append(Formula({"~": proposition}))
+    return store
+
+
+def generate_tcc_structure(num_nodes, edge_density, store_size,
+                           propositions=None, initial_ratio=0.1, seed=0,
+                           domains=None):
+    """
+    Generates a random tcc structure.
+
+    :param num_nodes: Number of tcc nodes.
+    :type num_nodes: Integer
+
+    :param edge_density: Probability of an edge between two tcc nodes. Every
+        node has at least one successor.
+    :type edge_density: Float
+
+    :param store_size: Number of propositions in the store of each node.
+    :type store_size: Integer
+
+    :param propositions: Propositions that the stores can use. By default, the
+        propositions known by :py:class:`~formula.Formula`.
+    :type propositions: List of Strings
+
+    :param domains: Domains of the variables of the model, which are set
+        before generating it (see :py:func:`.get_generator_propositions`).
+    :type domains: Dictionary, List or String
+
+    :param initial_ratio: Fraction of initial nodes. There is always at least
+        one initial node.
+    :type initial_ratio: Float
+
+    :param seed: Seed of the random number generator.
+    :type seed: Integer
+
+    :raises ValueError: If some proposition is not declared in the domains.
+
+    :returns: Structure representing the behaviour of a system.
+    :rtype: Dictionary
+
+    :Example:
+
+    >>> from benchmarks.generators import *
+    >>> tcc_structure = generate_tcc_structure(10, 0.2, 3)
+    >>> len(tcc_structure)
+    10
+
+    """
+    rng = random.Random(seed)
+    propositions = get_generator_propositions(domains, propositions)
+
+    nodes = list(range(1, num_nodes + 1))
+    tcc_structure = {}
+    for node in nodes:
+        edges = [next_node for next_node in nodes
+                 if rng.random() < edge_density]
+        if not edges:
+            edges = [rng.choice(nodes)]
+        tcc_structure[node] = {
+            "store": generate_store(store_size, propositions, rng),
+            "normal": [],
+            "temporal": [],
+            "edges": edges,
+            "initial": node == 1 or rng.random() < initial_ratio}
+    return tcc_structure
+
+
+def generate_formula(depth, num_future=1, num_globally=0, num_next=1,
+                     propositions=None, seed=0, domains=None):
+    """
+    Generates a random temporal formula.
+
+    :param depth: Depth of the tree of ``^`` and ``v`` connectives.
+    :type depth: Integer
+
+    :param num_future: Number of ``<>`` operators.
+    :type num_future: Integer
+
+    :param num_globally: Number of ``[]`` operators.
+    :type num_globally: Integer
+
+    :param num_next: Number of ``o`` operators. They are placed in chains
+        over the propositions of the formula.
+    :type num_next: Integer
+
+    :param propositions: Propositions that the formula can use. By default,
+        the propositions known by :py:class:`~formula.Formula`.
+    :type propositions: List of Strings
+
+    :param seed: Seed of the random number generator.
+    :type seed: Integer
+
+    :param domains: Domains of the variables of the model, which are set
+        before generating the formula (see
+        :py:func:`.get_generator_propositions`).
+    :type domains: Dictionary, List or String
+
+    :raises ValueError: If some proposition is not declared in the domains.
+
+    :returns: A temporal formula.
+    :rtype: :py:class:`~formula.Formula`
+
+    :Example:
+
+    >>> from benchmarks.generators import *
+    >>> phi = generate_formula(1, num_future=1, num_next=1, seed=3)
+
+    """
+    rng = random.Random(seed)
+    propositions = get_generator_propositions(domains, propositions)
+
+    num_leaves = 1
+    for level in range(depth):
+        num_leaves += rng.randint(1, 2 ** level)
+
+    # o chains over the leaves
+    chains = [0] * num_leaves
+    for index in range(num_next):
+        chains[rng.randrange(num_leaves)] += 1
+
+    leaves = []
+    for chain in chains:
+        leaf = {"": rng.choice(propositions)}
+        for index in range(chain):
+            leaf = unary_formula("o", leaf)
+        if rng.random() < 0.5:
+            leaf = unary_formula("~", leaf)
+        leaves.append(leaf)
+
+    temporal_operators = ["<>"] * num_future + ["[]"] * num_globally
+    rng.shuffle(temporal_operators)
+
+    # join the leaves with ^ and v, wrapping some subformulas with <> or []
+    formulas = leaves
+    while len(formulas) > 1:
+        index = rng.randrange(len(formulas) - 1)
+        data = binary_formula(rng.choice(["^", "v"]), formulas[index],
+                              formulas[index + 1])
+        if temporal_operators and rng.random() < 0.5:
+            data = unary_formula(temporal_operators.pop(), data)
+        formulas[index:index + 2] = [data]
+
+    data = formulas[0]
+    while temporal_operators:
+        data = unary_formula(temporal_operators.pop(), data)
+    return Formula(data)
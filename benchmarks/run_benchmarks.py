@@ -0,0 +1,248 @@
+"""This module times and memory-profiles each phase of the model checking
+algorithm over synthetic workloads, and writes the results as JSON lines.
+
+Usage::
+
+    python -m benchmarks.run_benchmarks --nodes 10 20 40 --depth 1 2 \\
+        --output results.jsonl
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+import threading
+import timeit
+
+from tarjan import tarjan
+
+from tccMChecker.check_monitor import get_memory_usage
+from tccMChecker.closure import get_closure
+from tccMChecker.model_checking_graph import get_all_atoms, \
+    get_model_checking_atoms, get_model_checking__graph, get_basic_formulas, \
+    get_total_nodes
+from tccMChecker.searching_algorithm import get_model_checking_scc_subgraphs, \
+    get_initial_nodes, find_self_fulfilling_scc
+
+from benchmarks.generators import generate_tcc_structure, generate_formula, \
+    get_generator_propositions
+
+# Seconds between two samples of the memory used by a phase
+MEMORY_SAMPLE_INTERVAL = 0.005
+
+
+def sample_memory(samples, stop):
+    """
+    Samples the memory used by the process (see
+    :py:func:`check_monitor.get_memory_usage`) until an event is set.
+
+    :param samples: List where the samples are appended.
+    :type samples: List of Integers
+
+    :param stop: Event that stops the sampling.
+    :type stop: :py:class:`threading.Event`
+
+    """
+    while True:
+        memory = get_memory_usage()
+        if memory is not None:
+            samples.append(memory)
+        if stop.wait(MEMORY_SAMPLE_INTERVAL):
+            break
+
+
+def run_phase(name, function, phases):
+    """
+    Runs a phase of the algorithm and records its wall time, the peak of the
+    memory used by the process during the phase (``peak_memory``), sampled
+    every :py:data:`.MEMORY_SAMPLE_INTERVAL` seconds, and its increase over
+    the memory used at the start of the phase (``memory_increase``), in
+    bytes.
+
+    The output printed by the phase is discarded.
+
+    :param name: Name of the phase.
+    :type name: String
+
+    :param function: Function without arguments that runs the phase.
+    :type function: Function
+
+    :param phases: Dictionary where the measures of the phase are stored.
+    :type phases: Dictionary
+
+    :returns: The result of the phase.
+
+    """
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    memory_start = get_memory_usage()
+    samples = []
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_memory, args=(samples, stop))
+    sampler.daemon = True
+    sampler.start()
+    try:
+        start = timeit.default_timer()
+        result = function()
+        elapsed = timeit.default_timer() - start
+    finally:
+        stop.set()
+        sampler.join()
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    peak_memory = None
+    memory_increase = None
+    if samples:
+        peak_memory = max(samples)
+        if memory_start is not None:
+            memory_increase = peak_memory - memory_start
+    phases[name] = {"time": elapsed, "peak_memory": peak_memory,
+                    "memory_increase": memory_increase}
+    return result
+
+
+def run_benchmark(formula, tcc_structure):
+    """
+    Runs all the phases of the model checking algorithm.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :returns: A dictionary with the measures of each phase (``phases``), the
+        sizes of the intermediate structures and the verdict.
+    :rtype: Dictionary
+
+    """
+    phases = {}
+
+    closure = []
+    run_phase("closure", lambda: get_closure(formula, closure), phases)
+    atoms = run_phase("all_atoms", lambda: get_all_atoms(closure), phases)
+    model_checking_atoms = run_phase(
+        "model_checking_atoms",
+        lambda: get_model_checking_atoms(tcc_structure, atoms), phases)
+    model_checking_graph = run_phase(
+        "model_checking_graph",
+        lambda: get_model_checking__graph(tcc_structure, model_checking_atoms),
+        phases)
+    strongly_connected_components = run_phase(
+        "scc", lambda: tarjan(model_checking_graph), phases)
+
+    def check_sccs():
+        scc_subgraphs = get_model_checking_scc_subgraphs(
+            strongly_connected_components, tcc_structure, model_checking_atoms,
+            model_checking_graph)
+        initial_nodes = get_initial_nodes(tcc_structure, model_checking_atoms)
+        return find_self_fulfilling_scc(scc_subgraphs, initial_nodes,
+                                        model_checking_atoms, formula)
+
+    scc_graph = run_phase("scc_checks", check_sccs, phases)
+
+    return {"phases": phases,
+            "closure_size": len(closure),
+            "basic_formulas": len(get_basic_formulas(closure)),
+            "atoms": len(atoms),
+            "graph_nodes": get_total_nodes(model_checking_atoms),
+            "graph_edges": sum([len(next_nodes) for next_nodes in
+                                model_checking_graph.values()]),
+            "scc": len(strongly_connected_components),
+            "verdict": scc_graph is not None}
+
+
+def get_parser():
+    """
+    Returns the parser of the command line arguments.
+
+    :rtype: :py:class:`argparse.ArgumentParser`
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the phases of the tcc model checker.")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 20],
+                        help="numbers of tcc nodes")
+    parser.add_argument("--density", type=float, nargs="+", default=[0.2],
+                        help="probabilities of an edge between two nodes")
+    parser.add_argument("--store-size", type=int, nargs="+", default=[3],
+                        help="numbers of propositions in each store")
+    parser.add_argument("--propositions", nargs="+", default=None,
+                        help="propositions used by stores and formulas "
+                             "(all the declared propositions by default)")
+    parser.add_argument("--domains", default=None,
+                        help="file of the domains of the variables of the "
+                             "generated models (the default domains by "
+                             "default)")
+    parser.add_argument("--depth", type=int, nargs="+", default=[1],
+                        help="depths of the formulas")
+    parser.add_argument("--future", type=int, default=1,
+                        help="number of <> operators in each formula")
+    parser.add_argument("--globally", type=int, default=0,
+                        help="number of [] operators in each formula")
+    parser.add_argument("--next", type=int, default=1,
+                        help="number of o operators in each formula")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="runs of each configuration, with seeds "
+                             "seed, seed + 1, ...")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None,
+                        help="file where the JSON lines are appended "
+                             "(standard output by default)")
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs the benchmarks of every combination of the command line parameters.
+
+    """
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    domains = None
+    if args.domains is not None:
+        with open(args.domains) as domains_file:
+            domains = domains_file.read()
+    try:
+        propositions = get_generator_propositions(domains, args.propositions)
+    except ValueError as error:
+        parser.error("{} (declare the domains of the variables with "
+                     "--domains)".format(error))
+    output = sys.stdout if args.output is None else open(args.output, "a")
+
+    try:
+        for num_nodes in args.nodes:
+            for density in args.density:
+                for store_size in args.store_size:
+                    for depth in args.depth:
+                        for seed in range(args.seed, args.seed + args.repeat):
+                            parameters = {
+                                "nodes": num_nodes, "density": density,
+                                "store_size": store_size, "depth": depth,
+                                "future": args.future,
+                                "globally": args.globally, "next": args.next,
+                                "seed": seed}
+                            tcc_structure = generate_tcc_structure(
+                                num_nodes, density, store_size,
+                                propositions, seed=seed)
+                            formula = generate_formula(
+                                depth, args.future, args.globally, args.next,
+                                propositions, seed=seed)
+
+                            result = run_benchmark(formula, tcc_structure)
+                            result["parameters"] = parameters
+                            result["formula"] = formula.get_formula()
+                            output.write(json.dumps(result, sort_keys=True))
+                            output.write("\n")
+                            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,17 @@ from tccMChecker.model_checking_algorithm import model_satisfies_property
 
 # Main
 if __name__ == "__main__":
+    # Domains of the variables of the model
+    Formula.set_proposition_domains("""
+        da in {0, 5, 10, 15, 20}
+        b in {0, 1, 2, 3}
+        sm in {0, 5, 10}
+        tc
+        tt
+        dc
+        dd
+    """)
+
     # TCC Structure
     tcc_structure = {1: {"store": [Formula({"": "da=0"}),
                                    Formula({"~": "dd"}),
@@ -385,7 +396,13 @@ if __name__ == "__main__":
 
     # Report
     print("***************** REPORT *****************")
-    result = model_satisfies_property(phi, tcc_structure)
+    witness = {}
+    result = model_satisfies_property(phi, tcc_structure, witness)
 
     print("***************** RESULT: *****************")
     print("Model Satisfies Formula: ", not result)
+
+    if result:
+        print("Counterexample (tcc node, model checking node):")
+        print("prefix:", [step[:2] for step in witness["prefix"]])
+        print("cycle:", [step[:2] for step in witness["cycle"]])
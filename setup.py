@@ -41,8 +41,14 @@ setup(
 
     keywords='model-checking process-calculus',
 
-    packages=find_packages(exclude=['examples', 'docs', 'tests']),
+    packages=find_packages(exclude=['examples', 'benchmarks', 'docs', 'tests']),
     install_requires=requirements,
     zip_safe=False,
+
+    entry_points={
+        'console_scripts': [
+            'tccmchecker = tccMChecker.cli:main',
+        ],
+    },
 )
 
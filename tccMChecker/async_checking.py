@@ -0,0 +1,271 @@
+"""This module contains an asynchronous interface of the model checking
+algorithm. The phases of
+:py:func:`model_checking_algorithm.model_satisfies_property` run one after the
+other in a thread, so the caller (e.g. the event loop of a service) is not
+blocked during the check, and the check can be cancelled between two
+phases."""
+
+from __future__ import print_function
+
+import threading
+
+try:
+    from concurrent.futures import TimeoutError
+except ImportError:  # Python 2 without the futures backport
+    class TimeoutError(Exception):
+        """
+        This exception is raised when the result of a check is not available
+        in time.
+
+        """
+
+from tccMChecker.check_monitor import CheckInterrupted
+from tccMChecker.check_statistics import get_time
+from tccMChecker.model_checking_algorithm import get_check_phases
+
+
+class CheckFuture(object):
+    """
+    This class represents a check that runs in a thread (see
+    :py:func:`.check_property_async`). Its methods follow the ones of
+    :py:class:`concurrent.futures.Future`, except that a cancelled check has
+    the result ``None`` (unknown), as a check stopped by its monitor.
+
+    :param phases: Phases of the check (see
+        :py:func:`model_checking_algorithm.get_check_phases`).
+    :type phases: List of Tuples
+
+    :param progress: See :py:func:`.check_property_async`.
+    :type progress: Function
+
+    :param monitor: Monitor of the check, cancelled with the check.
+    :type monitor: :py:class:`~check_monitor.CheckMonitor`
+
+    """
+
+    def __init__(self, phases, progress=None, monitor=None):
+        """
+        Constructor method.
+
+        """
+        self.__phases = phases
+        self.__progress = progress
+        self.__monitor = monitor
+        self.__lock = threading.Lock()
+        self.__finished = threading.Event()
+        self.__callbacks = []
+        self.__running = False
+        self.__cancelled = False
+        self.__result = None
+        self.__exception = None
+
+    def start(self):
+        """
+        Starts the check in a daemon thread.
+
+        """
+        with self.__lock:
+            self.__running = True
+        thread = threading.Thread(target=self.__run)
+        thread.daemon = True
+        thread.start()
+
+    def cancel(self):
+        """
+        Cancels the check. It stops before its next phase and, if it has a
+        monitor, the running phase stops at the next update of the monitor.
+
+        :returns: ``False`` if the check has already ended without being
+            cancelled, ``True`` otherwise. Then its result is ``None``.
+        :rtype: Boolean
+
+        """
+        with self.__lock:
+            if self.__finished.is_set():
+                return self.__cancelled
+            self.__cancelled = True
+        if self.__monitor is not None:
+            self.__monitor.cancel()
+        return True
+
+    def cancelled(self):
+        """
+        :returns: ``True`` if the check was cancelled.
+        :rtype: Boolean
+
+        """
+        return self.__cancelled
+
+    def running(self):
+        """
+        :returns: ``True`` if the check is running.
+        :rtype: Boolean
+
+        """
+        with self.__lock:
+            return self.__running and not self.__finished.is_set()
+
+    def done(self):
+        """
+        :returns: ``True`` if the check has ended.
+        :rtype: Boolean
+
+        """
+        return self.__finished.is_set()
+
+    def result(self, timeout=None):
+        """
+        Waits for the end of the check.
+
+        :param timeout: Maximum time to wait in seconds (by default, no
+            limit).
+        :type timeout: Float
+
+        :returns: The result of
+            :py:func:`model_checking_algorithm.model_satisfies_property`, or
+            ``None`` if the check was cancelled or stopped by its monitor.
+        :rtype: Boolean
+
+        :raises TimeoutError: If the check has not ended after ``timeout``
+            seconds.
+
+        """
+        exception = self.exception(timeout)
+        if exception is not None:
+            raise exception
+        return self.__result
+
+    def exception(self, timeout=None):
+        """
+        Waits for the end of the check.
+
+        :param timeout: Maximum time to wait in seconds (by default, no
+            limit).
+        :type timeout: Float
+
+        :returns: The exception raised by the check, or ``None``.
+        :rtype: Exception
+
+        :raises TimeoutError: If the check has not ended after ``timeout``
+            seconds.
+
+        """
+        if not self.__finished.wait(timeout):
+            raise TimeoutError("the check has not ended")
+        return self.__exception
+
+    def add_done_callback(self, callback):
+        """
+        Calls a function with this future when the check ends, in the thread
+        of the check, or immediately if it has already ended.
+
+        :param callback: Function
+        :type callback: Function
+
+        """
+        with self.__lock:
+            if not self.__finished.is_set():
+                self.__callbacks.append(callback)
+                return
+        callback(self)
+
+    def __notify(self, event, number, **values):
+        if self.__progress is not None:
+            values.update({"event": event, "phase": self.__phases[number][0],
+                           "number": number + 1,
+                           "phases": len(self.__phases)})
+            self.__progress(values)
+
+    def __run(self):
+        result = None
+        exception = None
+        try:
+            for number, (name, phase) in enumerate(self.__phases):
+                if self.__cancelled:
+                    break
+                self.__notify("start", number)
+                start = get_time()
+                result = phase()
+                self.__notify("end", number, time=get_time() - start)
+        except CheckInterrupted:
+            result = None
+        except Exception as error:
+            exception = error
+
+        with self.__lock:
+            if self.__cancelled:
+                result = None
+                exception = None
+            self.__result = result
+            self.__exception = exception
+            self.__finished.set()
+            callbacks, self.__callbacks = self.__callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+
+def check_property_async(formula, tcc_structure, witness=None,
+                         statistics=None, normalize=False, progress=None,
+                         monitor=None):
+    """
+    Checks if a model satisfies a formula without blocking the caller. The
+    phases of the check (see
+    :py:func:`model_checking_algorithm.get_check_phases`) run one after the
+    other in a daemon thread.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param witness: See
+        :py:func:`model_checking_algorithm.model_satisfies_property`.
+    :type witness: Dictionary
+
+    :param statistics: See
+        :py:func:`model_checking_algorithm.model_satisfies_property`.
+    :type statistics: Dictionary
+
+    :param normalize: See
+        :py:func:`model_checking_algorithm.model_satisfies_property`.
+    :type normalize: Boolean
+
+    :param progress: Function called in the thread of the check with a
+        dictionary before (``event`` is ``start``) and after (``event`` is
+        ``end``, with the ``time`` of the phase) each phase. The dictionary
+        also has the name of the phase (``phase``), its position (``number``)
+        and the number of phases (``phases``).
+    :type progress: Function
+
+    :param monitor: See
+        :py:func:`model_checking_algorithm.model_satisfies_property`. It is
+        called from the thread of the check.
+    :type monitor: :py:class:`~check_monitor.CheckMonitor`
+
+    :returns: The future of the check.
+    :rtype: :py:class:`.CheckFuture`
+
+    :Example:
+
+    >>> from tccMChecker.async_checking import *
+    >>> future = check_property_async(formula, tcc_structure, progress=print)
+    {'event': 'start', 'phase': 'closure', 'number': 1, 'phases': 6}
+    {'event': 'end', 'phase': 'closure', 'number': 1, 'phases': 6, 'time': 0.0003}
+    ...
+    {'event': 'end', 'phase': 'scc_checks', 'number': 6, 'phases': 6, 'time': 0.0012}
+    >>> future.result()
+    False
+
+    .. note::
+        Cancelling the future stops the check before its next phase, and its
+        result is ``None``. The phase that is running when the future is
+        cancelled runs until it ends, unless a monitor is given: then it
+        stops at the next update of the monitor.
+
+    """
+    phases = get_check_phases(formula, tcc_structure, witness, statistics,
+                              normalize, monitor=monitor)
+    future = CheckFuture(phases, progress, monitor)
+    future.start()
+    return future
@@ -0,0 +1,509 @@
+"""This module contains a manager of reduced ordered binary decision diagrams
+(BDDs), used by the symbolic model checking engine."""
+
+from __future__ import print_function
+
+import sys
+
+# Terminal nodes
+FALSE = 0
+TRUE = 1
+
+# Level of the terminal nodes, below the level of any variable
+_terminal_level = sys.maxsize
+
+
+class BDD(object):
+    r"""
+    This class represents a manager of reduced ordered binary decision
+    diagrams. A BDD is an integer that identifies a node of the manager
+    (:py:data:`.FALSE` and :py:data:`.TRUE` are the terminal nodes). Two
+    equivalent boolean functions are always represented by the same node.
+
+    The order of the variables is the order in which they are added to the
+    manager, and each variable is identified by its level.
+
+    :Example:
+
+    >>> from tccMChecker.bdd import *
+    >>> bdd = BDD()
+    >>> x = bdd.get_variable(bdd.add_variable("x"))
+    >>> y = bdd.get_variable(bdd.add_variable("y"))
+    >>> f = bdd.disjunction(x, y)
+    >>> bdd.count(f, [0, 1])
+    3
+    >>> bdd.exists(f, [0]) == TRUE
+    True
+
+    .. note::
+        The operations are based on the algorithms presented in [Bry86]_.
+
+    """
+
+    def __init__(self):
+        """
+        Constructor method.
+
+        """
+        self.__names = []
+        self.__levels = [_terminal_level, _terminal_level]
+        self.__lows = [FALSE, TRUE]
+        self.__highs = [FALSE, TRUE]
+        self.__unique = {}
+        self.__ite_cache = {}
+
+    def add_variable(self, name):
+        """
+        Adds a variable below the variables of the manager.
+
+        :param name: Name of the variable.
+        :type name: String
+
+        :returns: The level of the variable.
+        :rtype: Integer
+
+        """
+        self.__names.append(name)
+        return len(self.__names) - 1
+
+    def get_variable_name(self, level):
+        """
+        Returns the name of a variable.
+
+        :param level: Level of the variable.
+        :type level: Integer
+
+        :returns: The name of the variable.
+        :rtype: String
+
+        """
+        return self.__names[level]
+
+    def get_number_variables(self):
+        """
+        Returns the number of variables of the manager.
+
+        :returns: The number of variables.
+        :rtype: Integer
+
+        """
+        return len(self.__names)
+
+    def get_node_count(self):
+        """
+        Returns the number of nodes of the manager (terminal nodes included).
+
+        :returns: The number of nodes.
+        :rtype: Integer
+
+        """
+        return len(self.__levels)
+
+    def get_level(self, node):
+        """
+        Returns the level of the variable of a node.
+
+        :param node: BDD
+        :type node: Integer
+
+        :returns: The level of the variable tested by the node.
+        :rtype: Integer
+
+        """
+        return self.__levels[node]
+
+    def get_low(self, node):
+        """
+        Returns the successor of a node when its variable is false.
+
+        :param node: BDD
+        :type node: Integer
+
+        :returns: The low successor.
+        :rtype: Integer
+
+        """
+        return self.__lows[node]
+
+    def get_high(self, node):
+        """
+        Returns the successor of a node when its variable is true.
+
+        :param node: BDD
+        :type node: Integer
+
+        :returns: The high successor.
+        :rtype: Integer
+
+        """
+        return self.__highs[node]
+
+    def __make_node(self, level, low, high):
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.__unique.get(key)
+        if node is None:
+            node = len(self.__levels)
+            self.__levels.append(level)
+            self.__lows.append(low)
+            self.__highs.append(high)
+            self.__unique[key] = node
+        return node
+
+    def __cofactors(self, node, level):
+        if self.__levels[node] == level:
+            return self.__lows[node], self.__highs[node]
+        return node, node
+
+    def get_variable(self, level):
+        """
+        Returns the BDD of a variable.
+
+        :param level: Level of the variable.
+        :type level: Integer
+
+        :returns: BDD that is true iff the variable is true.
+        :rtype: Integer
+
+        """
+        return self.__make_node(level, FALSE, TRUE)
+
+    def ite(self, f, g, h):
+        """
+        Returns the BDD of *if f then g else h*.
+
+        :param f: BDD of the condition.
+        :type f: Integer
+
+        :param g: BDD of the *then* branch.
+        :type g: Integer
+
+        :param h: BDD of the *else* branch.
+        :type h: Integer
+
+        :returns: BDD of :math:`(f \\wedge g) \\vee (\\neg f \\wedge h)`.
+        :rtype: Integer
+
+        """
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+
+        key = (f, g, h)
+        result = self.__ite_cache.get(key)
+        if result is not None:
+            return result
+
+        level = min(self.__levels[f], self.__levels[g], self.__levels[h])
+        f_low, f_high = self.__cofactors(f, level)
+        g_low, g_high = self.__cofactors(g, level)
+        h_low, h_high = self.__cofactors(h, level)
+        result = self.__make_node(level, self.ite(f_low, g_low, h_low),
+                                  self.ite(f_high, g_high, h_high))
+        self.__ite_cache[key] = result
+        return result
+
+    def negation(self, f):
+        """
+        Returns the BDD of :math:`\\neg f`.
+
+        :param f: BDD
+        :type f: Integer
+
+        :rtype: Integer
+
+        """
+        return self.ite(f, FALSE, TRUE)
+
+    def conjunction(self, f, g):
+        """
+        Returns the BDD of :math:`f \\wedge g`.
+
+        :param f: BDD
+        :type f: Integer
+
+        :param g: BDD
+        :type g: Integer
+
+        :rtype: Integer
+
+        """
+        return self.ite(f, g, FALSE)
+
+    def disjunction(self, f, g):
+        """
+        Returns the BDD of :math:`f \\vee g`.
+
+        :param f: BDD
+        :type f: Integer
+
+        :param g: BDD
+        :type g: Integer
+
+        :rtype: Integer
+
+        """
+        return self.ite(f, TRUE, g)
+
+    def implication(self, f, g):
+        """
+        Returns the BDD of :math:`f \\rightarrow g`.
+
+        :param f: BDD
+        :type f: Integer
+
+        :param g: BDD
+        :type g: Integer
+
+        :rtype: Integer
+
+        """
+        return self.ite(f, g, TRUE)
+
+    def cube(self, assignment):
+        """
+        Returns the conjunction of the literals of an assignment.
+
+        :param assignment: Value of each variable, by level.
+        :type assignment: Dictionary
+
+        :returns: BDD that is true only for the assignment.
+        :rtype: Integer
+
+        """
+        result = TRUE
+        for level in sorted(assignment.keys(), reverse=True):
+            if assignment[level]:
+                result = self.__make_node(level, FALSE, result)
+            else:
+                result = self.__make_node(level, result, FALSE)
+        return result
+
+    def exists(self, f, levels):
+        """
+        Returns the existential quantification of some variables of a BDD.
+
+        :param f: BDD
+        :type f: Integer
+
+        :param levels: Levels of the quantified variables.
+        :type levels: Set of Integers
+
+        :returns: BDD of :math:`\\exists x_1 \\ldots x_n . f`.
+        :rtype: Integer
+
+        """
+        levels = frozenset(levels)
+        if not levels:
+            return f
+        return self.__exists(f, levels, max(levels), {})
+
+    def __exists(self, f, levels, last_level, computed):
+        level = self.__levels[f]
+        if level > last_level:
+            return f
+        result = computed.get(f)
+        if result is not None:
+            return result
+
+        low = self.__exists(self.__lows[f], levels, last_level, computed)
+        if level in levels:
+            if low == TRUE:
+                result = TRUE
+            else:
+                result = self.disjunction(low, self.__exists(
+                    self.__highs[f], levels, last_level, computed))
+        else:
+            result = self.__make_node(level, low, self.__exists(
+                self.__highs[f], levels, last_level, computed))
+        computed[f] = result
+        return result
+
+    def and_exists(self, f, g, levels):
+        """
+        Returns the existential quantification of some variables of the
+        conjunction of two BDDs, without building the conjunction (relational
+        product).
+
+        :param f: BDD
+        :type f: Integer
+
+        :param g: BDD
+        :type g: Integer
+
+        :param levels: Levels of the quantified variables.
+        :type levels: Set of Integers
+
+        :returns: BDD of :math:`\\exists x_1 \\ldots x_n . f \\wedge g`.
+        :rtype: Integer
+
+        """
+        levels = frozenset(levels)
+        if not levels:
+            return self.conjunction(f, g)
+        return self.__and_exists(f, g, levels, max(levels), {}, {})
+
+    def __and_exists(self, f, g, levels, last_level, computed, exists_computed):
+        if f == FALSE or g == FALSE:
+            return FALSE
+        if f == TRUE:
+            return self.__exists(g, levels, last_level, exists_computed)
+        if g == TRUE or f == g:
+            return self.__exists(f, levels, last_level, exists_computed)
+        if f > g:
+            f, g = g, f
+
+        level = min(self.__levels[f], self.__levels[g])
+        if level > last_level:
+            return self.conjunction(f, g)
+        key = (f, g)
+        result = computed.get(key)
+        if result is not None:
+            return result
+
+        f_low, f_high = self.__cofactors(f, level)
+        g_low, g_high = self.__cofactors(g, level)
+        low = self.__and_exists(f_low, g_low, levels, last_level, computed,
+                                exists_computed)
+        if level in levels:
+            if low == TRUE:
+                result = TRUE
+            else:
+                result = self.disjunction(low, self.__and_exists(
+                    f_high, g_high, levels, last_level, computed,
+                    exists_computed))
+        else:
+            result = self.__make_node(level, low, self.__and_exists(
+                f_high, g_high, levels, last_level, computed, exists_computed))
+        computed[key] = result
+        return result
+
+    def rename(self, f, mapping):
+        """
+        Renames the variables of a BDD.
+
+        :param f: BDD
+        :type f: Integer
+
+        :param mapping: New level of each renamed variable, by level.
+        :type mapping: Dictionary
+
+        :returns: BDD where each variable is replaced by its new variable.
+        :rtype: Integer
+
+        """
+        return self.__rename(f, mapping, {})
+
+    def __rename(self, f, mapping, computed):
+        if f <= TRUE:
+            return f
+        result = computed.get(f)
+        if result is not None:
+            return result
+
+        level = self.__levels[f]
+        result = self.ite(self.get_variable(mapping.get(level, level)),
+                          self.__rename(self.__highs[f], mapping, computed),
+                          self.__rename(self.__lows[f], mapping, computed))
+        computed[f] = result
+        return result
+
+    def pick_cube(self, f, levels):
+        """
+        Returns one of the assignments that satisfy a BDD.
+
+        :param f: BDD
+        :type f: Integer
+
+        :param levels: Levels of the variables of the assignment. They must
+            include the variables of the BDD.
+        :type levels: Set of Integers
+
+        :returns: BDD that is true only for the assignment (see
+            :py:meth:`.cube`), or :py:data:`.FALSE` if the BDD is not
+            satisfiable.
+        :rtype: Integer
+
+        """
+        if f == FALSE:
+            return FALSE
+
+        assignment = dict((level, False) for level in levels)
+        while f != TRUE:
+            if self.__lows[f] != FALSE:
+                assignment[self.__levels[f]] = False
+                f = self.__lows[f]
+            else:
+                assignment[self.__levels[f]] = True
+                f = self.__highs[f]
+        return self.cube(assignment)
+
+    def count(self, f, levels):
+        """
+        Returns the number of assignments that satisfy a BDD.
+
+        :param f: BDD
+        :type f: Integer
+
+        :param levels: Levels of the variables of the assignments. They must
+            include the variables of the BDD.
+        :type levels: Set of Integers
+
+        :returns: The number of assignments.
+        :rtype: Integer
+
+        """
+        levels = sorted(levels)
+        positions = dict((level, index) for index, level in enumerate(levels))
+        positions[_terminal_level] = len(levels)
+        computed = {FALSE: 0, TRUE: 1}
+
+        def count_node(node):
+            if node not in computed:
+                position = positions[self.__levels[node]]
+                low = self.__lows[node]
+                high = self.__highs[node]
+                computed[node] = \
+                    count_node(low) * 2 ** (
+                        positions[self.__levels[low]] - position - 1) + \
+                    count_node(high) * 2 ** (
+                        positions[self.__levels[high]] - position - 1)
+            return computed[node]
+
+        return count_node(f) * 2 ** positions[self.__levels[f]]
+
+    def size(self, f):
+        """
+        Returns the number of nodes of a BDD (terminal nodes included).
+
+        :param f: BDD
+        :type f: Integer
+
+        :returns: The number of nodes.
+        :rtype: Integer
+
+        """
+        visited = set()
+        pending = [f]
+        while pending:
+            node = pending.pop()
+            if node not in visited:
+                visited.add(node)
+                if node > TRUE:
+                    pending.append(self.__lows[node])
+                    pending.append(self.__highs[node])
+        return len(visited)
+
+    def clear_cache(self):
+        """
+        Removes the results of the previous operations kept by the manager.
+        The nodes are kept.
+
+        """
+        self.__ite_cache.clear()
@@ -0,0 +1,275 @@
+"""This module contains the functions to minimize a tcc structure before
+model checking a formula. The tcc nodes that are bisimilar with respect to the
+propositions of the formula are merged into one node of a quotient structure,
+and the witnesses found in the quotient are mapped back to the original
+nodes."""
+
+from __future__ import print_function
+
+from tccMChecker.check_statistics import get_time, record_phase
+from tccMChecker.formula import Formula, get_formula_key
+from tccMChecker.formula_parser import data_to_tree
+from tccMChecker.model_checking_graph import get_relevant_store
+from tccMChecker.tableau import model_satisfies_property_tableau
+
+
+def get_formula_propositions(tree, propositions):
+    """
+    Finds the propositions of a syntax tree.
+
+    :param tree: Syntax tree (see :py:func:`formula_parser.tree_to_data`).
+    :type tree: Tuple
+
+    :param propositions: Set to store the propositions.
+    :type propositions: Set of Strings
+
+    """
+    if tree[0] == "":
+        propositions.add(tree[1])
+    else:
+        for subtree in tree[1:]:
+            get_formula_propositions(subtree, propositions)
+
+
+def get_store_signature(store, propositions):
+    """
+    Returns the signature of the store of a tcc node with respect to the
+    propositions of a formula. Two stores with the same signature have the
+    same atoms.
+
+    Only the formulas of the store that are relevant to the propositions of
+    the formula are kept (see
+    :py:func:`model_checking_graph.get_relevant_store`).
+
+    :param store: Propositions (as formulas) in the store of the tcc node.
+    :type store: List of :py:class:`~formula.Formula`
+
+    :param propositions: Propositions of the formula.
+    :type propositions: Set of Strings
+
+    :returns: ``None`` if the store is inconsistent, or the set of the keys
+        (see :py:func:`formula.get_formula_key`) of the formulas of
+        the store that are kept.
+    :rtype: Frozenset
+
+    :Example:
+
+    >>> from tccMChecker.bisimulation import *
+    >>> get_store_signature([Formula({"": "da=5"}), Formula({"~": "dd"})],
+    ...                     set(["da=0"]))
+    frozenset([(('', 'da=5'),)])
+
+    """
+    relevant_store = get_relevant_store(store, propositions)
+    if relevant_store is None:
+        return None
+    return frozenset(get_formula_key(formula.get_formula())
+                     for formula in relevant_store)
+
+
+def get_bisimulation_blocks(tcc_structure, signatures):
+    """
+    Computes the coarsest bisimulation of a tcc structure where the bisimilar
+    nodes have the same signature and are both initial or not, by partition
+    refinement.
+
+    :param tcc_structure: tcc structure.
+    :type tcc_structure: Dictionary
+
+    :param signatures: Signature of each tcc node.
+    :type signatures: Dictionary
+
+    :returns: The representative of the block of each tcc node (the smallest
+        tcc node of the block).
+    :rtype: Dictionary
+
+    """
+    tcc_nodes = sorted(tcc_structure.keys())
+    keys = dict((tcc_node, (signatures[tcc_node],
+                            bool(tcc_structure[tcc_node].get("initial"))))
+                for tcc_node in tcc_nodes)
+    number_blocks = 0
+
+    while True:
+        representatives = {}
+        blocks = {}
+        for tcc_node in tcc_nodes:
+            representative = representatives.setdefault(keys[tcc_node],
+                                                        tcc_node)
+            blocks[tcc_node] = representative
+        if len(representatives) == number_blocks:
+            return blocks
+        number_blocks = len(representatives)
+
+        keys = dict((tcc_node, (blocks[tcc_node], frozenset(
+            blocks[next_tcc_node]
+            for next_tcc_node in tcc_structure[tcc_node].get("edges"))))
+            for tcc_node in tcc_nodes)
+
+
+def minimize_tcc_structure(tcc_structure, formula):
+    """
+    Returns the quotient of a tcc structure by the coarsest bisimulation with
+    respect to the propositions of a formula.
+
+    :param tcc_structure: tcc structure.
+    :type tcc_structure: Dictionary
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :returns: A tuple with the quotient structure, whose nodes are the
+        representatives of the blocks, and the representative of each tcc
+        node.
+    :rtype: Tuple
+
+    :Example:
+
+    >>> from tccMChecker.bisimulation import *
+    >>> tcc_structure = {
+    ... 1: {"store": [Formula({"": "tt"})], "edges": [2, 3], "initial": True},
+    ... 2: {"store": [Formula({"~": "tt"}), Formula({"": "b=1"})], "edges": [1], "initial": False},
+    ... 3: {"store": [Formula({"~": "tt"})], "edges": [1], "initial": False}}
+    >>> quotient, blocks = minimize_tcc_structure(tcc_structure, Formula({"<>": "tt"}))
+    >>> sorted(quotient.keys()), blocks[3]
+    ([1, 2], 2)
+
+    """
+    propositions = set()
+    get_formula_propositions(data_to_tree(formula.get_formula()), propositions)
+
+    signatures = dict((tcc_node, get_store_signature(data.get("store"),
+                                                     propositions))
+                      for tcc_node, data in tcc_structure.items())
+    blocks = get_bisimulation_blocks(tcc_structure, signatures)
+
+    quotient = {}
+    for tcc_node in sorted(set(blocks.values())):
+        data = dict(tcc_structure[tcc_node])
+        edges = []
+        for next_tcc_node in data.get("edges"):
+            if blocks[next_tcc_node] not in edges:
+                edges.append(blocks[next_tcc_node])
+        data["edges"] = edges
+        quotient[tcc_node] = data
+    return quotient, blocks
+
+
+def get_original_witness(witness, tcc_structure, blocks):
+    """
+    Maps a witness found in the quotient of a tcc structure to the original
+    tcc nodes.
+
+    Each step of the witness is replaced by a successor, in the same block, of
+    the previous original node. The cycle is repeated until an original node
+    appears again at the same position of the cycle.
+
+    :param witness: Witness with the steps of the path to the cycle
+        (``prefix``) and of the cycle (``cycle``). A step is a tcc node of the
+        quotient or a tuple whose first element is a tcc node of the quotient.
+    :type witness: Dictionary
+
+    :param tcc_structure: Original tcc structure.
+    :type tcc_structure: Dictionary
+
+    :param blocks: Representative of each tcc node (see
+        :py:func:`.minimize_tcc_structure`).
+    :type blocks: Dictionary
+
+    :returns: The witness over the original tcc nodes. The other elements of
+        the steps are kept.
+    :rtype: Dictionary
+
+    """
+    def get_tcc_node(step):
+        return step[0] if isinstance(step, tuple) else step
+
+    def replace_tcc_node(step, tcc_node):
+        return (tcc_node,) + step[1:] if isinstance(step, tuple) else tcc_node
+
+    def get_next(tcc_node, step):
+        return min(next_tcc_node for next_tcc_node in
+                   tcc_structure[tcc_node].get("edges")
+                   if blocks[next_tcc_node] == get_tcc_node(step))
+
+    prefix = []
+    current = None
+    for step in witness["prefix"]:
+        current = get_tcc_node(step) if current is None else \
+            get_next(current, step)
+        prefix.append(replace_tcc_node(step, current))
+
+    unrolled = []
+    visited = {}
+    position = 0
+    while True:
+        step = witness["cycle"][position]
+        current = get_tcc_node(step) if current is None else \
+            get_next(current, step)
+        if (position, current) in visited:
+            break
+        visited[(position, current)] = len(unrolled)
+        unrolled.append(replace_tcc_node(step, current))
+        position = (position + 1) % len(witness["cycle"])
+
+    loop = visited[(position, current)]
+    return {"prefix": prefix + unrolled[:loop], "cycle": unrolled[loop:]}
+
+
+def model_satisfies_property_minimized(formula, tcc_structure, witness=None,
+                                       statistics=None,
+                                       engine=model_satisfies_property_tableau):
+    """
+    Checks if a model satisfies a temporal formula on the quotient of the tcc
+    structure by the bisimulation with respect to the propositions of the
+    formula (see :py:func:`.minimize_tcc_structure`).
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param witness: Empty dictionary to store, when the result is ``True``,
+        the witness of the engine over the original tcc nodes (see
+        :py:func:`.get_original_witness`).
+    :type witness: Dictionary
+
+    :param statistics: Empty dictionary to store the statistics of the
+        engine, the time of the minimization (``phases``) and the number of
+        tcc nodes before (``tcc_nodes``) and after (``quotient_nodes``) the
+        minimization.
+    :type statistics: Dictionary
+
+    :param engine: Function that checks the formula on the quotient, with the
+        parameters of
+        :py:func:`tableau.model_satisfies_property_tableau`.
+    :type engine: Function
+
+    :returns: ``True`` if the model satisfies the formula or ``False``
+        otherwise.
+    :rtype: Boolean
+
+    .. note::
+        Bisimilar nodes satisfy the same LTL formulas, so the result of the
+        tableau engine is preserved. The result of
+        :py:func:`model_checking_algorithm.model_satisfies_property` can
+        change, because it only looks at the components next to an initial
+        node.
+
+    """
+    start = get_time()
+    quotient, blocks = minimize_tcc_structure(tcc_structure, formula)
+    record_phase(statistics, "bisimulation", start)
+
+    quotient_witness = None if witness is None else {}
+    result = engine(formula, quotient, quotient_witness, statistics)
+
+    if result and witness is not None:
+        witness.update(get_original_witness(quotient_witness, tcc_structure,
+                                            blocks))
+    if statistics is not None:
+        statistics["tcc_nodes"] = len(tcc_structure)
+        statistics["quotient_nodes"] = len(quotient)
+        statistics["time"] = get_time() - start
+    return result
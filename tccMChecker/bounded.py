@@ -0,0 +1,324 @@
+"""This module contains a bounded model checker, which unrolls a tcc structure
+from its initial nodes one level at a time and looks for a lasso-shaped path
+that satisfies a formula among the nodes reached so far [BCCZ99]_. It only
+builds the part of the model checking graph that is needed to find short
+witnesses."""
+
+from __future__ import print_function
+
+from tarjan import tarjan
+
+from tccMChecker.check_statistics import get_time, record_closure
+from tccMChecker.closure import get_closure
+from tccMChecker.distributed import is_accepting
+from tccMChecker.model_checking_graph import get_all_atoms, \
+    get_closure_propositions, get_relevant_store, get_store_key, \
+    get_node_atoms, search_formulas, is_in_atom, is_next_state
+from tccMChecker.searching_algorithm import get_shortest_path
+
+
+class BoundedModelChecker(object):
+    """
+    This class represents the bounded model checking of a formula over a tcc
+    structure. The nodes of the model checking graph are numbered in the
+    order in which they are reached, and the nodes reached at the last level
+    (the frontier) are kept between calls of :py:meth:`.check`, so raising
+    the bound only expands the new levels.
+
+    As in :py:func:`tableau.model_satisfies_property_tableau`, the cycle can
+    be reached from an initial node through any number of edges.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.bounded import *
+    >>> from tccMChecker.formula import Formula
+    >>> formula = Formula({"<>": {"^": {"": "da=5", "o": "da=10"}}})
+    >>> checker = BoundedModelChecker(formula, tcc_structure)
+    >>> checker.check(1)
+    False
+    >>> witness = {}
+    >>> checker.check(4, witness)
+    True
+    >>> [tcc_node for tcc_node, _, _ in witness["prefix"] + witness["cycle"]]
+    [4, 10, 18]
+
+    """
+
+    def __init__(self, formula, tcc_structure):
+        """
+        Constructor method.
+
+        """
+        self.__formula = formula
+        self.__tcc_structure = tcc_structure
+
+        closure = []
+        get_closure(formula, closure)
+        self.__closure = closure
+        self.__atoms = get_all_atoms(closure)
+        self.__propositions = get_closure_propositions(closure)
+        self.__eventualities = search_formulas(closure, "<>") or [None]
+        self.__store_atoms = {}
+        self.__tcc_atoms = {}
+
+        self.__steps = []
+        self.__numbers = {}
+        self.__graph = {}
+        self.__parents = {}
+        self.__levels = []
+        self.__frontier = []
+        self.__witness = None
+
+        for tcc_node, data in tcc_structure.items():
+            if data.get("initial"):
+                for index, atom in enumerate(self.get_tcc_node_atoms(
+                        tcc_node)):
+                    if is_in_atom(formula.get_formula(), atom):
+                        node = self.get_node(tcc_node, index)
+                        self.__parents[node] = None
+                        self.__frontier.append(node)
+
+    def get_tcc_node_atoms(self, tcc_node):
+        """
+        Returns the atoms of a tcc node (see
+        :py:func:`model_checking_graph.get_node_atoms`). They are computed the
+        first time the tcc node is reached, once for each distinct store.
+
+        :param tcc_node: tcc node.
+
+        :returns: The atoms of the tcc node.
+        :rtype: List of atoms
+
+        """
+        if tcc_node not in self.__tcc_atoms:
+            store = self.__tcc_structure[tcc_node].get("store")
+            relevant_store = get_relevant_store(store, self.__propositions)
+            if relevant_store is not None:
+                store = relevant_store
+
+            store_key = get_store_key(store)
+            if store_key not in self.__store_atoms:
+                self.__store_atoms[store_key] = get_node_atoms(store,
+                                                               self.__atoms)
+            self.__tcc_atoms[tcc_node] = self.__store_atoms[store_key]
+        return self.__tcc_atoms[tcc_node]
+
+    def get_node(self, tcc_node, index):
+        """
+        Returns the number of a model checking node, which is given when the
+        node is reached for the first time.
+
+        :param tcc_node: tcc node.
+
+        :param index: Index of the atom in the atoms of the tcc node.
+        :type index: Integer
+
+        :returns: Number of the node.
+        :rtype: Integer
+
+        """
+        key = (tcc_node, index)
+        if key not in self.__numbers:
+            self.__numbers[key] = len(self.__steps)
+            self.__steps.append((tcc_node, len(self.__steps),
+                                 self.get_tcc_node_atoms(tcc_node)[index]))
+        return self.__numbers[key]
+
+    def expand(self):
+        """
+        Computes the successors of the nodes of the frontier. The successors
+        that were not reached before are the new frontier.
+
+        :returns: The nodes that were expanded.
+        :rtype: List of Integers
+
+        """
+        expanded = self.__frontier
+        self.__levels.append(len(expanded))
+        self.__frontier = []
+        for node in expanded:
+            tcc_node, _, atom = self.__steps[node]
+            next_formulas = search_formulas(atom, "o")
+            next_nodes = []
+            for next_tcc_node in self.__tcc_structure[tcc_node].get("edges"):
+                for index, next_atom in enumerate(self.get_tcc_node_atoms(
+                        next_tcc_node)):
+                    if is_next_state(next_formulas, next_atom):
+                        next_node = self.get_node(next_tcc_node, index)
+                        next_nodes.append(next_node)
+                        if next_node not in self.__parents:
+                            self.__parents[next_node] = node
+                            self.__frontier.append(next_node)
+            self.__graph[node] = next_nodes
+        return expanded
+
+    def is_fair(self, component):
+        """
+        Checks if a strongly connected component of the expanded nodes has a
+        cycle that fulfils every eventuality.
+
+        :param component: Nodes of the component.
+        :type component: List of Integers
+
+        :rtype: Boolean
+
+        """
+        members = set(component)
+        if len(component) == 1 and component[0] not in \
+                self.__graph[component[0]]:
+            return False
+        return all(any(is_accepting(self.__steps[node][2], eventuality)
+                       for node in members)
+                   for eventuality in self.__eventualities)
+
+    def get_witness(self, component):
+        """
+        Returns a lasso-shaped path through a fair component (see
+        :py:func:`searching_algorithm.get_lasso_witness`).
+
+        :param component: Nodes of the component.
+        :type component: List of Integers
+
+        :returns: A dictionary with the keys ``prefix`` and ``cycle``.
+        :rtype: Dictionary
+
+        """
+        members = set(component)
+        entry = min(members, key=lambda node: self.get_depth(node))
+        prefix = []
+        node = self.__parents[entry]
+        while node is not None:
+            prefix.append(node)
+            node = self.__parents[node]
+        prefix.reverse()
+
+        cycle = [entry]
+        for eventuality in self.__eventualities:
+            if is_accepting(self.__steps[entry][2], eventuality):
+                continue
+            targets = set(node for node in members if
+                          is_accepting(self.__steps[node][2], eventuality))
+            if not targets.intersection(cycle):
+                path = get_shortest_path(self.__graph, [cycle[-1]], targets,
+                                         members)
+                cycle.extend(path[1:])
+
+        # back to the entry node with a non-empty path
+        path = get_shortest_path(self.__graph,
+                                 [node for node in self.__graph[cycle[-1]]
+                                  if node in members], set([entry]), members)
+        cycle.extend(path[:-1])
+
+        return {"prefix": [self.__steps[node] for node in prefix],
+                "cycle": [self.__steps[node] for node in cycle]}
+
+    def get_depth(self, node):
+        """
+        Returns the level where a node was reached.
+
+        :param node: Number of the node.
+        :type node: Integer
+
+        :rtype: Integer
+
+        """
+        depth = 0
+        while self.__parents[node] is not None:
+            node = self.__parents[node]
+            depth += 1
+        return depth
+
+    def check(self, bound, witness=None, statistics=None):
+        """
+        Looks for a lasso-shaped path that satisfies the formula among the
+        nodes reached in at most ``bound`` steps from an initial node. The
+        levels are expanded one at a time, and the search stops at the first
+        level where a path is found.
+
+        :param bound: Maximum number of steps.
+        :type bound: Integer
+
+        :param witness: Empty dictionary to store the path found (see
+            :py:func:`searching_algorithm.get_lasso_witness`).
+        :type witness: Dictionary
+
+        :param statistics: Empty dictionary to store the number of levels
+            expanded (``depth``), the number of nodes expanded at each level
+            (``levels``), the number of nodes and edges of the graph
+            (``graph_nodes`` and ``graph_edges``), the time of the call
+            (``time``) and whether the whole graph was expanded
+            (``complete``).
+        :type statistics: Dictionary
+
+        :returns: ``True`` if such a path exists, or ``False`` otherwise. If
+            the whole graph was expanded, ``False`` means that the model does
+            not satisfy the formula.
+        :rtype: Boolean
+
+        """
+        start = get_time()
+        while self.__witness is None and self.__frontier and \
+                len(self.__levels) <= bound:
+            expanded = set(self.expand())
+            for component in tarjan(dict(
+                    (node, [next_node for next_node in next_nodes
+                            if next_node in self.__graph])
+                    for node, next_nodes in self.__graph.items())):
+                if expanded.intersection(component) and \
+                        self.is_fair(component):
+                    self.__witness = self.get_witness(component)
+                    break
+
+        if self.__witness is not None and witness is not None:
+            witness.update(self.__witness)
+        if statistics is not None:
+            record_closure(statistics, self.__closure)
+            statistics["depth"] = len(self.__levels)
+            statistics["levels"] = list(self.__levels)
+            statistics["graph_nodes"] = len(self.__steps)
+            statistics["graph_edges"] = sum(
+                len(next_nodes) for next_nodes in self.__graph.values())
+            statistics["complete"] = not self.__frontier
+            statistics["time"] = get_time() - start
+        return self.__witness is not None
+
+
+def model_satisfies_property_bounded(formula, tcc_structure, bound,
+                                     witness=None, statistics=None):
+    """
+    Checks if a model satisfies a formula within a bound (see
+    :py:class:`.BoundedModelChecker`).
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param bound: Maximum number of steps of the path.
+    :type bound: Integer
+
+    :param witness: See :py:meth:`.BoundedModelChecker.check`.
+    :type witness: Dictionary
+
+    :param statistics: See :py:meth:`.BoundedModelChecker.check`.
+    :type statistics: Dictionary
+
+    :returns: ``True`` if a path within the bound satisfies the formula or
+        ``False`` otherwise.
+    :rtype: Boolean
+
+    .. note::
+        As in :py:func:`model_checking_algorithm.model_satisfies_property`, the
+        formula is the negation of the property, so a path found is a
+        counterexample of the property.
+
+    """
+    return BoundedModelChecker(formula, tcc_structure).check(
+        bound, witness, statistics)
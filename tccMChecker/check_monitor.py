@@ -0,0 +1,183 @@
+"""This module contains the monitor of a run of the model checking algorithm,
+which reports the progress of each phase and stops the run when it is
+cancelled or when it exceeds its time or memory budget."""
+
+from __future__ import print_function
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from tccMChecker.check_statistics import get_time
+
+
+def get_memory_usage():
+    """
+    Returns the memory used by the current process: its resident set size
+    when ``/proc`` is available, or its peak resident set size otherwise.
+
+    :returns: Bytes, or ``None`` if they cannot be measured.
+    :rtype: Integer
+
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class CheckInterrupted(Exception):
+    """
+    This exception is raised by a :py:class:`.CheckMonitor` to stop a run.
+
+    :param reason: ``cancelled``, ``time_limit``, ``phase_time_limit``,
+        ``memory_limit`` or ``phase_memory_limit``.
+    :type reason: String
+
+    :param phase: Name of the phase where the run was stopped.
+    :type phase: String
+
+    """
+
+    def __init__(self, reason, phase):
+        """
+        Constructor method.
+
+        """
+        Exception.__init__(self, "{} in phase {}".format(reason, phase))
+        self.reason = reason
+        self.phase = phase
+
+
+class CheckMonitor(object):
+    """
+    This class represents the monitor of a run of the model checking
+    algorithm. The algorithm calls :py:meth:`.start_phase` at the start of
+    each phase and :py:meth:`.update` while the phase makes progress, and the
+    monitor raises :py:class:`.CheckInterrupted` when the run must stop.
+
+    :param progress: Function called with a dictionary at each update: the
+        phase (``phase``), the time since the start of the run (``time``)
+        and of the phase (``phase_time``), and the counters of the phase
+        (e.g. ``tcc_nodes``, ``atoms`` or ``edges``).
+    :type progress: Function
+
+    :param time_limit: Maximum time of the run in seconds.
+    :type time_limit: Float
+
+    :param phase_time_limits: Maximum time of each phase in seconds.
+    :type phase_time_limits: Dictionary
+
+    :param memory_limit: Maximum memory of the process in bytes (see
+        :py:func:`.get_memory_usage`).
+    :type memory_limit: Integer
+
+    :param phase_memory_limits: Maximum memory in bytes that each phase can
+        add to the memory of the process at the start of the phase.
+    :type phase_memory_limits: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.check_monitor import *
+    >>> from tccMChecker.model_checking_algorithm import *
+    >>> monitor = CheckMonitor(time_limit=60,
+    ...                        phase_time_limits={"model_checking_atoms": 0.01})
+    >>> statistics = {}
+    >>> print(model_satisfies_property(formula, tcc_structure,
+    ...                                statistics=statistics, monitor=monitor))
+    None
+    >>> statistics["status"], statistics["interruption"]
+    ('unknown', {'reason': 'phase_time_limit', 'phase': 'model_checking_atoms'})
+
+    .. note::
+        The run is only stopped at the updates of the monitor, so a long
+        step between two updates (e.g. a large strongly connected component,
+        or the components computed by several processes) is only stopped
+        when it ends. :py:meth:`.cancel` can be called from another thread.
+
+    """
+
+    def __init__(self, progress=None, time_limit=None, phase_time_limits=None,
+                 memory_limit=None, phase_memory_limits=None):
+        """
+        Constructor method.
+
+        """
+        self.progress = progress
+        self.time_limit = time_limit
+        self.phase_time_limits = phase_time_limits or {}
+        self.memory_limit = memory_limit
+        self.phase_memory_limits = phase_memory_limits or {}
+        self.cancelled = False
+        self.start = None
+        self.phase = None
+        self.phase_start = None
+        self.phase_memory = None
+        self.counters = {}
+
+    def cancel(self):
+        """
+        Stops the run at its next update.
+
+        """
+        self.cancelled = True
+
+    def start_phase(self, phase):
+        """
+        Starts a phase of the run.
+
+        :param phase: Name of the phase.
+        :type phase: String
+
+        """
+        now = get_time()
+        if self.start is None:
+            self.start = now
+        self.phase = phase
+        self.phase_start = now
+        self.phase_memory = None
+        if phase in self.phase_memory_limits:
+            self.phase_memory = get_memory_usage()
+        self.counters = {}
+        self.update()
+
+    def update(self, **counters):
+        """
+        Reports the progress of the current phase and checks the budget.
+
+        :param counters: Counters of the phase.
+
+        :raises CheckInterrupted: If the run must stop.
+
+        """
+        self.counters.update(counters)
+        now = get_time()
+        if self.progress is not None:
+            event = dict(self.counters)
+            event.update({"phase": self.phase, "time": now - self.start,
+                          "phase_time": now - self.phase_start})
+            self.progress(event)
+
+        if self.cancelled:
+            raise CheckInterrupted("cancelled", self.phase)
+        if self.time_limit is not None and \
+                now - self.start > self.time_limit:
+            raise CheckInterrupted("time_limit", self.phase)
+        if self.phase in self.phase_time_limits and \
+                now - self.phase_start > self.phase_time_limits[self.phase]:
+            raise CheckInterrupted("phase_time_limit", self.phase)
+        if self.memory_limit is None and self.phase_memory is None:
+            return
+        memory = get_memory_usage()
+        if memory is None:
+            return
+        if self.memory_limit is not None and memory > self.memory_limit:
+            raise CheckInterrupted("memory_limit", self.phase)
+        if self.phase_memory is not None and memory - self.phase_memory > \
+                self.phase_memory_limits[self.phase]:
+            raise CheckInterrupted("phase_memory_limit", self.phase)
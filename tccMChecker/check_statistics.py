@@ -0,0 +1,199 @@
+"""This module contains the functions that collect the statistics of a run of
+the model checking algorithm."""
+
+from __future__ import print_function
+
+import timeit
+
+from tccMChecker.model_checking_graph import call_counters, \
+    get_basic_formulas, get_no_basic_formulas
+
+
+def get_time():
+    """
+    Returns the current time of the most precise clock available.
+
+    :returns: Time in seconds.
+    :rtype: Float
+
+    """
+    return timeit.default_timer()
+
+
+def get_call_counters():
+    """
+    Returns the number of calls of the functions in the hot path of the
+    algorithm (:py:func:`model_checking_graph.is_consistent` and
+    :py:func:`model_checking_graph.is_in_atom`) in the current thread.
+
+    :returns: A copy of the counters.
+    :rtype: Dictionary
+
+    """
+    return dict(vars(call_counters))
+
+
+def record_phase(statistics, phase, start):
+    """
+    Records the wall time of a phase of the algorithm.
+
+    :param statistics: Dictionary where the statistics are stored. If it is
+        ``None``, nothing is recorded.
+    :type statistics: Dictionary
+
+    :param phase: Name of the phase.
+    :type phase: String
+
+    :param start: Time when the phase started (see :py:func:`.get_time`).
+    :type start: Float
+
+    :returns: The current time, that is, the start of the next phase.
+    :rtype: Float
+
+    """
+    now = get_time()
+    if statistics is not None:
+        statistics.setdefault("phases", {})[phase] = {"time": now - start}
+    return now
+
+
+def record_calls(statistics, counters):
+    """
+    Records the number of calls of the functions in the hot path since the
+    counters were taken.
+
+    :param statistics: Dictionary where the statistics are stored.
+    :type statistics: Dictionary
+
+    :param counters: Counters returned by :py:func:`.get_call_counters`.
+    :type counters: Dictionary
+
+    """
+    if statistics is not None:
+        statistics["calls"] = {}
+        for function, calls in get_call_counters().items():
+            statistics["calls"][function] = calls - counters.get(function, 0)
+
+
+def record_closure(statistics, closure):
+    """
+    Records the size of the closure and its number of basic and non-basic
+    formulas.
+
+    :param statistics: Dictionary where the statistics are stored.
+    :type statistics: Dictionary
+
+    :param closure: Closure of a formula.
+    :type closure: List of :py:class:`~formula.Formula`
+
+    """
+    if statistics is not None:
+        statistics["closure_size"] = len(closure)
+        statistics["basic_formulas"] = len(get_basic_formulas(closure))
+        statistics["no_basic_formulas"] = len(get_no_basic_formulas(closure))
+
+
+def record_atoms(statistics, atoms, model_checking_atoms):
+    """
+    Records the number of atoms of the closure and the number of atoms of
+    each tcc node.
+
+    :param statistics: Dictionary where the statistics are stored.
+    :type statistics: Dictionary
+
+    :param atoms: List of all possible atoms of the closure.
+    :type atoms: List of atoms
+
+    :param model_checking_atoms: Atoms of a tcc structure.
+    :type model_checking_atoms: Dictionary
+
+    """
+    if statistics is not None:
+        statistics["atoms"] = len(atoms)
+        statistics["atoms_per_tcc_node"] = {}
+        for tcc_node in model_checking_atoms.keys():
+            statistics["atoms_per_tcc_node"][tcc_node] = len(
+                model_checking_atoms.get(tcc_node))
+
+
+def record_graph(statistics, model_checking_graph):
+    """
+    Records the number of nodes and edges of the model checking graph.
+
+    :param statistics: Dictionary where the statistics are stored.
+    :type statistics: Dictionary
+
+    :param model_checking_graph: Model checking graph.
+    :type model_checking_graph: Dictionary
+
+    """
+    if statistics is not None:
+        statistics["graph_nodes"] = len(model_checking_graph)
+        statistics["graph_edges"] = sum(
+            [len(next_nodes) for next_nodes in model_checking_graph.values()])
+
+
+def record_trimming(statistics, model_checking_graph, cycle_core):
+    """
+    Records the number of nodes and edges of the model checking graph that
+    were removed before the computation of its strongly connected components
+    (see :py:func:`model_checking_graph.get_cycle_core`).
+
+    :param statistics: Dictionary where the statistics are stored.
+    :type statistics: Dictionary
+
+    :param model_checking_graph: Model checking graph.
+    :type model_checking_graph: Dictionary
+
+    :param cycle_core: Remaining subgraph.
+    :type cycle_core: Dictionary
+
+    """
+    if statistics is not None:
+        statistics["trimmed_nodes"] = \
+            len(model_checking_graph) - len(cycle_core)
+        statistics["trimmed_edges"] = \
+            sum([len(next_nodes)
+                 for next_nodes in model_checking_graph.values()]) - \
+            sum([len(next_nodes) for next_nodes in cycle_core.values()])
+
+
+def get_scc_size_histogram(scc_list):
+    """
+    Returns the number of strongly connected components of each size.
+
+    :param scc_list: Nodes of each strongly connected component.
+    :type scc_list: List of Lists
+
+    :returns: Dictionary that has sizes as keys, and numbers of components as
+        values.
+    :rtype: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.check_statistics import *
+    >>> get_scc_size_histogram([[1], [2], [3, 4, 5]])
+    {1: 2, 3: 1}
+
+    """
+    histogram = {}
+    for scc in scc_list:
+        histogram[len(scc)] = histogram.get(len(scc), 0) + 1
+    return histogram
+
+
+def record_components(statistics, scc_list):
+    """
+    Records the number of strongly connected components and the histogram of
+    their sizes.
+
+    :param statistics: Dictionary where the statistics are stored.
+    :type statistics: Dictionary
+
+    :param scc_list: Nodes of each strongly connected component.
+    :type scc_list: List of Lists
+
+    """
+    if statistics is not None:
+        statistics["scc"] = len(scc_list)
+        statistics["scc_size_histogram"] = get_scc_size_histogram(scc_list)
@@ -0,0 +1,291 @@
+"""This module contains the ``tccmchecker`` command, which checks the
+properties of one or more property files over a tcc structure, runs the
+checks on several processes, and writes a report of the results.
+
+Usage::
+
+    tccmchecker model.json properties.ltl --jobs 4 --timeout 60 \\
+        --engine tableau --domains domains.txt --output report.csv
+
+The domains of the variables of the model are read from the model file (see
+:py:func:`structure_io.load_model`) or from a file of declarations (see
+:py:func:`domains.parse_domains`), and default to
+:py:data:`domains.DEFAULT_DOMAINS`. The propositions of the model and of the
+properties must be declared.
+
+As in :py:func:`model_checking_algorithm.model_satisfies_property`, each
+formula of the property files is passed to the engine as it is written, and
+the property is satisfied when the engine returns ``False``.
+"""
+
+from __future__ import print_function
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from tccMChecker.check_statistics import get_time
+from tccMChecker.daemon import ENGINES
+from tccMChecker.formula import Formula
+from tccMChecker.formula_parser import load_property_file, format_formula
+from tccMChecker.structure_io import load_model, check_propositions
+
+# Fields of the report that are written before the times of the phases
+REPORT_FIELDS = ["file", "property", "formula", "engine", "status", "result",
+                 "satisfied", "time", "error"]
+
+# Seconds between two checks of the running jobs
+_poll_interval = 0.01
+
+
+def get_jobs(property_paths):
+    """
+    Returns the checks of the properties of some property files (see
+    :py:func:`formula_parser.load_property_file`).
+
+    :param property_paths: Paths of the property files.
+    :type property_paths: List of Strings
+
+    :returns: List of tuples ``(file, name, formula)``.
+    :rtype: List of Tuples
+
+    """
+    jobs = []
+    for path in property_paths:
+        for name, formula in load_property_file(path):
+            jobs.append((path, name, formula))
+    return jobs
+
+
+def run_job(connection, formula, tcc_structure, engine, domains=None):
+    """
+    Checks a formula in a job process, and sends the result of the engine
+    and its statistics through a connection. The output printed by the
+    engine is discarded.
+
+    :param connection: Connection to the main process.
+    :type connection: :py:class:`multiprocessing.Connection`
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc structure.
+    :type tcc_structure: Dictionary
+
+    :param engine: Name of the engine (see :py:data:`daemon.ENGINES`).
+    :type engine: String
+
+    :param domains: Domains of the variables of the model (see
+        :py:meth:`formula.Formula.set_proposition_domains`).
+
+    """
+    sys.stdout = open(os.devnull, "w")
+    statistics = {}
+    try:
+        if domains is not None:
+            Formula.set_proposition_domains(domains)
+        result = ENGINES[engine](formula, tcc_structure,
+                                 statistics=statistics)
+        connection.send({"status": "ok", "result": result,
+                         "phases": dict((phase, value["time"]) for
+                                        phase, value in
+                                        statistics.get("phases", {}).items())})
+    except Exception as error:
+        connection.send({"status": "error",
+                         "error": "{}: {}".format(type(error).__name__,
+                                                  error)})
+    connection.close()
+
+
+def run_jobs(jobs, tcc_structure, engine="explicit", processes=None,
+             timeout=None, domains=None):
+    """
+    Runs the checks of some formulas, each one in its own process, with at
+    most ``processes`` processes at the same time.
+
+    :param jobs: Checks (see :py:func:`.get_jobs`).
+    :type jobs: List of Tuples
+
+    :param tcc_structure: tcc structure.
+    :type tcc_structure: Dictionary
+
+    :param engine: Name of the engine (see :py:data:`daemon.ENGINES`).
+    :type engine: String
+
+    :param processes: Maximum number of processes (by default, the number of
+        CPUs).
+    :type processes: Integer
+
+    :param timeout: Maximum time of a check in seconds. The process of a check
+        that takes longer is stopped, and its status is ``timeout``.
+    :type timeout: Float
+
+    :param domains: Domains of the variables of the model, set in each
+        process (see :py:meth:`formula.Formula.set_proposition_domains`).
+
+    :returns: A row of the report for each check, in the order of the jobs
+        (see :py:data:`.REPORT_FIELDS`). The time of each phase is stored in
+        ``phases``.
+    :rtype: List of Dictionaries
+
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    rows = []
+    for path, name, formula in jobs:
+        rows.append({"file": path, "property": name,
+                     "formula": format_formula(formula), "engine": engine})
+
+    pending = list(range(len(jobs)))
+    pending.reverse()
+    running = {}
+    while pending or running:
+        while pending and len(running) < processes:
+            index = pending.pop()
+            receiver, sender = multiprocessing.Pipe(False)
+            process = multiprocessing.Process(
+                target=run_job,
+                args=(sender, jobs[index][2], tcc_structure, engine,
+                      domains))
+            process.start()
+            sender.close()
+            running[index] = (process, receiver, get_time())
+
+        time.sleep(_poll_interval)
+        for index, (process, receiver, start) in list(running.items()):
+            elapsed = get_time() - start
+            if receiver.poll():
+                try:
+                    rows[index].update(receiver.recv())
+                except EOFError:
+                    rows[index].update({
+                        "status": "error",
+                        "error": "the process exited with code {}".format(
+                            process.exitcode)})
+            elif timeout is not None and elapsed > timeout:
+                process.terminate()
+                rows[index].update({"status": "timeout"})
+            elif process.is_alive():
+                continue
+            else:
+                rows[index].update({
+                    "status": "error",
+                    "error": "the process exited with code {}".format(
+                        process.exitcode)})
+
+            process.join()
+            receiver.close()
+            rows[index]["time"] = elapsed
+            if rows[index]["status"] == "ok":
+                rows[index]["satisfied"] = not rows[index]["result"]
+            del running[index]
+    return rows
+
+
+def write_report(rows, stream, report_format="json"):
+    """
+    Writes the report of some checks.
+
+    :param rows: Rows of the report (see :py:func:`.run_jobs`).
+    :type rows: List of Dictionaries
+
+    :param stream: File where the report is written.
+    :type stream: File
+
+    :param report_format: ``json`` (a list of objects) or ``csv`` (a column
+        ``phase:<name>`` for the time of each phase).
+    :type report_format: String
+
+    """
+    if report_format == "json":
+        json.dump(rows, stream, indent=2, sort_keys=True)
+        stream.write("\n")
+        return
+
+    phases = sorted(set(phase for row in rows
+                        for phase in row.get("phases", {}).keys()))
+    writer = csv.writer(stream)
+    writer.writerow(REPORT_FIELDS + ["phase:" + phase for phase in phases])
+    for row in rows:
+        writer.writerow([row.get(field, "") for field in REPORT_FIELDS] +
+                        [row.get("phases", {}).get(phase, "")
+                         for phase in phases])
+
+
+def main(arguments=None):
+    """
+    Runs the ``tccmchecker`` command.
+
+    :param arguments: Command line arguments (by default, ``sys.argv``).
+    :type arguments: List of Strings
+
+    :returns: ``0`` if all the properties are satisfied, ``1`` if some
+        property is not satisfied, or ``2`` if some check failed or timed
+        out.
+    :rtype: Integer
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="tccmchecker", description=__doc__.split("\n\n")[0])
+    parser.add_argument("model", help="JSON file of the tcc structure")
+    parser.add_argument("properties", nargs="+", help="property files")
+    parser.add_argument("-e", "--engine", default="explicit",
+                        choices=sorted(ENGINES.keys()),
+                        help="model checking engine")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of processes (default: number of CPUs)")
+    parser.add_argument("-t", "--timeout", type=float, default=None,
+                        help="maximum time of each check in seconds")
+    parser.add_argument("-d", "--domains", default=None,
+                        help="file of the domains of the variables of the "
+                        "model (default: from the model file)")
+    parser.add_argument("-o", "--output", default=None,
+                        help="file of the report (default: standard output)")
+    parser.add_argument("-f", "--format", choices=["json", "csv"],
+                        default=None,
+                        help="format of the report (default: from the "
+                        "extension of the output, or json)")
+    options = parser.parse_args(arguments)
+
+    report_format = options.format
+    if report_format is None:
+        report_format = "csv" if options.output and \
+            options.output.endswith(".csv") else "json"
+
+    tcc_structure, domains = load_model(options.model)
+    if options.domains is not None:
+        with open(options.domains) as domains_file:
+            domains = domains_file.read()
+    jobs = get_jobs(options.properties)
+    try:
+        if domains is not None:
+            Formula.set_proposition_domains(domains)
+        check_propositions(tcc_structure,
+                           [formula for _, _, formula in jobs])
+    except ValueError as error:
+        parser.error("{} (declare the domains of the variables in the model "
+                     "file or with --domains)".format(error))
+
+    rows = run_jobs(jobs, tcc_structure, options.engine, options.jobs,
+                    options.timeout, domains)
+
+    if options.output is None:
+        write_report(rows, sys.stdout, report_format)
+    else:
+        with open(options.output, "w") as stream:
+            write_report(rows, stream, report_format)
+
+    if any(row["status"] != "ok" for row in rows):
+        return 2
+    if any(not row["satisfied"] for row in rows):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,485 @@
+"""This module contains a checker daemon that keeps the tcc structures, the
+parsed formulas and the results of the checks in memory between checks. The
+jobs are received over a Unix socket, one JSON object per line, and are run
+by a pool of worker processes.
+
+Usage::
+
+    python -m tccMChecker.daemon --socket /tmp/tccmchecker.sock --processes 4
+
+Each request is a JSON object with a ``command``, and an optional ``id`` that
+is copied to its response:
+
+* ``{"command": "load", "structure": name, "path": path, "domains":
+  domains}`` registers the JSON file of a model (see
+  :py:func:`structure_io.load_model`) with a name. The optional domains of
+  the variables (see :py:func:`structure_io.data_to_domains`) replace the
+  ones of the file.
+* ``{"command": "check", "structure": name, "formula": text, "engine":
+  engine}`` checks a formula (see :py:func:`.run_check`). The structure can
+  also be the path of a file.
+* ``{"command": "status"}`` returns the registered structures and the number
+  of jobs run.
+* ``{"command": "shutdown"}`` stops the daemon.
+
+The responses are written in the order in which the jobs finish. A request
+without the fields of its command is answered with an ``error``.
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+
+try:
+    import socketserver
+except ImportError:  # Python 2
+    import SocketServer as socketserver
+
+from tccMChecker.bisimulation import model_satisfies_property_minimized
+from tccMChecker.check_statistics import get_time
+from tccMChecker.domains import DEFAULT_DOMAINS
+from tccMChecker.engine_selection import check_property
+from tccMChecker.formula import Formula
+from tccMChecker.formula_parser import parse_formula
+from tccMChecker.incremental import ModelCheckingSession
+from tccMChecker.model_checking_algorithm import model_satisfies_property
+from tccMChecker.structure_io import load_model, data_to_domains, \
+    check_propositions
+from tccMChecker.symbolic_engine import model_satisfies_property_symbolic
+from tccMChecker.tableau import model_satisfies_property_tableau
+
+# Engines that can be requested by the jobs
+ENGINES = {"explicit": model_satisfies_property,
+           "symbolic": model_satisfies_property_symbolic,
+           "tableau": model_satisfies_property_tableau,
+           "minimized": model_satisfies_property_minimized,
+           "auto": check_property}
+
+# Maximum number of structures and results kept by each worker
+CACHE_SIZE = 256
+
+# Maximum number of model checking sessions (closure, atoms, model checking
+# graph and strongly connected components) kept by each worker
+SESSION_CACHE_SIZE = 16
+
+# Fields of the requests of each command
+REQUEST_FIELDS = {"check": ["structure", "formula"],
+                  "load": ["structure", "path"]}
+
+_structure_cache = collections.OrderedDict()
+_result_cache = collections.OrderedDict()
+_session_cache = collections.OrderedDict()
+_worker_domains = {}
+
+
+def get_cached(cache, key):
+    """
+    Returns an entry of a LRU cache and marks it as the most recent one.
+
+    :param cache: Cache.
+    :type cache: OrderedDict
+
+    :param key: Key of the entry.
+
+    :returns: The value of the entry, or ``None`` if it is not in the cache.
+
+    """
+    value = cache.pop(key, None)
+    if value is not None:
+        cache[key] = value
+    return value
+
+
+def set_cached(cache, key, value, size=CACHE_SIZE):
+    """
+    Adds an entry to a LRU cache.
+
+    :param cache: Cache.
+    :type cache: OrderedDict
+
+    :param key: Key of the entry.
+
+    :param value: Value of the entry.
+
+    :param size: Maximum number of entries of the cache.
+    :type size: Integer
+
+    """
+    if len(cache) >= size:
+        cache.popitem(last=False)
+    cache[key] = value
+
+
+def get_missing_fields(request):
+    """
+    Returns the fields of the command of a request (see
+    :py:data:`.REQUEST_FIELDS`) that are missing or are not text.
+
+    :param request: Request.
+    :type request: Dictionary
+
+    :returns: Names of the fields.
+    :rtype: List of Strings
+
+    :Example:
+
+    >>> from tccMChecker.daemon import *
+    >>> get_missing_fields({"command": "load", "structure": "s"})
+    ['path']
+
+    """
+    return [field for field in REQUEST_FIELDS.get(request.get("command"), [])
+            if not isinstance(request.get(field), (type(""), type(u"")))]
+
+
+def get_structure(path):
+    """
+    Returns the model of a JSON file (see :py:func:`structure_io.load_model`).
+    The model is read again only when the file is modified.
+
+    :param path: Path of the file.
+    :type path: String
+
+    :returns: A tuple with the version of the file (its modification time),
+        the tcc structure and the domains of its variables (``None`` if the
+        file has none).
+    :rtype: Tuple
+
+    """
+    version = os.path.getmtime(path)
+    entry = get_cached(_structure_cache, path)
+    if entry is None or entry[0] != version:
+        entry = (version,) + load_model(path)
+        set_cached(_structure_cache, path, entry)
+    return entry
+
+
+def set_domains(domains):
+    """
+    Sets the domains of the variables of the model of a check in a worker
+    process, when they are not the ones of the previous check.
+
+    :param domains: Domains (see
+        :py:meth:`formula.Formula.set_proposition_domains`), or ``None`` for
+        :py:data:`domains.DEFAULT_DOMAINS`.
+
+    """
+    if domains is None:
+        domains = DEFAULT_DOMAINS
+    key = json.dumps(domains, sort_keys=True)
+    if _worker_domains.get("key") != key:
+        Formula.set_proposition_domains(domains)
+        _worker_domains["key"] = key
+
+
+def run_check(path, formula_text, engine="explicit", domains=None):
+    """
+    Checks a formula over the tcc structure of a JSON file. The results are
+    kept until the file is modified. For the ``explicit`` engine, the
+    closure, the atoms, the model checking graph and its strongly connected
+    components are also kept, in a
+    :py:class:`incremental.ModelCheckingSession` of the structure and the
+    formula.
+
+    :param path: Path of the file of the tcc structure.
+    :type path: String
+
+    :param formula_text: Formula in text (see
+        :py:func:`formula_parser.parse_formula`). As in
+        :py:func:`model_checking_algorithm.model_satisfies_property`, it is
+        the negation of the property.
+    :type formula_text: String
+
+    :param engine: Name of the engine (see :py:data:`.ENGINES`).
+    :type engine: String
+
+    :param domains: Domains of the variables of the model. By default, the
+        ones of the file, or :py:data:`domains.DEFAULT_DOMAINS`.
+
+    :returns: Dictionary with the result of the engine (``result``), the time
+        of the check in seconds (``time``) and whether the result was already
+        known (``cached``).
+    :rtype: Dictionary
+
+    :raises ValueError: If a proposition of the model or of the formula is
+        not declared in the domains.
+
+    .. note::
+        When the file is modified, the session of a formula is updated with
+        the changes of the structure (see
+        :py:meth:`incremental.ModelCheckingSession.update_structure`) instead
+        of being built again.
+
+    """
+    start = get_time()
+    version, tcc_structure, file_domains = get_structure(path)
+    if domains is None:
+        domains = file_domains
+    domains_key = json.dumps(domains, sort_keys=True)
+    key = (path, version, domains_key, engine, formula_text)
+    result = get_cached(_result_cache, key)
+    cached = result is not None
+    if not cached:
+        set_domains(domains)
+        formula = parse_formula(str(formula_text))
+        check_propositions(tcc_structure, [formula])
+        if engine == "explicit":
+            session_key = (path, domains_key, formula_text)
+            entry = get_cached(_session_cache, session_key)
+            if entry is not None and entry[0] != version and \
+                    not entry[1].update_structure(tcc_structure):
+                entry = None
+            if entry is None:
+                entry = (version, ModelCheckingSession(formula, tcc_structure))
+            else:
+                entry = (version, entry[1])
+            set_cached(_session_cache, session_key, entry, SESSION_CACHE_SIZE)
+            result = entry[1].check()
+        else:
+            result = ENGINES[engine](formula, tcc_structure)
+        set_cached(_result_cache, key, result)
+    return {"result": result, "time": get_time() - start, "cached": cached}
+
+
+def init_worker():
+    """
+    Initializes a worker process. The output printed by the engines is
+    discarded.
+
+    """
+    sys.stdout = open(os.devnull, "w")
+
+
+def run_job(path, formula_text, engine, domains=None):
+    """
+    Runs a check in a worker process (see :py:func:`.run_check`). The
+    exceptions are returned as errors.
+
+    :returns: The response of the job, without its ``id``.
+    :rtype: Dictionary
+
+    """
+    try:
+        return run_check(path, formula_text, engine, domains)
+    except Exception as error:
+        return {"error": "{}: {}".format(type(error).__name__, error)}
+
+
+class CheckerServer(socketserver.ThreadingMixIn,
+                    socketserver.UnixStreamServer):
+    """
+    This class represents the server of the checker daemon. Each connection
+    is handled by a thread that sends its jobs to the pool of workers. The
+    results of the jobs are also kept by the server, so a repeated job is
+    answered without waiting for a worker.
+
+    :param socket_path: Path of the Unix socket.
+    :type socket_path: String
+
+    :param processes: Number of worker processes (by default, the number of
+        CPUs).
+    :type processes: Integer
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, processes=None):
+        """
+        Constructor method.
+
+        """
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path,
+                                               CheckerHandler)
+        self.pool = multiprocessing.Pool(processes, init_worker)
+        self.lock = threading.Lock()
+        self.structures = {}
+        self.domains = {}
+        self.results = collections.OrderedDict()
+        self.jobs = 0
+
+    def get_path(self, structure):
+        """
+        Returns the path and the domains of a registered structure.
+
+        :param structure: Name or path of the structure.
+        :type structure: String
+
+        :returns: A tuple with the path of the file of the structure and the
+            domains given when it was registered (or ``None``).
+        :rtype: Tuple
+
+        """
+        with self.lock:
+            return (self.structures.get(structure, structure),
+                    self.domains.get(structure))
+
+    def server_close(self):
+        """
+        Stops the workers and removes the socket.
+
+        """
+        socketserver.UnixStreamServer.server_close(self)
+        self.pool.terminate()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+class CheckerHandler(socketserver.StreamRequestHandler):
+    """
+    This class handles a connection to the checker daemon (see
+    :py:class:`.CheckerServer`).
+
+    """
+
+    def handle(self):
+        """
+        Reads the requests of the connection and writes their responses.
+
+        """
+        lock = threading.Lock()
+        pending = []
+
+        def respond(request, response):
+            response["id"] = request.get("id")
+            with lock:
+                self.wfile.write((json.dumps(response) + "\n").encode())
+                self.wfile.flush()
+
+        for line in iter(self.rfile.readline, b""):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line.decode())
+            except ValueError as error:
+                respond({}, {"error": "invalid request: {}".format(error)})
+                continue
+
+            command = request.get("command")
+            missing = get_missing_fields(request)
+            if missing:
+                respond(request, {"error": "missing fields of {}: {}".format(
+                    command, ", ".join(missing))})
+            elif command == "check":
+                if request.get("engine", "explicit") not in ENGINES:
+                    respond(request, {"error": "unknown engine {}".format(
+                        request.get("engine"))})
+                    continue
+                with self.server.lock:
+                    self.server.jobs += 1
+                path, domains = self.server.get_path(request.get("structure"))
+                key = (path, os.path.getmtime(path) if os.path.exists(path)
+                       else None, json.dumps(domains, sort_keys=True),
+                       request.get("engine", "explicit"),
+                       request.get("formula"))
+                with self.server.lock:
+                    result = get_cached(self.server.results, key)
+                if result is not None:
+                    respond(request, {"result": result, "time": 0.0,
+                                      "cached": True})
+                    continue
+
+                def finish(response, request=request, key=key):
+                    if "result" in response:
+                        with self.server.lock:
+                            set_cached(self.server.results, key,
+                                       response["result"])
+                    respond(request, response)
+
+                pending.append(self.server.pool.apply_async(
+                    run_job, (path, request.get("formula"),
+                              request.get("engine", "explicit"), domains),
+                    callback=finish))
+            elif command == "load":
+                domains = request.get("domains")
+                with self.server.lock:
+                    self.server.structures[request.get("structure")] = \
+                        os.path.abspath(request.get("path"))
+                    self.server.domains[request.get("structure")] = \
+                        None if domains is None else data_to_domains(domains)
+                respond(request, {"result": True})
+            elif command == "status":
+                with self.server.lock:
+                    response = {"structures": dict(self.server.structures),
+                                "jobs": self.server.jobs}
+                respond(request, response)
+            elif command == "shutdown":
+                respond(request, {"result": True})
+                threading.Thread(target=self.server.shutdown).start()
+                break
+            else:
+                respond(request, {"error": "unknown command {}".format(
+                    command)})
+
+        for job in pending:
+            job.wait()
+
+
+def send_requests(socket_path, requests):
+    """
+    Sends requests to a checker daemon and returns its responses.
+
+    :param socket_path: Path of the Unix socket of the daemon.
+    :type socket_path: String
+
+    :param requests: Requests (see :py:mod:`.daemon`).
+    :type requests: List of Dictionaries
+
+    :returns: The responses, in the order in which they are received.
+    :rtype: List of Dictionaries
+
+    :Example:
+
+    >>> from tccMChecker.daemon import *
+    >>> send_requests("/tmp/tccmchecker.sock", [
+    ...     {"command": "load", "structure": "s", "path": "structure.json"},
+    ...     {"id": 1, "command": "check", "structure": "s",
+    ...      "formula": "<>(tt ^ ~o da=0)"}])
+    [{u'result': True, u'id': None}, {u'cached': False, u'time': 0.41, u'id': 1, u'result': False}]
+
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(socket_path)
+    try:
+        for request in requests:
+            client.sendall((json.dumps(request) + "\n").encode())
+        client.shutdown(socket.SHUT_WR)
+        stream = client.makefile("rb")
+        return [json.loads(line.decode()) for line in stream]
+    finally:
+        client.close()
+
+
+def main(arguments=None):
+    """
+    Runs the checker daemon until it receives a ``shutdown`` command.
+
+    :param arguments: Command line arguments (by default, ``sys.argv``).
+    :type arguments: List of Strings
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--socket", default="/tmp/tccmchecker.sock",
+                        help="path of the Unix socket")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="number of worker processes")
+    options = parser.parse_args(arguments)
+
+    server = CheckerServer(options.socket, options.processes)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
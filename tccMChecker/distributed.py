@@ -0,0 +1,551 @@
+"""This module contains a distributed model checking engine. The nodes of the
+model checking graph are partitioned by tcc node among worker processes. Each
+worker generates the atoms of its tcc nodes and the edges that reach them, and
+the emptiness check is a fixpoint computation [EL86]_ where the workers only
+exchange sets of nodes, routed through pipes by the main process."""
+
+from __future__ import print_function
+
+import multiprocessing
+import os
+import sys
+
+from tccMChecker.check_statistics import get_time, record_phase, \
+    record_closure
+from tccMChecker.closure import get_closure
+from tccMChecker.formula import Formula
+from tccMChecker.model_checking_graph import get_all_atoms, \
+    get_model_checking_atoms, search_formulas, is_in_atom, is_next_state
+
+
+def get_partition(tcc_node, partitions):
+    """
+    Returns the partition of a tcc node.
+
+    :param tcc_node: tcc node.
+
+    :param partitions: Number of partitions.
+    :type partitions: Integer
+
+    :returns: Number of the partition, between ``0`` and ``partitions - 1``.
+    :rtype: Integer
+
+    """
+    return hash(tcc_node) % partitions
+
+
+def is_accepting(atom, eventuality):
+    """
+    Checks if an atom fulfils an eventuality: either it does not contain the
+    eventuality, or it contains its subformula.
+
+    :param atom: Atom.
+    :type atom: List of :py:class:`~formula.Formula`
+
+    :param eventuality: Formula with ``<>`` as main connective, or ``None``
+        (every atom is accepting).
+    :type eventuality: :py:class:`~formula.Formula`
+
+    :rtype: Boolean
+
+    """
+    if eventuality is None:
+        return True
+    return not is_in_atom(eventuality.get_formula(), atom) or \
+        is_in_atom(Formula(eventuality.get_values()).get_formula(), atom)
+
+
+class PartitionWorker(object):
+    """
+    This class represents the partition of a model checking graph kept by a
+    worker process. A model checking node is identified by the tuple
+    ``(partition, number)``.
+
+    :param partition: Number of the partition.
+    :type partition: Integer
+
+    :param partitions: Number of partitions.
+    :type partitions: Integer
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc structure.
+    :type tcc_structure: Dictionary
+
+    """
+
+    def __init__(self, partition, partitions, formula, tcc_structure):
+        """
+        Constructor method.
+
+        """
+        self.__partition = partition
+        self.__partitions = partitions
+        self.__tcc_structure = tcc_structure
+
+        closure = []
+        get_closure(formula, closure)
+        self.__eventualities = search_formulas(closure, "<>") or [None]
+
+        own_structure = dict(
+            (tcc_node, data) for tcc_node, data in tcc_structure.items()
+            if get_partition(tcc_node, partitions) == partition)
+        self.__atoms = {}
+        self.__tcc_nodes = {}
+        self.__initial = set()
+        for tcc_node, atoms_node in get_model_checking_atoms(
+                own_structure, get_all_atoms(closure), closure).items():
+            self.__tcc_nodes[tcc_node] = []
+            for number, atom in atoms_node.items():
+                node = (partition, number)
+                self.__atoms[node] = atom
+                self.__tcc_nodes[tcc_node].append(node)
+                if own_structure[tcc_node].get("initial") and \
+                        is_in_atom(formula.get_formula(), atom):
+                    self.__initial.add(node)
+
+        self.__predecessors = dict((node, []) for node in self.__atoms)
+        self.__sets = {}
+
+    def get_number_nodes(self):
+        """
+        Returns the number of model checking nodes of the partition.
+
+        :rtype: Integer
+
+        """
+        return len(self.__atoms)
+
+    def get_edge_requests(self):
+        """
+        Returns the formulas with next operator of the nodes of the partition,
+        addressed to the partitions of the successors of their tcc nodes.
+
+        :returns: A list of tuples ``(node, tcc nodes, formulas)`` for each
+            partition.
+        :rtype: Dictionary
+
+        """
+        messages = {}
+        for tcc_node, nodes in self.__tcc_nodes.items():
+            edges = self.__tcc_structure[tcc_node].get("edges")
+            for node in nodes:
+                next_formulas = [next_formula.get_formula() for next_formula
+                                 in search_formulas(self.__atoms[node], "o")]
+                targets = {}
+                for next_tcc_node in edges:
+                    targets.setdefault(get_partition(
+                        next_tcc_node, self.__partitions), []).append(
+                            next_tcc_node)
+                for partition, next_tcc_nodes in targets.items():
+                    messages.setdefault(partition, []).append(
+                        (node, next_tcc_nodes, next_formulas))
+        return messages
+
+    def add_edges(self, requests):
+        """
+        Adds the edges that reach the nodes of the partition (see
+        :py:func:`model_checking_graph.get_atom_successors`).
+
+        :param requests: Requests of the other partitions (see
+            :py:meth:`.get_edge_requests`).
+        :type requests: List of Tuples
+
+        :returns: The number of edges added.
+        :rtype: Integer
+
+        """
+        number_edges = 0
+        for source, next_tcc_nodes, next_formulas in requests:
+            next_formulas = [Formula(data) for data in next_formulas]
+            for next_tcc_node in next_tcc_nodes:
+                for node in self.__tcc_nodes.get(next_tcc_node, []):
+                    if is_next_state(next_formulas, self.__atoms[node]):
+                        self.__predecessors[node].append(source)
+                        number_edges += 1
+        return number_edges
+
+    def reset(self, name):
+        """
+        Sets a set of nodes to all the nodes of the partition.
+
+        :param name: Name of the set.
+        :type name: String
+
+        """
+        self.__sets[name] = set(self.__atoms.keys())
+
+    def select_accepting(self, name, within, eventuality):
+        """
+        Sets a set of nodes to the nodes of another set that fulfil an
+        eventuality (see :py:func:`.is_accepting`).
+
+        :returns: The number of nodes of the set.
+        :rtype: Integer
+
+        """
+        eventuality = self.__eventualities[eventuality]
+        self.__sets[name] = set(
+            node for node in self.__sets[within]
+            if is_accepting(self.__atoms[node], eventuality))
+        return len(self.__sets[name])
+
+    def get_predecessors(self, name):
+        """
+        Returns the predecessors of the nodes of a set, addressed to their
+        partitions.
+
+        :rtype: Dictionary
+
+        """
+        messages = {}
+        for node in self.__sets[name]:
+            for source in self.__predecessors[node]:
+                messages.setdefault(source[0], set()).add(source)
+        return messages
+
+    def add_nodes(self, nodes, name, within, frontier=None):
+        """
+        Adds to a set the nodes that are in another set.
+
+        :param nodes: Nodes received from the other partitions.
+        :type nodes: List
+
+        :param name: Name of the set.
+        :type name: String
+
+        :param within: Name of the set that bounds the nodes added.
+        :type within: String
+
+        :param frontier: If it is given, name of the set where the new nodes
+            are stored.
+        :type frontier: String
+
+        :returns: The number of new nodes.
+        :rtype: Integer
+
+        """
+        new_nodes = (set(nodes) & self.__sets[within]) - \
+            self.__sets.setdefault(name, set())
+        self.__sets[name] |= new_nodes
+        if frontier is not None:
+            self.__sets[frontier] = new_nodes
+        return len(new_nodes)
+
+    def copy(self, name, source):
+        """
+        Sets a set of nodes to the nodes of another set.
+
+        """
+        self.__sets[name] = set(self.__sets[source])
+
+    def clear(self, name):
+        """
+        Empties a set of nodes.
+
+        """
+        self.__sets[name] = set()
+
+    def intersect(self, name, other):
+        """
+        Removes from a set the nodes that are not in another set.
+
+        :returns: The number of nodes removed.
+        :rtype: Integer
+
+        """
+        removed = len(self.__sets[name] - self.__sets[other])
+        self.__sets[name] &= self.__sets[other]
+        return removed
+
+    def has_initial(self, name):
+        """
+        Checks if a set contains an initial node whose atom contains the
+        formula.
+
+        :rtype: Boolean
+
+        """
+        return bool(self.__initial & self.__sets[name])
+
+    def get_number_eventualities(self):
+        """
+        Returns the number of acceptance conditions of the partition.
+
+        :rtype: Integer
+
+        """
+        return len(self.__eventualities)
+
+
+def run_worker(connection, partition, partitions, formula, tcc_structure):
+    """
+    Runs the worker process of a partition: it builds a
+    :py:class:`.PartitionWorker` and calls its methods when the main process
+    asks for it. The output printed by the engine is discarded.
+
+    :param connection: Connection to the main process. Each message is a
+        tuple with the name of a method and its arguments, and the reply is
+        ``("ok", result)`` or ``("error", message)``.
+    :type connection: :py:class:`multiprocessing.Connection`
+
+    """
+    sys.stdout = open(os.devnull, "w")
+    try:
+        worker = PartitionWorker(partition, partitions, formula,
+                                 tcc_structure)
+        connection.send(("ok", worker.get_number_nodes()))
+    except Exception as error:
+        connection.send(("error", "{}: {}".format(type(error).__name__,
+                                                  error)))
+        return
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        try:
+            result = getattr(worker, message[0])(*message[1:])
+            connection.send(("ok", result))
+        except Exception as error:
+            connection.send(("error", "{}: {}".format(type(error).__name__,
+                                                      error)))
+    connection.close()
+
+
+class PartitionedGraph(object):
+    """
+    This class represents a model checking graph distributed among worker
+    processes (see :py:class:`.PartitionWorker`). Its methods send a request
+    to all the workers and route the messages between them.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc structure.
+    :type tcc_structure: Dictionary
+
+    :param partitions: Number of partitions.
+    :type partitions: Integer
+
+    """
+
+    def __init__(self, formula, tcc_structure, partitions):
+        """
+        Constructor method.
+
+        """
+        self.messages = 0
+        self.__connections = []
+        self.__processes = []
+        for partition in range(partitions):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=run_worker,
+                args=(worker_connection, partition, partitions, formula,
+                      tcc_structure))
+            process.daemon = True
+            process.start()
+            self.__connections.append(connection)
+            self.__processes.append(process)
+        self.nodes = self.__receive()
+
+    def __receive(self):
+        results = []
+        for connection in self.__connections:
+            status, result = connection.recv()
+            if status == "error":
+                raise RuntimeError(result)
+            results.append(result)
+        return results
+
+    def call(self, method, *arguments):
+        """
+        Calls a method of all the workers.
+
+        :param method: Name of the method.
+        :type method: String
+
+        :returns: The results of the workers, by partition.
+        :rtype: List
+
+        """
+        for connection in self.__connections:
+            connection.send((method,) + arguments)
+        return self.__receive()
+
+    def route(self, method, *arguments):
+        """
+        Calls a method of all the workers whose results are messages addressed
+        to the partitions, and returns the messages received by each
+        partition.
+
+        :returns: The messages of each partition.
+        :rtype: List of Lists
+
+        """
+        received = [[] for _ in self.__connections]
+        for messages in self.call(method, *arguments):
+            for partition, partition_messages in messages.items():
+                received[partition].extend(partition_messages)
+                self.messages += len(partition_messages)
+        return received
+
+    def deliver(self, method, received, *arguments):
+        """
+        Calls a method of each worker with the messages it received.
+
+        :returns: The results of the workers, by partition.
+        :rtype: List
+
+        """
+        for connection, messages in zip(self.__connections, received):
+            connection.send((method, messages) + arguments)
+        return self.__receive()
+
+    def close(self):
+        """
+        Stops the workers.
+
+        """
+        for connection in self.__connections:
+            try:
+                connection.send(None)
+            except (IOError, OSError):
+                pass
+        for process in self.__processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+
+
+def get_backward_reachable(graph, name, within, frontier):
+    """
+    Adds to a set the nodes of another set that reach it (backward
+    reachability), with one exchange of messages per step.
+
+    :param graph: Distributed graph.
+    :type graph: :py:class:`.PartitionedGraph`
+
+    :param name: Name of the set. It must already contain the frontier.
+    :type name: String
+
+    :param within: Name of the set that bounds the search.
+    :type within: String
+
+    :param frontier: Name of the set of the new nodes of the last step.
+    :type frontier: String
+
+    """
+    while True:
+        received = graph.route("get_predecessors", frontier)
+        if not sum(graph.deliver("add_nodes", received, name, within,
+                                 frontier)):
+            return
+
+
+def get_fair_nodes(graph):
+    """
+    Computes the nodes that start a path that fulfils every eventuality
+    infinitely often, as the greatest fixpoint of Emerson and Lei: a node is
+    kept if, for each eventuality, it has a successor that reaches a kept
+    node that fulfils the eventuality through kept nodes. The result is the
+    set ``fair`` of the workers.
+
+    :param graph: Distributed graph.
+    :type graph: :py:class:`.PartitionedGraph`
+
+    :returns: The number of iterations.
+    :rtype: Integer
+
+    """
+    eventualities = graph.call("get_number_eventualities")[0]
+    graph.call("reset", "fair")
+    iterations = 0
+    while True:
+        iterations += 1
+        graph.call("copy", "next_fair", "fair")
+        for eventuality in range(eventualities):
+            # E[fair U (fair ^ accepting)]
+            graph.call("select_accepting", "until", "fair", eventuality)
+            graph.call("copy", "frontier", "until")
+            get_backward_reachable(graph, "until", "fair", "frontier")
+
+            # EX E[fair U (fair ^ accepting)]
+            graph.call("clear", "next")
+            graph.deliver("add_nodes", graph.route("get_predecessors",
+                                                   "until"), "next", "fair")
+            graph.call("intersect", "next_fair", "next")
+        if not sum(graph.call("intersect", "fair", "next_fair")):
+            return iterations
+
+
+def model_satisfies_property_distributed(formula, tcc_structure,
+                                         statistics=None, partitions=None):
+    """
+    Checks if a model satisfies a temporal formula with a model checking
+    graph distributed among worker processes.
+
+    The nodes of the model checking graph are the atoms of
+    :py:func:`model_checking_graph.get_model_checking_atoms`, and the edges
+    are the ones of :py:func:`model_checking_graph.get_atom_successors`. The
+    result is ``True`` if an initial node whose atom contains the formula
+    starts a path that fulfils every eventuality (see
+    :py:func:`.get_fair_nodes`).
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param statistics: Empty dictionary to store the statistics of the
+        algorithm: the time of each phase (``phases``), the number of nodes of
+        each partition (``partition_nodes``), the number of edges
+        (``edges``), the number of nodes exchanged between the workers
+        (``messages``) and the number of iterations of the fixpoint
+        (``iterations``).
+    :type statistics: Dictionary
+
+    :param partitions: Number of worker processes (by default, the number of
+        CPUs).
+    :type partitions: Integer
+
+    :returns: ``True`` if the model satisfies the formula or ``False``
+        otherwise.
+    :rtype: Boolean
+
+    .. note::
+        As in :py:func:`tableau.model_satisfies_property_tableau`, the
+        fulfilling path can reach its cycle through any number of edges.
+
+    """
+    start = get_time()
+    if partitions is None:
+        partitions = multiprocessing.cpu_count()
+
+    closure = []
+    get_closure(formula, closure)
+    record_closure(statistics, closure)
+
+    graph = PartitionedGraph(formula, tcc_structure, partitions)
+    try:
+        phase_start = record_phase(statistics, "partition_atoms", start)
+        edges = sum(graph.deliver("add_edges",
+                                  graph.route("get_edge_requests")))
+        phase_start = record_phase(statistics, "partition_edges", phase_start)
+
+        iterations = get_fair_nodes(graph)
+        result = any(graph.call("has_initial", "fair"))
+        record_phase(statistics, "emptiness", phase_start)
+    finally:
+        graph.close()
+
+    if statistics is not None:
+        statistics["partition_nodes"] = graph.nodes
+        statistics["edges"] = edges
+        statistics["messages"] = graph.messages
+        statistics["iterations"] = iterations
+        statistics["time"] = get_time() - start
+    return result
@@ -0,0 +1,253 @@
+"""This module contains the functions to declare the finite domains of the
+variables of a model, and to compile them into the propositions, consistency
+rules and exclusion masks used by the model checker."""
+
+from __future__ import print_function
+
+import re
+
+# Domains of the variables of the model in examples/examples.py. A variable
+# without values is a boolean proposition.
+DEFAULT_DOMAINS = [("da", [0, 5, 10, 15, 20]),
+                   ("b", [0, 1, 2, 3]),
+                   ("sm", [0, 5, 10]),
+                   ("tc", None),
+                   ("tt", None),
+                   ("dc", None),
+                   ("dd", None)]
+
+_declaration_pattern = re.compile(
+    r"^\s*(?P<variable>[^\s{}=]+)\s*(?:(?:in|:)\s*\{(?P<values>[^}]*)\})?\s*$")
+
+
+def parse_domain(declaration):
+    r"""
+    Parses the declaration of the domain of a variable.
+
+    :param declaration: Declaration of the form ``variable in {v1, ..., vn}``
+        (``in`` can also be written as :math:`\in` or ``:``), or the name of a
+        boolean proposition.
+    :type declaration: String
+
+    :returns: A tuple with the name of the variable and the list of its values
+        (``None`` for a boolean proposition).
+    :rtype: Tuple
+
+    :Example:
+
+    >>> from tccMChecker.domains import *
+    >>> parse_domain("da in {0, 5, 10, 15, 20}")
+    ('da', ['0', '5', '10', '15', '20'])
+    >>> parse_domain("tc")
+    ('tc', None)
+
+    """
+    for symbol, replacement in ((u"\u2208", u" in "),
+                                (u"\u2208".encode("utf-8"), b" in ")):
+        if isinstance(declaration, type(symbol)):
+            declaration = declaration.replace(symbol, replacement)
+
+    match = _declaration_pattern.match(declaration)
+    if match is None:
+        raise ValueError("invalid domain declaration: {}".format(declaration))
+
+    values = match.group("values")
+    if values is None:
+        return match.group("variable"), None
+    return match.group("variable"), [value.strip() for value in
+                                     values.split(",") if value.strip()]
+
+
+def parse_domains(text):
+    """
+    Parses the declarations of the domains of the variables of a model, one
+    per line. Empty lines and lines starting with ``#`` are ignored.
+
+    :param text: Declarations (see :py:func:`.parse_domain`).
+    :type text: String
+
+    :returns: List of tuples with the name of each variable and its values.
+    :rtype: List of Tuples
+
+    """
+    domains = []
+    for line in text.splitlines():
+        if line.strip() and not line.strip().startswith("#"):
+            domains.append(parse_domain(line))
+    return domains
+
+
+def get_domain_propositions(variable, values):
+    """
+    Returns the propositions of the domain of a variable.
+
+    :param variable: Name of the variable.
+    :type variable: String
+
+    :param values: Values of the variable or ``None`` for a boolean
+        proposition.
+    :type values: List
+
+    :returns: List of propositions.
+    :rtype: List of Strings
+
+    :Example:
+
+    >>> from tccMChecker.domains import *
+    >>> get_domain_propositions("b", [0, 1])
+    ['b=0', 'b=1']
+
+    """
+    if values is None:
+        return [variable]
+    return ["{}={}".format(variable, value) for value in values]
+
+
+def compile_domains(domains):
+    """
+    Compiles the domains of the variables of a model.
+
+    Each proposition ``p`` gets two bits of an atom mask: bit ``2i`` is set
+    when ``p`` is in the atom and bit ``2i+1`` when ``~p`` is in the atom.
+    The exclusion mask of ``p`` has the bit of ``~p`` and the bits of the
+    other values of the same variable, so ``p`` is consistent with an atom iff
+    the atom mask AND the exclusion mask is ``0``.
+
+    :param domains: Domains of the variables, as a dictionary or a list of
+        tuples ``(variable, values)``, or declarations in text (see
+        :py:func:`.parse_domains`).
+    :type domains: Dictionary, List or String
+
+    :returns: A dictionary with the legal propositions (``propositions``), the
+        consistency rules of each proposition (``rules``), the bit of each
+        proposition (``bits``) and the exclusion mask of each proposition
+        (``masks``).
+    :rtype: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.domains import *
+    >>> compiled = compile_domains([("b", [0, 1]), ("tc", None)])
+    >>> compiled["propositions"]
+    ['b=0', 'b=1', 'tc']
+    >>> compiled["rules"]["b=0"]
+    [{'~': 'b=0'}, {'': 'b=1'}]
+    >>> compiled["masks"]["b=0"]
+    6
+
+    """
+    if isinstance(domains, type("")) or isinstance(domains, type(u"")):
+        domains = parse_domains(domains)
+    elif isinstance(domains, dict):
+        domains = sorted(domains.items())
+
+    propositions = []
+    groups = []
+    for variable, values in domains:
+        group = get_domain_propositions(variable, values)
+        for proposition in group:
+            if proposition in propositions:
+                raise ValueError(
+                    "proposition {} declared twice".format(proposition))
+        propositions.extend(group)
+        groups.append(group)
+
+    bits = {}
+    for index, proposition in enumerate(propositions):
+        bits[proposition] = index
+
+    rules = {}
+    masks = {}
+    for group in groups:
+        for proposition in group:
+            rules[proposition] = []
+            masks[proposition] = 0
+            for other in group:
+                if other == proposition:
+                    rules[proposition].append({"~": other})
+                    masks[proposition] |= 1 << (2 * bits[other] + 1)
+                else:
+                    rules[proposition].append({"": other})
+                    masks[proposition] |= 1 << (2 * bits[other])
+
+    return {"propositions": propositions, "rules": rules, "bits": bits,
+            "masks": masks}
+
+
+def get_atom_mask(atom, bits):
+    """
+    Returns the mask of the propositions of an atom.
+
+    :param atom: Atom.
+    :type atom: List of :py:class:`~formula.Formula`
+
+    :param bits: Bit of each proposition (see :py:func:`.compile_domains`).
+    :type bits: Dictionary
+
+    :returns: Mask with the bit ``2i`` set for each proposition in the atom and
+        the bit ``2i+1`` set for each negated proposition in the atom.
+    :rtype: Integer
+
+    """
+    mask = 0
+    for formula in atom:
+        data = formula.get_formula()
+        if len(data) != 1:
+            continue
+        connective, value = list(data.items())[0]
+        if isinstance(value, dict) or value not in bits:
+            continue
+        connective = connective.strip()
+        if connective == "":
+            mask |= 1 << (2 * bits[value])
+        elif connective == "~":
+            mask |= 1 << (2 * bits[value] + 1)
+    return mask
+
+
+def get_data_propositions(data, propositions):
+    """
+    Adds the propositions of the structure of a formula to a set.
+
+    :param data: Structure representing a formula.
+    :type data: Dictionary or String
+
+    :param propositions: Set where the propositions are added.
+    :type propositions: Set
+
+    :Example:
+
+    >>> from tccMChecker.domains import *
+    >>> propositions = set()
+    >>> get_data_propositions({"<>": {"^": {"": "tt", "~": {"o": "b=1"}}}},
+    ...                       propositions)
+    >>> sorted(propositions)
+    ['b=1', 'tt']
+
+    """
+    if isinstance(data, dict):
+        for value in data.values():
+            get_data_propositions(value, propositions)
+    else:
+        propositions.add(data)
+
+
+def get_undeclared_propositions(datas, compiled):
+    """
+    Returns the propositions of some formulas that are not declared in the
+    domains of a model.
+
+    :param datas: Structures representing the formulas.
+    :type datas: List
+
+    :param compiled: Compiled domains (see :py:func:`.compile_domains`).
+    :type compiled: Dictionary
+
+    :returns: The undeclared propositions, sorted.
+    :rtype: List of Strings
+
+    """
+    propositions = set()
+    for data in datas:
+        get_data_propositions(data, propositions)
+    return sorted(propositions.difference(compiled["propositions"]))
@@ -0,0 +1,482 @@
+"""This module contains an estimator of the size of the model checking graph
+of a formula and a tcc structure, computed from the closure of the formula
+and the stores and edges of the structure before any atom is built, and a
+function that uses it to choose the engine of a check."""
+
+from __future__ import print_function
+
+from collections import deque
+import math
+
+from tccMChecker.closure import get_closure
+from tccMChecker.formula import Formula
+from tccMChecker.fragments import classify_formula, \
+    model_satisfies_property_fragment, model_satisfies_property_fragment_fv06
+from tccMChecker.model_checking_algorithm import model_satisfies_property
+from tccMChecker.model_checking_graph import get_basic_formulas, \
+    get_closure_propositions, get_relevant_store
+from tccMChecker.symbolic_engine import model_satisfies_property_symbolic
+from tccMChecker.tableau import model_satisfies_property_tableau
+
+# Engines that can be chosen, in order of preference, with the limit of the
+# budget of each estimate (see estimate_state_space) of their cost
+ENGINE_COSTS = [("explicit", {"nodes": "nodes", "edges": "edges",
+                              "memory": "memory"}),
+                ("tableau", {"reachable_nodes": "nodes",
+                             "reachable_edges": "edges",
+                             "reachable_memory": "memory"}),
+                ("symbolic", {"bdd_variables": "bdd_variables"})]
+
+# Engines chosen by default. The tableau engine follows another semantics (see
+# ENGINE_SEMANTICS), so it can only be chosen when it is the only engine
+# allowed
+DEFAULT_ENGINES = ["explicit", "symbolic"]
+
+# Semantics of each engine: the one of [FV06] (see
+# model_checking_algorithm.model_satisfies_property), where the cycle must be
+# reached from an initial node in at most one edge and the initial nodes do
+# not fulfill the eventualities, or the usual semantics of LTL. The engines
+# with different semantics can give different results for the same formula
+ENGINE_SEMANTICS = {"explicit": "fv06", "symbolic": "fv06",
+                    "fragment": "fv06", "tableau": "ltl"}
+
+# Engines that can store a witness. The steps of the witnesses are tuples
+# (tcc node, model checking node, atom), where the last two are None for the
+# engines that do not build the model checking graph
+WITNESS_ENGINES = ["explicit", "tableau", "fragment"]
+
+# Default limits of the estimates
+DEFAULT_BUDGET = {"nodes": 10 ** 6, "edges": 10 ** 7,
+                  "memory": 2 * 1024 ** 3, "bdd_variables": 256}
+
+# Approximate bytes of each formula of an atom and of each edge of the
+# model checking graph
+FORMULA_BYTES = 128
+EDGE_BYTES = 40
+
+
+class StateSpaceTooLarge(Exception):
+    """
+    This exception is raised when no engine fits the budget of a check.
+
+    :param estimate: Estimate of the check (see
+        :py:func:`.estimate_state_space`).
+    :type estimate: Dictionary
+
+    :param budget: Limits of the estimates.
+    :type budget: Dictionary
+
+    :param engines: Engines that were considered.
+    :type engines: List of Strings
+
+    """
+
+    def __init__(self, estimate, budget, engines):
+        """
+        Constructor method.
+
+        """
+        Exception.__init__(self, format_estimate(estimate, budget, engines))
+        self.estimate = estimate
+        self.budget = budget
+        self.engines = engines
+
+
+def get_fixed_propositions(store, propositions):
+    """
+    Returns the propositions whose value is fixed by the literals of a store,
+    either because the store has a literal of the proposition, or because it
+    has a positive literal of another value of the same variable (see
+    :py:func:`domains.compile_domains`).
+
+    :param store: Propositions (as formulas) in the store of a tcc node.
+    :type store: List of :py:class:`~formula.Formula`
+
+    :param propositions: Propositions to check.
+    :type propositions: Set of Strings
+
+    :returns: The fixed propositions.
+    :rtype: Set of Strings
+
+    :Example:
+
+    >>> from tccMChecker.engine_selection import *
+    >>> Formula.set_proposition_domains([("da", [0, 5, 10])])
+    >>> sorted(get_fixed_propositions([Formula({"": "da=5"})],
+    ...                               set(["da=0", "tc"])))
+    ['da=0']
+
+    """
+    rules = Formula.get_proposition_domains()["rules"]
+    fixed = set()
+    for formula in store:
+        connective, value = list(formula.get_formula().items())[0]
+        if connective not in ("", "~") or isinstance(value, dict):
+            continue
+        if value in propositions:
+            fixed.add(value)
+        if connective == "":
+            fixed.update(proposition for proposition in propositions
+                         if {"": value} in rules.get(proposition, []))
+    return fixed
+
+
+def get_reachable_tcc_nodes(tcc_structure):
+    """
+    Returns the tcc nodes that are reachable from the initial nodes.
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :returns: The reachable tcc nodes.
+    :rtype: Set
+
+    """
+    reachable = set(tcc_node for tcc_node, data in tcc_structure.items()
+                    if data.get("initial"))
+    queue = deque(reachable)
+    while queue:
+        for next_tcc_node in tcc_structure[queue.popleft()].get("edges"):
+            if next_tcc_node not in reachable:
+                reachable.add(next_tcc_node)
+                queue.append(next_tcc_node)
+    return reachable
+
+
+def estimate_state_space(formula, tcc_structure):
+    """
+    Estimates the size of the model checking graph of a formula and a tcc
+    structure. Only the closure of the formula is computed.
+
+    Each tcc node has at most :math:`2^{b-f}` atoms, where :math:`b` is the
+    number of basic formulas of the closure and :math:`f` the number of its
+    propositions that are fixed by the store of the node (see
+    :py:func:`.get_fixed_propositions`), and each atom has at most one edge
+    to each atom of the successors of its tcc node. The estimates are upper
+    bounds of the numbers of
+    :py:func:`model_checking_algorithm.model_satisfies_property`.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :returns: Dictionary with the size of the closure (``closure_size``), its
+        number of basic formulas (``basic_formulas``) and of atoms
+        (``atoms``), the number of tcc nodes (``tcc_nodes``), the nodes,
+        edges and bytes of the model checking graph (``nodes``, ``edges`` and
+        ``memory``), the same numbers for the tcc nodes that are reachable
+        from the initial nodes (``reachable_tcc_nodes``, ``reachable_nodes``,
+        ``reachable_edges`` and ``reachable_memory``), and the number of BDD
+        variables of the symbolic engine (``bdd_variables``).
+    :rtype: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.engine_selection import *
+    >>> formula = Formula({"<>": {"^": {"": "tt", "~": {"o": "da=0"}}}})
+    >>> estimate = estimate_state_space(formula, tcc_structure)
+    >>> estimate["atoms"], estimate["nodes"], estimate["edges"]
+    (16, 100, 1760)
+
+    """
+    closure = []
+    get_closure(formula, closure)
+    basic_formulas = get_basic_formulas(closure)
+    propositions = get_closure_propositions(closure)
+
+    node_atoms = {}
+    for tcc_node, data in tcc_structure.items():
+        store = data.get("store")
+        relevant_store = get_relevant_store(store, propositions)
+        if relevant_store is not None:
+            store = relevant_store
+        node_atoms[tcc_node] = 2 ** (len(basic_formulas) - len(
+            get_fixed_propositions(store, propositions)))
+
+    def get_sizes(tcc_nodes):
+        nodes = sum(node_atoms[tcc_node] for tcc_node in tcc_nodes)
+        edges = sum(node_atoms[tcc_node] * sum(
+            node_atoms[next_tcc_node]
+            for next_tcc_node in tcc_structure[tcc_node].get("edges"))
+                    for tcc_node in tcc_nodes)
+        memory = nodes * len(closure) * FORMULA_BYTES + edges * EDGE_BYTES
+        return nodes, edges, memory
+
+    estimate = {"closure_size": len(closure),
+                "basic_formulas": len(basic_formulas),
+                "atoms": 2 ** len(basic_formulas),
+                "tcc_nodes": len(tcc_structure)}
+    estimate["nodes"], estimate["edges"], estimate["memory"] = get_sizes(
+        tcc_structure.keys())
+    estimate["memory"] += estimate["atoms"] * len(closure) * FORMULA_BYTES
+
+    reachable = get_reachable_tcc_nodes(tcc_structure)
+    estimate["reachable_tcc_nodes"] = len(reachable)
+    estimate["reachable_nodes"], estimate["reachable_edges"], \
+        estimate["reachable_memory"] = get_sizes(reachable)
+
+    # Current and next copies of the basic formulas and of the tcc node
+    estimate["bdd_variables"] = 2 * (len(basic_formulas) + int(math.ceil(
+        math.log(max(len(tcc_structure), 2), 2))))
+    return estimate
+
+
+def get_exceeded_limits(estimate, budget, engine):
+    """
+    Returns the estimates of the cost of an engine that exceed their limits.
+
+    :param estimate: Estimate of a check (see
+        :py:func:`.estimate_state_space`).
+    :type estimate: Dictionary
+
+    :param budget: Limits of the estimates (see :py:data:`.DEFAULT_BUDGET`).
+    :type budget: Dictionary
+
+    :param engine: Name of the engine (see :py:data:`.ENGINE_COSTS`).
+    :type engine: String
+
+    :returns: List of tuples ``(estimate, value, limit)``.
+    :rtype: List of Tuples
+
+    """
+    costs = dict(ENGINE_COSTS)[engine]
+    return [(cost, estimate[cost], budget[limit])
+            for cost, limit in sorted(costs.items())
+            if estimate[cost] > budget[limit]]
+
+
+def format_estimate(estimate, budget, engines):
+    """
+    Returns a report of the estimates that exceed the budget of some engines,
+    followed by all the estimates.
+
+    :param estimate: Estimate of a check (see
+        :py:func:`.estimate_state_space`).
+    :type estimate: Dictionary
+
+    :param budget: Limits of the estimates (see :py:data:`.DEFAULT_BUDGET`).
+    :type budget: Dictionary
+
+    :param engines: Names of the engines.
+    :type engines: List of Strings
+
+    :returns: The report.
+    :rtype: String
+
+    :Example:
+
+    >>> from tccMChecker.engine_selection import *
+    >>> formula = Formula({"<>": {"^": {"": "tt", "~": {"o": "da=0"}}}})
+    >>> estimate = estimate_state_space(formula, tcc_structure)
+    >>> budget = dict(DEFAULT_BUDGET, nodes=50, bdd_variables=10)
+    >>> print(format_estimate(estimate, budget, ["explicit", "symbolic"]))
+    no engine fits the budget
+      explicit: nodes 100 > 50
+      symbolic: bdd_variables 18 > 10
+    estimates
+      atoms 16
+      basic_formulas 4
+    ...
+
+    """
+    lines = ["no engine fits the budget"]
+    for engine in engines:
+        for cost, value, limit in get_exceeded_limits(estimate, budget,
+                                                      engine):
+            lines.append("  {}: {} {} > {}".format(engine, cost, value, limit))
+    lines.append("estimates")
+    for name in sorted(estimate.keys()):
+        lines.append("  {} {}".format(name, estimate[name]))
+    return "\n".join(lines)
+
+
+def select_engine(estimate, budget=None, engines=None):
+    """
+    Returns the first engine whose estimates fit a budget (see
+    :py:data:`.ENGINE_COSTS`).
+
+    :param estimate: Estimate of a check (see
+        :py:func:`.estimate_state_space`).
+    :type estimate: Dictionary
+
+    :param budget: Limits of the estimates. The missing limits are the ones
+        of :py:data:`.DEFAULT_BUDGET`.
+    :type budget: Dictionary
+
+    :param engines: Engines that can be chosen (by default,
+        :py:data:`.DEFAULT_ENGINES`).
+    :type engines: List of Strings
+
+    :returns: Name of the engine.
+    :rtype: String
+
+    :raises StateSpaceTooLarge: If no engine fits the budget.
+
+    """
+    limits = dict(DEFAULT_BUDGET)
+    limits.update(budget or {})
+    if engines is None:
+        engines = DEFAULT_ENGINES
+
+    engines = [engine for engine, _ in ENGINE_COSTS if engine in engines]
+    for engine in engines:
+        if not get_exceeded_limits(estimate, limits, engine):
+            return engine
+    raise StateSpaceTooLarge(estimate, limits, engines)
+
+
+def get_semantics(engines):
+    """
+    Returns the semantics of some engines (see
+    :py:data:`.ENGINE_SEMANTICS`).
+
+    :param engines: Names of the engines.
+    :type engines: List of Strings
+
+    :returns: ``fv06`` or ``ltl``.
+    :rtype: String
+
+    :raises ValueError: If an engine is unknown or the engines follow
+        different semantics.
+
+    :Example:
+
+    >>> from tccMChecker.engine_selection import *
+    >>> get_semantics(["explicit", "symbolic"])
+    'fv06'
+    >>> get_semantics(["explicit", "tableau"])
+    Traceback (most recent call last):
+    ...
+    ValueError: the engines explicit, tableau follow different semantics
+
+    """
+    for engine in engines:
+        if engine not in ENGINE_SEMANTICS:
+            raise ValueError("unknown engine {}".format(engine))
+    semantics = set(ENGINE_SEMANTICS[engine] for engine in engines)
+    if len(semantics) != 1:
+        raise ValueError("the engines {} follow different semantics".format(
+            ", ".join(engines)))
+    return semantics.pop()
+
+
+def check_property(formula, tcc_structure, witness=None, statistics=None,
+                   engine="auto", budget=None, engines=None):
+    """
+    Checks if a model satisfies a formula with an engine, which is chosen
+    from the estimate of the check when it is ``auto`` (see
+    :py:func:`.select_engine`). The engines that can be chosen must follow the
+    same semantics (see :py:data:`.ENGINE_SEMANTICS`), so the result does not
+    depend on the engine chosen.
+
+    When the property is in a fragment of :py:func:`fragments.classify_formula`,
+    the engine ``auto`` checks it with
+    :py:func:`fragments.model_satisfies_property_fragment_fv06` when the
+    engines follow the semantics of [FV06] (the default), or with
+    :py:func:`fragments.model_satisfies_property_fragment` when they follow
+    the usual semantics of LTL. The engine ``tableau`` also uses the latter.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param witness: Empty dictionary to store the witness of the engine (see
+        :py:func:`searching_algorithm.get_lasso_witness`). The engine ``auto``
+        only chooses engines that have a witness (see
+        :py:data:`.WITNESS_ENGINES`).
+    :type witness: Dictionary
+
+    :param statistics: Empty dictionary to store the statistics of the
+        engine, its name (``engine``), its semantics (``semantics``) and the
+        estimate (``estimate``).
+    :type statistics: Dictionary
+
+    :param engine: ``auto``, ``explicit``, ``tableau``, ``symbolic`` or
+        ``fragment``.
+    :type engine: String
+
+    :param budget: See :py:func:`.select_engine`.
+    :type budget: Dictionary
+
+    :param engines: See :py:func:`.select_engine`.
+    :type engines: List of Strings
+
+    :returns: The result of the engine.
+    :rtype: Boolean
+
+    :raises StateSpaceTooLarge: If no engine fits the budget.
+
+    :raises ValueError: If the engine is unknown, if the engines that can be
+        chosen follow different semantics, or if a witness is requested from
+        an engine that has none.
+
+    :Example:
+
+    >>> from tccMChecker.engine_selection import *
+    >>> formula = Formula({"<>": {"^": {"": "tt", "~": {"o": "da=0"}}}})
+    >>> statistics = {}
+    >>> check_property(formula, tcc_structure, statistics=statistics)
+    False
+    >>> statistics["engine"], statistics["semantics"]
+    ('explicit', 'fv06')
+    >>> statistics = {}
+    >>> check_property(Formula({"<>": {"": "da=10"}}), tcc_structure,
+    ...                statistics=statistics)
+    True
+    >>> statistics["engine"], statistics["fragment"]
+    ('fragment', 'safety')
+
+    .. note::
+        As in :py:func:`model_checking_algorithm.model_satisfies_property`, the
+        formula is the negation of the property.
+
+    """
+    fragment = classify_formula(formula)
+    if engine == "auto":
+        if engines is None:
+            engines = DEFAULT_ENGINES
+        semantics = get_semantics(engines)
+        if witness is not None:
+            engines = [name for name in engines if name in WITNESS_ENGINES]
+            if not engines:
+                raise ValueError("none of the engines has a witness")
+        if fragment is not None:
+            engine = "fragment"
+        else:
+            estimate = estimate_state_space(formula, tcc_structure)
+            engine = select_engine(estimate, budget, engines)
+            if statistics is not None:
+                statistics["estimate"] = estimate
+    elif engine == "tableau" and fragment is not None:
+        engine = "fragment"
+        semantics = "ltl"
+    else:
+        semantics = get_semantics([engine])
+
+    if witness is not None and engine not in WITNESS_ENGINES:
+        raise ValueError("the {} engine has no witness".format(engine))
+
+    if engine == "explicit":
+        result = model_satisfies_property(formula, tcc_structure, witness,
+                                          statistics)
+    elif engine == "tableau":
+        result = model_satisfies_property_tableau(formula, tcc_structure,
+                                                  witness, statistics)
+    elif engine == "symbolic":
+        result = model_satisfies_property_symbolic(formula, tcc_structure,
+                                                   statistics)
+    elif semantics == "fv06":
+        result = model_satisfies_property_fragment_fv06(
+            formula, tcc_structure, witness, statistics)
+    else:
+        result = model_satisfies_property_fragment(formula, tcc_structure,
+                                                   witness, statistics)
+
+    if statistics is not None:
+        statistics["engine"] = engine
+        statistics["semantics"] = semantics
+    return result
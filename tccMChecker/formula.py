@@ -2,6 +2,8 @@
 
 from __future__ import print_function
 
+from tccMChecker.domains import DEFAULT_DOMAINS, compile_domains
+
 
 class Formula(object):
     r"""This class represents a temporal formula.
@@ -26,37 +28,16 @@ class Formula(object):
         * Or : ``v``
         * And : ``^``
 
+    .. note::
+        The legal propositions and their consistency rules come from the
+        domains of the variables of the model. By default, they are the
+        domains in :py:data:`domains.DEFAULT_DOMAINS`; they can be replaced
+        with :py:meth:`.set_proposition_domains`.
+
     """
-    __propositions = ["da=0", "da=5", "da=10", "da=15", "da=20", "b=0", "b=1",
-                      "b=2", "b=3", "sm=0", "sm=5", "sm=10", "tc", "tt", "dc",
-                      "dd"]
-    __proposition_rules = {"da=0": [{"~": "da=0"}, {"": "da=5"}, {"": "da=10"},
-                                    {"": "da=15"}, {"": "da=20"}],
-                           "da=5": [{"": "da=0"}, {"~": "da=5"}, {"": "da=10"},
-                                    {"": "da=15"}, {"": "da=20"}],
-                           "da=10": [{"": "da=0"}, {"": "da=5"}, {"~": "da=10"},
-                                     {"": "da=15"}, {"": "da=20"}],
-                           "da=15": [{"": "da=0"}, {"": "da=5"}, {"": "da=10"},
-                                     {"~": "da=15"}, {"": "da=20"}],
-                           "da=20": [{"": "da=0"}, {"": "da=5"}, {"": "da=10"},
-                                     {"": "da=15"}, {"~": "da=20"}],
-                           "b=0": [{"~": "b=0"}, {"": "b=1"}, {"": "b=2"},
-                                   {"": "b=3"}],
-                           "b=1": [{"": "b=0"}, {"~": "b=1"}, {"": "b=2"},
-                                   {"": "b=3"}],
-                           "b=2": [{"": "b=0"}, {"": "b=1"}, {"~": "b=2"},
-                                   {"": "b=3"}],
-                           "b=3": [{"": "b=0"}, {"": "b=1"}, {"": "b=2"},
-                                   {"~": "b=3"}],
-                           "sm=0": [{"~": "sm=0"}, {"": "sm=5"}, {"": "sm=10"}],
-                           "sm=5": [{"": "sm=0"}, {"~": "sm=5"}, {"": "sm=10"}],
-                           "sm=10": [{"": "sm=0"}, {"": "sm=5"},
-                                     {"~": "sm=10"}],
-                           "tc": [{"~": "tc"}],
-                           "tt": [{"~": "tt"}],
-                           "dc": [{"~": "dc"}],
-                           "dd": [{"~": "dd"}],
-                           }
+    __domains = compile_domains(DEFAULT_DOMAINS)
+    __propositions = __domains["propositions"]
+    __proposition_rules = __domains["rules"]
     __operators = ["o", "<>", "[]", "v", "^", "~"]
     __formula = {}
 
@@ -73,6 +54,44 @@ class Formula(object):
         else:
             self.__formula = data
 
+    @classmethod
+    def set_proposition_domains(cls, domains):
+        """
+        Replaces the legal propositions and their consistency rules by the
+        ones of the domains of the variables of a model. The domains are
+        shared by all the formulas.
+
+        :param domains: Domains of the variables, as a dictionary or a list of
+            tuples ``(variable, values)``, or declarations in text (see
+            :py:func:`domains.compile_domains`).
+        :type domains: Dictionary, List or String
+
+        :Example:
+
+        >>> from tccMChecker.formula import *
+        >>> Formula.set_proposition_domains("in\\nx in {1, 2}")
+        >>> phi = Formula({"": "x=2"})
+        >>> phi.get_consistent_propositions()
+        [{'': 'x=1'}, {'~': 'x=2'}]
+
+        """
+        compiled = compile_domains(domains)
+        cls.__domains = compiled
+        cls.__propositions = compiled["propositions"]
+        cls.__proposition_rules = compiled["rules"]
+
+    @classmethod
+    def get_proposition_domains(cls):
+        """
+        Returns the compiled domains of the variables of the model.
+
+        :returns: The propositions, rules, bits and exclusion masks (see
+            :py:func:`domains.compile_domains`).
+        :rtype: Dictionary
+
+        """
+        return cls.__domains
+
     def get_consistent_propositions(self):
         r"""
         Returns the consistent propositions of a formula.
@@ -179,7 +198,9 @@ class Formula(object):
 
     def get_subformulas(self):
         r"""
-        Returns the subformulas attached to a binary operator.
+        Returns the subformulas attached to a binary operator. The spaces that
+        distinguish the keys of two subformulas with the same main connective
+        (e.g. ``{"<>": "tt", " <>": "dd"}``) are removed.
 
         :returns: A list containing the subformulas.
         :rtype: List.
@@ -202,12 +223,14 @@ class Formula(object):
         connectives = new_formula.keys()
         for connective in connectives:
             subformulas.append(
-                Formula({connective: new_formula.get(connective)}))
+                Formula({connective.replace(" ", ""):
+                         new_formula.get(connective)}))
         return subformulas
 
     def get_connective(self):
         r"""
-        Return the main connective of the formula.
+        Return the main connective of the formula, without the spaces that
+        distinguish the subformulas of a binary operator.
 
         :returns: A string representing the main connective of the formula.
         :rtype: String.
@@ -222,7 +245,7 @@ class Formula(object):
         '<>'
 
         """
-        return self.__formula.keys()[0]
+        return self.__formula.keys()[0].replace(" ", "")
 
     def is_proposition(self):
         """
@@ -313,3 +336,27 @@ class Formula(object):
                 (subformula.get_connective() in self.__operators[:-1])):
             return True
         return False
+
+
+def get_formula_key(data):
+    """
+    Returns a hashable key of the structure of a formula. Two structures have
+    the same key iff they are equal.
+
+    :param data: Structure representing a formula.
+    :type data: Dictionary or String
+
+    :returns: Key of the structure.
+    :rtype: Tuple or String
+
+    :Example:
+
+    >>> from tccMChecker.formula import *
+    >>> get_formula_key({"^": {"": "b=1", "~": "tt"}})
+    (('^', (('', 'b=1'), ('~', 'tt'))),)
+
+    """
+    if isinstance(data, dict):
+        return tuple(sorted((key, get_formula_key(value))
+                            for key, value in data.items()))
+    return data
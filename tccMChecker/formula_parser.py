@@ -0,0 +1,399 @@
+"""This module contains a parser of temporal formulas written in text, e.g.
+``<>(in=true ^ ~o(x=2))``, and the functions to convert formulas between their
+structure and a syntax tree."""
+
+from __future__ import print_function
+
+import collections
+import re
+
+from tccMChecker.formula import Formula
+
+# Maximum number of formulas kept by the parse cache
+PARSE_CACHE_SIZE = 4096
+
+_parse_cache = collections.OrderedDict()
+
+_token_pattern = re.compile(r"\s*(?:(?P<operator><>|\[\]|[~^()])|"
+                            r"(?P<name>[A-Za-z_][\w.]*(?:=[\w.+-]+)?))")
+
+_unary_connectives = ["~", "o", "<>", "[]"]
+_binary_connectives = ["^", "v"]
+
+
+def unary_formula(connective, data):
+    """
+    Builds the structure of a formula with a unary main connective.
+
+    :param connective: ``~``, ``o``, ``<>`` or ``[]``.
+    :type connective: String
+
+    :param data: Structure representing the subformula.
+    :type data: Dictionary
+
+    :returns: Structure representing the formula.
+    :rtype: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.formula_parser import *
+    >>> unary_formula("o", {"": "x=2"})
+    {'o': 'x=2'}
+
+    """
+    key, value = list(data.items())[0]
+    if key == "":  # proposition
+        return {connective: value}
+    return {connective: data}
+
+
+def binary_formula(connective, left, right):
+    """
+    Builds the structure of a formula with a binary main connective.
+
+    :param connective: ``^`` or ``v``.
+    :type connective: String
+
+    :param left: Structure representing the left subformula.
+    :type left: Dictionary
+
+    :param right: Structure representing the right subformula.
+    :type right: Dictionary
+
+    :returns: Structure representing the formula. When both subformulas have
+        the same main connective, the key of the right one starts with a
+        space, which :py:meth:`formula.Formula.get_connective` and
+        :py:meth:`formula.Formula.get_subformulas` ignore.
+    :rtype: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.formula_parser import *
+    >>> binary_formula("^", {"": "x=2"}, {"": "in=true"})
+    {'^': {'': 'x=2', ' ': 'in=true'}}
+
+    The order of the subformulas does not change the closure:
+
+    >>> from tccMChecker.closure import get_closure
+    >>> def get_subformula_closure(text):
+    ...     closure = []
+    ...     get_closure(parse_formula(text), closure)
+    ...     return sorted(format_formula(formula) for formula in closure[2:])
+    >>> get_subformula_closure("<>tt ^ <>dd") == \
+    ...     get_subformula_closure("<>dd ^ <>tt")
+    True
+
+    """
+    left_key, left_value = list(left.items())[0]
+    right_key, right_value = list(right.items())[0]
+    if right_key == left_key:
+        right_key = " " + right_key
+    return {connective: {left_key: left_value, right_key: right_value}}
+
+
+def tree_to_data(tree):
+    """
+    Converts a syntax tree into the structure of a formula.
+
+    :param tree: Syntax tree. A proposition is ``("", name)``, a unary formula
+        is ``(connective, subtree)`` and a binary formula is
+        ``(connective, left subtree, right subtree)``.
+    :type tree: Tuple
+
+    :returns: Structure representing the formula.
+    :rtype: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.formula_parser import *
+    >>> tree_to_data(("<>", ("^", ("", "in=true"), ("~", ("o", ("", "x=2"))))))
+    {'<>': {'^': {'': 'in=true', '~': {'o': 'x=2'}}}}
+
+    """
+    if tree[0] == "":
+        return {"": tree[1]}
+    if len(tree) == 2:
+        return unary_formula(tree[0], tree_to_data(tree[1]))
+    return binary_formula(tree[0], tree_to_data(tree[1]),
+                          tree_to_data(tree[2]))
+
+
+def data_to_tree(data):
+    """
+    Converts the structure of a formula into a syntax tree (see
+    :py:func:`.tree_to_data`). The spaces used to distinguish the keys of the
+    subformulas of a binary connective are removed.
+
+    :param data: Structure representing the formula.
+    :type data: Dictionary or String
+
+    :returns: Syntax tree.
+    :rtype: Tuple
+
+    :Example:
+
+    >>> from tccMChecker.formula_parser import *
+    >>> data_to_tree({"v": {"~": "b=2", " ~": "sm=0"}})
+    ('v', ('~', ('', 'b=2')), ('~', ('', 'sm=0')))
+
+    """
+    if not isinstance(data, dict):
+        return "", data
+
+    key, value = list(data.items())[0]
+    connective = key.replace(" ", "")
+    if connective == "":
+        return data_to_tree(value)
+    if connective in _binary_connectives:
+        subformulas = [data_to_tree({sub_key: sub_value})
+                       for sub_key, sub_value in value.items()]
+        return connective, subformulas[0], subformulas[1]
+    return connective, data_to_tree(value)
+
+
+def format_tree(tree):
+    """
+    Returns the text of a syntax tree, in the syntax accepted by
+    :py:func:`.parse_formula`.
+
+    :param tree: Syntax tree (see :py:func:`.tree_to_data`).
+    :type tree: Tuple
+
+    :returns: Text of the formula.
+    :rtype: String
+
+    """
+    if tree[0] == "":
+        return tree[1]
+
+    operands = []
+    for subtree in tree[1:]:
+        text = format_tree(subtree)
+        if len(subtree) == 3:
+            text = "(" + text + ")"
+        operands.append(text)
+
+    if len(tree) == 3:
+        return "{} {} {}".format(operands[0], tree[0], operands[1])
+    if tree[0] == "o" and not operands[0].startswith("("):
+        return "o " + operands[0]
+    return tree[0] + operands[0]
+
+
+def format_formula(formula):
+    """
+    Returns the text of a formula, in the syntax accepted by
+    :py:func:`.parse_formula`.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :returns: Text of the formula.
+    :rtype: String
+
+    :Example:
+
+    >>> from tccMChecker.formula_parser import *
+    >>> format_formula(Formula({"<>": {"^": {"": "in=true", "~": {"o": "x=2"}}}}))
+    '<>(in=true ^ ~o x=2)'
+
+    """
+    return format_tree(data_to_tree(formula.get_formula()))
+
+
+def tokenize(text):
+    """
+    Splits the text of a formula into tokens.
+
+    :param text: Text of the formula.
+    :type text: String
+
+    :returns: List of tuples ``(kind, value, position)`` where kind is
+        ``operator`` or ``name``. The names ``o`` and ``v`` are the operators
+        next and or.
+    :rtype: List of Tuples
+
+    """
+    tokens = []
+    position = 0
+    end = len(text.rstrip())
+    while position < end:
+        match = _token_pattern.match(text, position)
+        if match is None:
+            raise ValueError("unexpected character {!r} at position {}".format(
+                text[position:].strip()[:1], position))
+        value = match.group("operator") or match.group("name")
+        if value in ("o", "v") or match.group("operator"):
+            tokens.append(("operator", value, match.start(match.lastindex)))
+        else:
+            tokens.append(("name", value, match.start(match.lastindex)))
+        position = match.end()
+    return tokens
+
+
+def parse_tree(text):
+    """
+    Parses the text of a formula into a syntax tree.
+
+    The grammar is (``^`` binds tighter than ``v``, both associate to the
+    left)::
+
+        formula := conjunction ("v" conjunction)*
+        conjunction := unary ("^" unary)*
+        unary := ("~" | "o" | "<>" | "[]")* (proposition | "(" formula ")")
+
+    :param text: Text of the formula.
+    :type text: String
+
+    :returns: Syntax tree (see :py:func:`.tree_to_data`).
+    :rtype: Tuple
+
+    :Example:
+
+    >>> from tccMChecker.formula_parser import *
+    >>> parse_tree("<>(in=true ^ ~o(x=2))")
+    ('<>', ('^', ('', 'in=true'), ('~', ('o', ('', 'x=2')))))
+
+    """
+    tokens = tokenize(text)
+    state = {"index": 0}
+
+    def peek():
+        if state["index"] < len(tokens):
+            return tokens[state["index"]]
+        return None, None, len(text)
+
+    def expect(value):
+        kind, token, position = peek()
+        if token != value:
+            raise ValueError("expected {!r} at position {} of {!r}".format(
+                value, position, text))
+        state["index"] += 1
+
+    def parse_binary(connective, parse_operand):
+        tree = parse_operand()
+        while peek()[1] == connective and peek()[0] == "operator":
+            state["index"] += 1
+            tree = (connective, tree, parse_operand())
+        return tree
+
+    def parse_unary():
+        connectives = []
+        while peek()[0] == "operator" and peek()[1] in _unary_connectives:
+            connectives.append(peek()[1])
+            state["index"] += 1
+
+        kind, token, position = peek()
+        if kind == "name":
+            state["index"] += 1
+            tree = ("", token)
+        elif token == "(":
+            state["index"] += 1
+            tree = parse_formula_tree()
+            expect(")")
+        else:
+            raise ValueError("expected a proposition at position {} of "
+                             "{!r}".format(position, text))
+
+        for connective in reversed(connectives):
+            tree = (connective, tree)
+        return tree
+
+    def parse_conjunction():
+        return parse_binary("^", parse_unary)
+
+    def parse_formula_tree():
+        return parse_binary("v", parse_conjunction)
+
+    tree = parse_formula_tree()
+    if state["index"] != len(tokens):
+        raise ValueError("unexpected {!r} at position {} of {!r}".format(
+            peek()[1], peek()[2], text))
+    return tree
+
+
+def parse_formula(text):
+    """
+    Parses the text of a formula.
+
+    The formulas are kept in a LRU cache of :py:data:`.PARSE_CACHE_SIZE`
+    entries, so parsing the same text again returns the same
+    :py:class:`~formula.Formula` object. The returned formulas must not be
+    modified.
+
+    :param text: Text of the formula. The operators are the ones of
+        :py:class:`~formula.Formula`.
+    :type text: String
+
+    :returns: The formula.
+    :rtype: :py:class:`~formula.Formula`
+
+    :Example:
+
+    >>> from tccMChecker.formula_parser import *
+    >>> phi = parse_formula("<>(in=true ^ ~o(x=2))")
+    >>> phi.get_formula()
+    {'<>': {'^': {'': 'in=true', '~': {'o': 'x=2'}}}}
+    >>> phi is parse_formula("<>(in=true ^ ~o(x=2))")
+    True
+
+    """
+    formula = _parse_cache.pop(text, None)
+    if formula is None:
+        formula = Formula(tree_to_data(parse_tree(text)))
+        if len(_parse_cache) >= PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    _parse_cache[text] = formula
+    return formula
+
+
+def clear_parse_cache():
+    """
+    Removes all the formulas of the parse cache.
+
+    """
+    _parse_cache.clear()
+
+
+def load_property_file(path):
+    """
+    Parses a file of properties, one per line. A line can start with the name
+    of the property followed by ``:``. Empty lines and lines starting with
+    ``#`` are ignored.
+
+    :param path: Path of the file.
+    :type path: String
+
+    :returns: List of tuples ``(name, formula)``. Properties without name are
+        named after their line number.
+    :rtype: List of Tuples
+
+    :Example:
+
+    ``properties.ltl``::
+
+        # delivery
+        p1: <>(tt ^ ~o da=0)
+        []~(da=5 ^ b=1)
+
+    >>> from tccMChecker.formula_parser import *
+    >>> for name, formula in load_property_file("properties.ltl"):
+    ...     print(name, format_formula(formula))
+    p1 <>(tt ^ ~o da=0)
+    line 3 []~(da=5 ^ b=1)
+
+    """
+    properties = []
+    with open(path) as property_file:
+        for number, line in enumerate(property_file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name = "line {}".format(number)
+            if ":" in line:
+                name, line = [part.strip() for part in line.split(":", 1)]
+            try:
+                properties.append((name, parse_formula(line)))
+            except ValueError as error:
+                raise ValueError("{}:{}: {}".format(path, number, error))
+    return properties
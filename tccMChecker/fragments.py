@@ -0,0 +1,545 @@
+"""This module contains fast checks for three fragments of the properties,
+which only need a traversal of the tcc structure instead of the atoms, the
+model checking graph and its strongly connected components:
+
+* ``propositional``: the property has no temporal connective, so only the
+  stores of the initial nodes matter.
+* ``safety``: the property is :math:`\\square p`, with :math:`p`
+  propositional, so it is violated by a reachable tcc node where
+  :math:`\\neg p` can hold.
+* ``co_safety``: the property is :math:`\\diamondsuit p`, with :math:`p`
+  propositional, so it is violated by a reachable cycle that avoids
+  :math:`p`.
+
+As in :py:func:`model_checking_algorithm.model_satisfies_property`, the
+formula given to the checks is the negation of the property. The checks
+follow either the semantics of
+:py:func:`model_checking_algorithm.model_satisfies_property` ([FV06]_) or the
+usual semantics of LTL of :py:func:`tableau.model_satisfies_property_tableau`.
+"""
+
+from __future__ import print_function
+
+from collections import deque
+
+from tarjan import tarjan
+
+from tccMChecker.check_statistics import get_time
+from tccMChecker.closure import get_closure
+from tccMChecker.formula import Formula, get_formula_key
+from tccMChecker.model_checking_graph import get_all_atoms, \
+    get_model_checking_atoms, search_formulas, is_in_atom, is_next_state
+from tccMChecker.tableau import get_negation_normal_form, is_literal, \
+    get_store_literals, get_tree_literals, are_literals_consistent, \
+    get_component_path
+
+# Fragment of the property for the main connective of the negation of the
+# property (in negation normal form)
+_fragments = {"<>": "safety", "[]": "co_safety"}
+
+
+def is_propositional(tree):
+    """
+    Checks if a syntax tree in negation normal form has no temporal
+    connective.
+
+    :param tree: Syntax tree.
+    :type tree: Tuple
+
+    :rtype: Boolean
+
+    """
+    if is_literal(tree):
+        return True
+    return tree[0] in ("^", "v") and all(is_propositional(subtree)
+                                         for subtree in tree[1:])
+
+
+def classify_formula(formula):
+    """
+    Returns the fragment of the property whose negation is a formula.
+
+    :param formula: Negation of the property.
+    :type formula: :py:class:`~formula.Formula`
+
+    :returns: ``propositional``, ``safety``, ``co_safety``, or ``None`` if
+        the property is in none of them.
+    :rtype: String
+
+    :Example:
+
+    >>> from tccMChecker.fragments import *
+    >>> from tccMChecker.formula import Formula
+    >>> classify_formula(Formula({"~": {"[]": {"~": "da=0"}}}))
+    'safety'
+    >>> classify_formula(Formula({"[]": {"v": {"": "da=5", "~": "tc"}}}))
+    'co_safety'
+    >>> print(classify_formula(Formula({"<>": {"o": "da=0"}})))
+    None
+
+    """
+    tree = get_negation_normal_form(formula)
+    if is_propositional(tree):
+        return "propositional"
+    if tree[0] in _fragments and is_propositional(tree[1]):
+        return _fragments[tree[0]]
+    return None
+
+
+def get_compatible_nodes(tree, tcc_structure):
+    """
+    Returns the tcc nodes whose store is consistent with a propositional
+    formula (see :py:func:`tableau.get_store_literals`).
+
+    :param tree: Propositional syntax tree in negation normal form.
+    :type tree: Tuple
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :returns: The compatible tcc nodes.
+    :rtype: Set
+
+    """
+    formula_literals = get_tree_literals(tree)
+    compatible = set()
+    for tcc_node, data in tcc_structure.items():
+        if any(are_literals_consistent(literals | store)
+               for literals in formula_literals
+               for store in get_store_literals(data.get("store"))):
+            compatible.add(tcc_node)
+    return compatible
+
+
+def get_live_nodes(tcc_structure, nodes):
+    """
+    Returns the tcc nodes that have an infinite path within a set of nodes,
+    by removing the nodes without successors one after the other.
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param nodes: The tcc nodes that the paths can visit.
+    :type nodes: Set
+
+    :returns: The live tcc nodes.
+    :rtype: Set
+
+    """
+    predecessors = dict((tcc_node, []) for tcc_node in nodes)
+    degrees = {}
+    for tcc_node in nodes:
+        successors = [next_tcc_node for next_tcc_node in
+                      tcc_structure[tcc_node].get("edges")
+                      if next_tcc_node in nodes]
+        degrees[tcc_node] = len(successors)
+        for next_tcc_node in successors:
+            predecessors[next_tcc_node].append(tcc_node)
+
+    live = set(nodes)
+    queue = deque(tcc_node for tcc_node in nodes if not degrees[tcc_node])
+    while queue:
+        tcc_node = queue.popleft()
+        live.discard(tcc_node)
+        for previous_tcc_node in predecessors[tcc_node]:
+            degrees[previous_tcc_node] -= 1
+            if not degrees[previous_tcc_node]:
+                queue.append(previous_tcc_node)
+    return live
+
+
+def get_path(tcc_structure, sources, targets, allowed):
+    """
+    Returns a shortest path of tcc nodes from a source to a target, visiting
+    only allowed tcc nodes.
+
+    :returns: The tcc nodes of the path, or ``None`` if there is no path.
+    :rtype: List
+
+    """
+    parents = dict((source, None) for source in sources if source in allowed)
+    queue = deque(parents.keys())
+    while queue:
+        tcc_node = queue.popleft()
+        if tcc_node in targets:
+            path = []
+            while tcc_node is not None:
+                path.append(tcc_node)
+                tcc_node = parents[tcc_node]
+            path.reverse()
+            return path
+        for next_tcc_node in tcc_structure[tcc_node].get("edges"):
+            if next_tcc_node in allowed and next_tcc_node not in parents:
+                parents[next_tcc_node] = tcc_node
+                queue.append(next_tcc_node)
+    return None
+
+
+def get_fragment_witness(tcc_structure, path, live):
+    """
+    Returns a lasso-shaped path that continues a path of tcc nodes through
+    live tcc nodes (see :py:func:`.get_live_nodes`) until it reaches a tcc
+    node of the path again.
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param path: tcc nodes of the path. The last one is live.
+    :type path: List
+
+    :param live: Live tcc nodes.
+    :type live: Set
+
+    :returns: A dictionary with the keys ``prefix`` and ``cycle`` (see
+        :py:func:`searching_algorithm.get_lasso_witness`). The steps have no
+        model checking node nor atom.
+    :rtype: Dictionary
+
+    """
+    positions = dict((tcc_node, index) for index, tcc_node in enumerate(path))
+    while True:
+        next_tcc_node = [next_tcc_node for next_tcc_node in
+                         tcc_structure[path[-1]].get("edges")
+                         if next_tcc_node in live][0]
+        if next_tcc_node in positions:
+            break
+        positions[next_tcc_node] = len(path)
+        path.append(next_tcc_node)
+
+    start = positions[next_tcc_node]
+    return {"prefix": [(tcc_node, None, None) for tcc_node in path[:start]],
+            "cycle": [(tcc_node, None, None) for tcc_node in path[start:]]}
+
+
+def get_group_key(atom, formula, next_formulas, eventualities):
+    """
+    Returns the formulas of an atom that the model checking algorithm looks
+    at once the atom is built: the formulas with next operator of the atom,
+    the formulas with next operator that the atom satisfies (see
+    :py:func:`model_checking_graph.is_next_state`), the eventualities
+    (formulas :math:`\\diamondsuit\\phi`) of the atom, the eventualities
+    that the atom fulfills, and whether the atom has the formula. The atoms
+    of a tcc node with the same key only differ in their propositions, and
+    have the same predecessors and successors in the model checking graph.
+
+    :param atom: Atom of a tcc node.
+    :type atom: List of :py:class:`~formula.Formula`
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param next_formulas: Formulas with next operator of the atoms, by key
+        (see :py:func:`formula.get_formula_key`).
+    :type next_formulas: Dictionary
+
+    :param eventualities: Eventualities of the atoms, by key.
+    :type eventualities: Dictionary
+
+    :returns: The key of the atom.
+    :rtype: Tuple
+
+    """
+    return (frozenset(get_formula_key(next_formula.get_formula())
+                      for next_formula in search_formulas(atom, "o")),
+            frozenset(key for key, next_formula in next_formulas.items()
+                      if is_next_state([next_formula], atom)),
+            frozenset(get_formula_key(eventuality.get_formula())
+                      for eventuality in search_formulas(atom, "<>")),
+            frozenset(key for key, eventuality in eventualities.items()
+                      if is_in_atom(Formula(eventuality.get_values())
+                                    .get_formula(), atom)),
+            is_in_atom(formula.get_formula(), atom))
+
+
+def get_group_graph(formula, tcc_structure):
+    """
+    Returns the model checking graph of
+    :py:func:`model_checking_algorithm.model_satisfies_property` with the
+    atoms of each tcc node that have the same key (see
+    :py:func:`.get_group_key`) merged into a group.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :returns: The graph of the groups, and a list with the tcc node, the key
+        and the number of atoms of each group.
+    :rtype: Tuple
+
+    """
+    closure = []
+    get_closure(formula, closure)
+    model_checking_atoms = get_model_checking_atoms(
+        tcc_structure, get_all_atoms(closure), closure)
+
+    next_formulas = {}
+    eventualities = {}
+    for node_atoms in model_checking_atoms.values():
+        for atom in node_atoms.values():
+            for next_formula in search_formulas(atom, "o"):
+                next_formulas[get_formula_key(next_formula.get_formula())] = \
+                    next_formula
+            for eventuality in search_formulas(atom, "<>"):
+                eventualities[get_formula_key(eventuality.get_formula())] = \
+                    eventuality
+
+    groups = []
+    numbers = {}
+    node_groups = {}
+    for tcc_node in sorted(model_checking_atoms.keys()):
+        node_groups[tcc_node] = []
+        for index in sorted(model_checking_atoms[tcc_node].keys()):
+            key = get_group_key(model_checking_atoms[tcc_node][index],
+                                formula, next_formulas, eventualities)
+            if (tcc_node, key) not in numbers:
+                numbers[(tcc_node, key)] = len(groups)
+                node_groups[tcc_node].append(len(groups))
+                groups.append([tcc_node, key, 0])
+            groups[numbers[(tcc_node, key)]][2] += 1
+
+    graph = {}
+    for number, (tcc_node, key, size) in enumerate(groups):
+        graph[number] = [
+            next_number
+            for next_tcc_node in tcc_structure[tcc_node].get("edges")
+            for next_number in node_groups.get(next_tcc_node, [])
+            if key[0] <= groups[next_number][1][1]]
+    return graph, groups
+
+
+def find_group_component(graph, groups, tcc_structure):
+    """
+    Returns a strongly connected component of the graph of the groups (see
+    :py:func:`.get_group_graph`) whose atoms form a self-fulfilling SCC of
+    more than one atom, and an initial group with the formula that is in the
+    component or has an edge to it (see
+    :py:func:`searching_algorithm.find_self_fulfilling_scc`).
+
+    :param graph: Graph of the groups.
+    :type graph: Dictionary
+
+    :param groups: Tcc node, key and number of atoms of each group.
+    :type groups: List
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :returns: The numbers of the groups of the component and the number of
+        the initial group, or ``None`` if there is no such component.
+    :rtype: Tuple
+
+    """
+    initial = [number for number, (tcc_node, key, size) in enumerate(groups)
+               if tcc_structure[tcc_node].get("initial") and key[4]]
+
+    for component in tarjan(graph):
+        members = set(component)
+        # the atoms of a group without an edge to itself are not connected
+        if len(component) == 1 and (component[0] not in graph[component[0]] or
+                                    groups[component[0]][2] == 1):
+            continue
+
+        # the eventualities of the non-initial atoms must be fulfilled by
+        # non-initial atoms
+        keys = [groups[number][1] for number in component
+                if not tcc_structure[groups[number][0]].get("initial")]
+        fulfilled = set()
+        for key in keys:
+            fulfilled.update(key[3])
+        if any(not key[2] <= fulfilled for key in keys):
+            continue
+
+        for number in initial:
+            if number in members or members.intersection(graph[number]):
+                return component, number
+    return None
+
+
+def get_group_witness(graph, groups, tcc_structure, component, entry):
+    """
+    Returns a lasso-shaped path of tcc nodes from an initial group through a
+    cycle of a component of the graph of the groups (see
+    :py:func:`.find_group_component`) that fulfills the eventualities of its
+    non-initial groups.
+
+    :param graph: Graph of the groups.
+    :type graph: Dictionary
+
+    :param groups: Tcc node, key and number of atoms of each group.
+    :type groups: List
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param component: Numbers of the groups of the component.
+    :type component: List of Integers
+
+    :param entry: Number of the initial group.
+    :type entry: Integer
+
+    :returns: A dictionary with the keys ``prefix`` and ``cycle`` (see
+        :py:func:`searching_algorithm.get_lasso_witness`). The steps have no
+        model checking node nor atom.
+    :rtype: Dictionary
+
+    """
+    members = set(component)
+    prefix = []
+    if entry not in members:
+        prefix.append(entry)
+        entry = [number for number in graph[entry] if number in members][0]
+
+    non_initial = [number for number in component
+                   if not tcc_structure[groups[number][0]].get("initial")]
+    targets = []
+    for eventuality in set().union(*[groups[number][1][2]
+                                     for number in non_initial]):
+        for number in non_initial:
+            if eventuality in groups[number][1][3]:
+                targets.append(number)
+                break
+
+    cycle = []
+    current = entry
+    for target in targets:
+        if target != current:
+            path = get_component_path(graph, members, current, target)
+            cycle.extend(path[:-1])
+            current = target
+    path = get_component_path(graph, members, current, entry)
+    cycle.extend(path[:-1])
+    return {"prefix": [(groups[number][0], None, None) for number in prefix],
+            "cycle": [(groups[number][0], None, None) for number in cycle]}
+
+
+def model_satisfies_property_fragment_fv06(formula, tcc_structure,
+                                           witness=None, statistics=None):
+    """
+    Checks if a model satisfies a formula whose property is in one of the
+    fragments of :py:func:`.classify_formula`, with the result of
+    :py:func:`model_checking_algorithm.model_satisfies_property`.
+
+    The atoms of the tcc nodes are built as in that function, but the atoms
+    of a tcc node that only differ in their propositions are merged (see
+    :py:func:`.get_group_graph`), so each tcc node has a few groups instead of
+    an atom for each valuation of the propositions of the formula, and the
+    strongly connected components are computed on the groups.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param witness: Empty dictionary to store a path of tcc nodes that
+        satisfies the formula (see :py:func:`.get_group_witness`).
+    :type witness: Dictionary
+
+    :param statistics: Empty dictionary to store the fragment
+        (``fragment``), the number of groups (``groups``) and the time of the
+        check (``time``).
+    :type statistics: Dictionary
+
+    :returns: ``True`` if the model satisfies the formula or ``False``
+        otherwise.
+    :rtype: Boolean
+
+    :raises ValueError: If the property is in none of the fragments.
+
+    :Example:
+
+    >>> from tccMChecker.fragments import *
+    >>> formula = Formula({"<>": {"": "da=10"}})
+    >>> model_satisfies_property_fragment_fv06(formula, tcc_structure)
+    True
+
+    """
+    start = get_time()
+    fragment = classify_formula(formula)
+    if fragment is None:
+        raise ValueError("the property is not in a fragment")
+
+    graph, groups = get_group_graph(formula, tcc_structure)
+    found = find_group_component(graph, groups, tcc_structure)
+
+    if found is not None and witness is not None:
+        witness.update(get_group_witness(graph, groups, tcc_structure,
+                                         found[0], found[1]))
+    if statistics is not None:
+        statistics["fragment"] = fragment
+        statistics["groups"] = len(groups)
+        statistics["time"] = get_time() - start
+    return found is not None
+
+
+def model_satisfies_property_fragment(formula, tcc_structure, witness=None,
+                                      statistics=None):
+    """
+    Checks if a model satisfies a formula whose property is in one of the
+    fragments of :py:func:`.classify_formula`, with the usual semantics of
+    LTL.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param witness: Empty dictionary to store a path of tcc nodes that
+        satisfies the formula (see :py:func:`.get_fragment_witness`).
+    :type witness: Dictionary
+
+    :param statistics: Empty dictionary to store the fragment
+        (``fragment``), the number of tcc nodes compatible with the formula
+        (``compatible_nodes``) and the time of the check (``time``).
+    :type statistics: Dictionary
+
+    :returns: ``True`` if the model satisfies the formula or ``False``
+        otherwise.
+    :rtype: Boolean
+
+    :raises ValueError: If the property is in none of the fragments.
+
+    :Example:
+
+    >>> from tccMChecker.fragments import *
+    >>> from tccMChecker.formula import Formula
+    >>> formula = Formula({"<>": {"": "da=10"}})
+    >>> model_satisfies_property_fragment(formula, tcc_structure)
+    True
+
+    """
+    start = get_time()
+    fragment = classify_formula(formula)
+    if fragment is None:
+        raise ValueError("the property is not in a fragment")
+
+    tree = get_negation_normal_form(formula)
+    if fragment != "propositional":
+        tree = tree[1]
+    compatible = get_compatible_nodes(tree, tcc_structure)
+    initial = [tcc_node for tcc_node, data in sorted(tcc_structure.items())
+               if data.get("initial")]
+    # the tcc nodes with an inconsistent store are not in any run
+    consistent = set(tcc_node for tcc_node, data in tcc_structure.items()
+                     if get_store_literals(data.get("store")))
+
+    if fragment == "co_safety":
+        # a cycle through compatible nodes, from a compatible initial node
+        live = get_live_nodes(tcc_structure, compatible)
+        path = get_path(tcc_structure, initial, live, live)
+    else:
+        # a compatible (initial) node, followed by any infinite path
+        live = get_live_nodes(tcc_structure, consistent)
+        allowed = consistent if fragment == "safety" else set(initial)
+        path = get_path(tcc_structure, initial, compatible & live, allowed)
+
+    if path is not None and witness is not None:
+        witness.update(get_fragment_witness(tcc_structure, path, live))
+    if statistics is not None:
+        statistics["fragment"] = fragment
+        statistics["compatible_nodes"] = len(compatible)
+        statistics["time"] = get_time() - start
+    return path is not None
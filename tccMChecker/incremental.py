@@ -0,0 +1,486 @@
+"""This module contains a model checking session that keeps the atoms, the
+model checking graph and its strongly connected components of a tcc structure,
+and updates them when the tcc structure changes."""
+
+from __future__ import print_function
+
+from tarjan import tarjan
+
+from tccMChecker.closure import get_closure
+from tccMChecker.model_checking_graph import get_all_atoms, \
+    get_model_checking_atoms, get_model_checking__graph, get_node_atoms, \
+    get_atom_successors, list2dict, get_closure_propositions, \
+    get_relevant_store, get_store_key
+from tccMChecker.searching_algorithm import get_model_checking_scc_subgraphs, \
+    get_initial_nodes, find_self_fulfilling_scc, get_lasso_witness
+
+
+class ModelCheckingSession(object):
+    """
+    This class represents a model checking session of a formula over a tcc
+    structure that can be edited.
+
+    The session computes the atoms, the model checking graph and the strongly
+    connected components once. After that, each change of the tcc structure
+    (add or remove a node, change a store, add or remove an edge) only
+    recomputes the atoms of the tcc nodes involved, the successors of the
+    affected model checking nodes and the components that can be merged or
+    split by the change.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure. The session works on its own copy of
+        the structure.
+    :type tcc_structure: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.incremental import *
+    >>> session = ModelCheckingSession(formula, tcc_structure)
+    >>> session.check()
+    False
+    >>> session.change_store(3, [Formula({"": "x=1"})])
+    >>> session.remove_edge(1, 3)
+    >>> session.check()
+    False
+
+    .. note::
+        As in :py:func:`model_checking_algorithm.model_satisfies_property`, the
+        formula is the negation of the property, so ``check`` returns ``True``
+        when the model does not satisfy the property.
+
+    """
+
+    def __init__(self, formula, tcc_structure):
+        """
+        Constructor method.
+
+        :param formula: Formula
+        :type formula: :py:class:`~formula.Formula`
+
+        :param tcc_structure: tcc Structure
+        :type tcc_structure: Dictionary
+
+        """
+        self.__formula = formula
+        self.__tcc_structure = {}
+        for tcc_node in tcc_structure.keys():
+            self.__tcc_structure[tcc_node] = self.__copy_node(
+                tcc_structure.get(tcc_node))
+
+        closure = []
+        get_closure(formula, closure)
+        self.__atoms = get_all_atoms(closure)
+        self.__propositions = get_closure_propositions(closure)
+        self.__store_atoms = {}
+
+        self.__model_checking_atoms = get_model_checking_atoms(
+            self.__tcc_structure, self.__atoms, closure)
+        self.__model_checking_graph = get_model_checking__graph(
+            self.__tcc_structure, self.__model_checking_atoms)
+
+        self.__next_node = max(
+            [0] + list(self.__model_checking_graph.keys())) + 1
+
+        self.__components = {}
+        self.__node_component = {}
+        self.__next_component = 0
+        for scc in tarjan(self.__model_checking_graph):
+            self.__add_component(scc)
+
+        self.__inserted_edges = []
+        self.__deleted_edges = []
+        self.__deleted_nodes = []
+        self.__new_nodes = []
+
+    @staticmethod
+    def __copy_node(data):
+        node = dict(data)
+        node["store"] = list(data.get("store", []))
+        node["edges"] = list(data.get("edges", []))
+        return node
+
+    def get_tcc_structure(self):
+        """
+        Returns the tcc structure of the session.
+
+        :returns: The tcc structure with all the changes applied.
+        :rtype: Dictionary
+
+        """
+        return self.__tcc_structure
+
+    def get_model_checking_atoms(self):
+        """
+        Returns the atoms of each tcc node.
+
+        :returns: Dictionary that have the states of the tcc structure as keys,
+            and a dictionary of consistent atoms as values.
+        :rtype: Dictionary
+
+        """
+        return self.__model_checking_atoms
+
+    def get_model_checking_graph(self):
+        """
+        Returns the model checking graph.
+
+        :returns: Structure representing the model checking graph.
+        :rtype: Dictionary
+
+        """
+        return self.__model_checking_graph
+
+    def get_strongly_connected_components(self):
+        """
+        Returns the strongly connected components of the model checking graph.
+
+        :returns: List of the nodes of each component.
+        :rtype: List of Lists
+
+        """
+        self.__update_components()
+        return list(self.__components.values())
+
+    def add_node(self, tcc_node, store, edges, initial=False, normal=None,
+                 temporal=None):
+        """
+        Adds a node to the tcc structure.
+
+        :param tcc_node: Identifier of the new tcc node.
+        :type tcc_node: Integer
+
+        :param store: Propositions (as formulas) of the store of the node.
+        :type store: List of :py:class:`~formula.Formula`
+
+        :param edges: Successors of the node. They must be nodes of the
+            structure or the node itself.
+        :type edges: List
+
+        :param initial: ``True`` if the node is an initial node.
+        :type initial: Boolean
+
+        """
+        if tcc_node in self.__tcc_structure:
+            raise ValueError("tcc node {} already exists".format(tcc_node))
+        for target in edges:
+            if target != tcc_node and target not in self.__tcc_structure:
+                raise ValueError("tcc node {} does not exist".format(target))
+
+        self.__tcc_structure[tcc_node] = self.__copy_node(
+            {"store": store, "normal": normal or [], "temporal": temporal or [],
+             "edges": edges, "initial": initial})
+        self.__add_atoms(tcc_node)
+
+    def remove_node(self, tcc_node):
+        """
+        Removes a node, and the edges going to it, from the tcc structure.
+
+        :param tcc_node: Identifier of the tcc node.
+        :type tcc_node: Integer
+
+        """
+        for node in self.__tcc_structure.keys():
+            if node != tcc_node:
+                while tcc_node in self.__tcc_structure[node]["edges"]:
+                    self.remove_edge(node, tcc_node)
+
+        self.__remove_atoms(tcc_node)
+        del self.__tcc_structure[tcc_node]
+
+    def change_store(self, tcc_node, store):
+        """
+        Replaces the store of a tcc node.
+
+        :param tcc_node: Identifier of the tcc node.
+        :type tcc_node: Integer
+
+        :param store: Propositions (as formulas) of the new store.
+        :type store: List of :py:class:`~formula.Formula`
+
+        """
+        self.__remove_atoms(tcc_node)
+        self.__tcc_structure[tcc_node]["store"] = list(store)
+        self.__add_atoms(tcc_node)
+
+    def add_edge(self, source, target):
+        """
+        Adds an edge to the tcc structure.
+
+        :param source: Source tcc node.
+        :type source: Integer
+
+        :param target: Target tcc node.
+        :type target: Integer
+
+        """
+        if target not in self.__tcc_structure:
+            raise ValueError("tcc node {} does not exist".format(target))
+
+        self.__tcc_structure[source]["edges"].append(target)
+        target_atoms = {target: self.__model_checking_atoms.get(target)}
+
+        for node in self.__model_checking_atoms.get(source).keys():
+            atom = self.__model_checking_atoms[source].get(node)
+            next_nodes = get_atom_successors(atom, [target], target_atoms)
+            for next_node in next_nodes:
+                self.__inserted_edges.append((node, next_node))
+            self.__model_checking_graph[node] = \
+                self.__model_checking_graph[node] + next_nodes
+
+    def remove_edge(self, source, target):
+        """
+        Removes an edge from the tcc structure.
+
+        :param source: Source tcc node.
+        :type source: Integer
+
+        :param target: Target tcc node.
+        :type target: Integer
+
+        """
+        edges = self.__tcc_structure[source]["edges"]
+        edges.remove(target)
+        if target in edges:  # the edge is still there
+            return
+
+        target_nodes = set(self.__model_checking_atoms.get(target).keys())
+        for node in self.__model_checking_atoms.get(source).keys():
+            next_nodes = []
+            for next_node in self.__model_checking_graph[node]:
+                if next_node in target_nodes:
+                    self.__deleted_edges.append((node, next_node))
+                else:
+                    next_nodes.append(next_node)
+            self.__model_checking_graph[node] = next_nodes
+
+    def update_structure(self, tcc_structure):
+        """
+        Applies the changes from the tcc structure of the session to another
+        tcc structure: the nodes removed and added, the stores changed and
+        the edges removed and added.
+
+        :param tcc_structure: New tcc structure.
+        :type tcc_structure: Dictionary
+
+        :returns: ``True`` if the changes were applied, or ``False`` if a tcc
+            node of both structures changed whether it is initial, in which
+            case nothing was changed and a new session is needed.
+        :rtype: Boolean
+
+        """
+        old_structure = self.__tcc_structure
+        for tcc_node, data in tcc_structure.items():
+            if tcc_node in old_structure and \
+                    bool(data.get("initial")) != \
+                    bool(old_structure[tcc_node].get("initial")):
+                return False
+
+        for tcc_node in list(old_structure.keys()):
+            if tcc_node not in tcc_structure:
+                self.remove_node(tcc_node)
+
+        for tcc_node, data in tcc_structure.items():
+            store = data.get("store")
+            if tcc_node not in old_structure:
+                self.add_node(tcc_node, store, [], data.get("initial"),
+                              data.get("normal"), data.get("temporal"))
+            elif [formula.get_formula() for formula in store] != \
+                    [formula.get_formula() for formula in
+                     old_structure[tcc_node]["store"]]:
+                self.change_store(tcc_node, store)
+
+        for tcc_node, data in tcc_structure.items():
+            old_edges = set(old_structure[tcc_node]["edges"])
+            new_edges = set(data.get("edges"))
+            for target in old_edges - new_edges:
+                while target in old_structure[tcc_node]["edges"]:
+                    self.remove_edge(tcc_node, target)
+            for target in new_edges - old_edges:
+                self.add_edge(tcc_node, target)
+        return True
+
+    def check(self, witness=None):
+        """
+        Checks if the tcc structure of the session satisfies the formula.
+
+        :param witness: Empty dictionary to store the lasso-shaped path that
+            satisfies the formula. It is only filled when the method returns
+            ``True``.
+        :type witness: Dictionary
+
+        :returns: ``True`` if the model satisfies the formula or ``False``
+            otherwise.
+        :rtype: Boolean
+
+        .. seealso::
+            :py:func:`model_checking_algorithm.model_satisfies_property`
+
+        """
+        model_checking_scc_subgraphs = get_model_checking_scc_subgraphs(
+            self.get_strongly_connected_components(), self.__tcc_structure,
+            self.__model_checking_atoms, self.__model_checking_graph)
+
+        initial_nodes = get_initial_nodes(self.__tcc_structure,
+                                          self.__model_checking_atoms)
+        scc_graph = find_self_fulfilling_scc(model_checking_scc_subgraphs,
+                                             initial_nodes,
+                                             self.__model_checking_atoms,
+                                             self.__formula)
+        if scc_graph is None:
+            return False
+
+        if witness is not None:
+            witness.update(get_lasso_witness(scc_graph, initial_nodes,
+                                             self.__model_checking_graph,
+                                             self.__model_checking_atoms,
+                                             self.__formula))
+        return True
+
+    def __add_atoms(self, tcc_node):
+        data = self.__tcc_structure[tcc_node]
+        store = data["store"]
+        relevant_store = get_relevant_store(store, self.__propositions)
+        if relevant_store is not None:
+            store = relevant_store
+        store_key = get_store_key(store)
+        if store_key not in self.__store_atoms:
+            self.__store_atoms[store_key] = get_node_atoms(store,
+                                                           self.__atoms)
+        atoms_node = list2dict(self.__store_atoms[store_key],
+                               self.__next_node)
+        self.__next_node += len(atoms_node)
+        self.__model_checking_atoms[tcc_node] = atoms_node
+        self.__new_nodes.extend(atoms_node.keys())
+
+        # edges from the new atoms
+        for node in atoms_node.keys():
+            next_nodes = get_atom_successors(atoms_node.get(node),
+                                             data["edges"],
+                                             self.__model_checking_atoms)
+            self.__model_checking_graph[node] = next_nodes
+            for next_node in next_nodes:
+                self.__inserted_edges.append((node, next_node))
+
+        # edges to the new atoms
+        new_atoms = {tcc_node: atoms_node}
+        for source in self.__tcc_structure.keys():
+            if source == tcc_node:
+                continue
+            times = self.__tcc_structure[source]["edges"].count(tcc_node)
+            if times == 0:
+                continue
+            atoms_source = self.__model_checking_atoms.get(source)
+            for node in atoms_source.keys():
+                next_nodes = get_atom_successors(atoms_source.get(node),
+                                                 [tcc_node] * times, new_atoms)
+                for next_node in next_nodes:
+                    self.__inserted_edges.append((node, next_node))
+                self.__model_checking_graph[node] = \
+                    self.__model_checking_graph[node] + next_nodes
+
+    def __remove_atoms(self, tcc_node):
+        removed_nodes = set(self.__model_checking_atoms.pop(tcc_node).keys())
+
+        for node in removed_nodes:
+            del self.__model_checking_graph[node]
+            self.__deleted_nodes.append(node)
+
+        for source in self.__tcc_structure.keys():
+            if source == tcc_node or \
+                    tcc_node not in self.__tcc_structure[source]["edges"]:
+                continue
+            for node in self.__model_checking_atoms.get(source).keys():
+                self.__model_checking_graph[node] = [
+                    next_node for next_node in self.__model_checking_graph[node]
+                    if next_node not in removed_nodes]
+
+    def __add_component(self, scc):
+        label = self.__next_component
+        self.__next_component += 1
+        self.__components[label] = scc
+        for node in scc:
+            self.__node_component[node] = label
+
+    def __reaching_nodes(self, edges):
+        # nodes lying on a path from the target of an edge to the source of
+        # an edge, computed with one forward and one backward search for all
+        # the edges. They contain every cycle closed by the edges, and with
+        # each node its whole component
+        forward = set(next_node for (node, next_node) in edges)
+        stack = list(forward)
+        while stack:
+            for next_node in self.__model_checking_graph.get(stack.pop(), []):
+                if next_node not in forward:
+                    forward.add(next_node)
+                    stack.append(next_node)
+
+        predecessors = {}
+        for node in forward:
+            for next_node in self.__model_checking_graph.get(node, []):
+                predecessors.setdefault(next_node, []).append(node)
+
+        backward = set(node for (node, next_node) in edges
+                       if node in forward)
+        stack = list(backward)
+        while stack:
+            for node in predecessors.get(stack.pop(), []):
+                if node not in backward:
+                    backward.add(node)
+                    stack.append(node)
+        return backward
+
+    def __update_components(self):
+        graph = self.__model_checking_graph
+        labels = set()
+        region = set()
+
+        # deleting nodes or edges can only split the components that had them
+        for node in self.__deleted_nodes:
+            if node in self.__node_component:
+                labels.add(self.__node_component.pop(node))
+        for (node, next_node) in self.__deleted_edges:
+            label = self.__node_component.get(node)
+            if label is not None and \
+                    label == self.__node_component.get(next_node):
+                labels.add(label)
+
+        # inserting an edge merges the components lying on a new cycle
+        for node in self.__new_nodes:
+            if node in graph:
+                region.add(node)
+        edges = []
+        for (node, next_node) in self.__inserted_edges:
+            if node not in graph or next_node not in graph:
+                continue
+            label = self.__node_component.get(node)
+            if label is not None and \
+                    label == self.__node_component.get(next_node):
+                continue
+            edges.append((node, next_node))
+        if edges:
+            region.update(self.__reaching_nodes(edges))
+
+        for node in region:
+            if node in self.__node_component:
+                labels.add(self.__node_component[node])
+
+        for label in labels:
+            for node in self.__components.pop(label):
+                if node in graph:
+                    region.add(node)
+                    del self.__node_component[node]
+
+        if region:
+            subgraph = {}
+            for node in region:
+                subgraph[node] = [next_node for next_node in graph[node]
+                                  if next_node in region]
+            for scc in tarjan(subgraph):
+                self.__add_component(scc)
+
+        self.__inserted_edges = []
+        self.__deleted_edges = []
+        self.__deleted_nodes = []
+        self.__new_nodes = []
@@ -2,16 +2,24 @@
 
 from __future__ import print_function
 
-from tarjan import tarjan
+from tarjan import tarjan, tarjan_iter
 
+from check_monitor import CheckInterrupted
+from check_statistics import get_call_counters, get_time, record_phase, \
+    record_calls, record_closure, record_atoms, record_graph, \
+    record_components, record_trimming
 from closure import get_closure
+from normalization import normalize_formula
+from parallel_scc import get_strongly_connected_components
 from model_checking_graph import get_all_atoms, get_model_checking_atoms, \
-    get_model_checking__graph
+    get_model_checking__graph, get_cycle_core
 from searching_algorithm import get_model_checking_scc_subgraphs, get_initial_nodes, \
-    is_self_fulfilling, initial_nodes_entail_formula
+    find_self_fulfilling_scc, get_lasso_witness
 
 
-def model_satisfies_property(formula, tcc_structure):
+def model_satisfies_property(formula, tcc_structure, witness=None,
+                             statistics=None, normalize=False,
+                             scc_processes=None, monitor=None):
     """
     Checks if a model satisfies a formula.
 
@@ -21,7 +29,47 @@ def model_satisfies_property(formula, tcc_structure):
     :param tcc_structure: tcc Structure
     :type tcc_structure: Dictionary
 
-    :returns: ``True`` if the model satisfies the formula or ``False`` otherwise.
+    :param witness: Empty dictionary to store the lasso-shaped path that
+        satisfies the formula (see
+        :py:func:`searching_algorithm.get_lasso_witness`). It is only filled
+        when the function returns ``True``.
+    :type witness: Dictionary
+
+    :param statistics: Empty dictionary to store the statistics of the run:
+        the wall time of each phase (``phases``) and of the whole check
+        (``time``), the size of the closure, the number of basic and non-basic
+        formulas, the number of atoms in total and per tcc node, the number of
+        nodes and edges of the model checking graph, the number of nodes and
+        edges removed before the computation of its strongly connected
+        components (``trimmed_nodes`` and ``trimmed_edges``, see
+        :py:func:`model_checking_graph.get_cycle_core`), the number of
+        strongly connected components of the remaining graph and the
+        histogram of their sizes, and the number of calls of ``is_consistent`` and ``is_in_atom`` (``calls``).
+    :type statistics: Dictionary
+
+    :param normalize: If ``True``, the formula is normalized and simplified
+        before generating its closure (see
+        :py:func:`normalization.normalize_formula`). The number of basic
+        formulas removed is stored in the statistics (``normalization``).
+    :type normalize: Boolean
+
+    :param scc_processes: If it is given, the strongly connected components
+        are computed by this number of processes (see
+        :py:func:`parallel_scc.get_strongly_connected_components`) instead of
+        ``tarjan``.
+    :type scc_processes: Integer
+
+    :param monitor: Monitor that receives the progress of each phase and
+        stops the check when it is cancelled or exceeds its budget (see
+        :py:class:`check_monitor.CheckMonitor`). In that case, the statistics
+        of the finished phases are kept, the status (``status``) is
+        ``unknown``, and the reason and the phase of the interruption
+        (``interruption``) and the last counters of the phase (``progress``)
+        are stored.
+    :type monitor: :py:class:`~check_monitor.CheckMonitor`
+
+    :returns: ``True`` if the model satisfies the formula, ``False`` otherwise,
+        or ``None`` if the check was stopped by the monitor.
     :rtype: Boolean
 
     :Example:
@@ -49,66 +97,196 @@ def model_satisfies_property(formula, tcc_structure):
         :py:class:`formula.Formula`
         
     """
+    result = None
+    try:
+        for _, phase in get_check_phases(formula, tcc_structure, witness,
+                                         statistics, normalize, scc_processes,
+                                         monitor):
+            result = phase()
+    except CheckInterrupted:
+        return None
+    return result
+
+
+def get_check_phases(formula, tcc_structure, witness=None, statistics=None,
+                     normalize=False, scc_processes=None, monitor=None):
+    """
+    Returns the phases of :py:func:`.model_satisfies_property`, so they can be
+    run one at a time. The phases are ``normalization`` (only if
+    ``normalize`` is ``True``), ``closure``, ``all_atoms``,
+    ``model_checking_atoms``, ``model_checking_graph``, ``scc`` and
+    ``scc_checks``.
+
+    The parameters are the ones of :py:func:`.model_satisfies_property`.
+
+    :returns: List of tuples ``(name, phase)``, where ``phase`` is a function
+        without arguments. The phases must be called in order, and the last
+        one returns the result of :py:func:`.model_satisfies_property`. If
+        the monitor stops the check, the phase raises
+        :py:class:`check_monitor.CheckInterrupted`.
+    :rtype: List of Tuples
+
+    :Example:
+
+    >>> from tccMChecker.model_checking_algorithm import *
+    >>> for name, phase in get_check_phases(formula, tcc_structure):
+    ...     result = phase()
+    >>> result
+    False
+
+    """
+    state = {"formula": formula}
+
+    def start_check():
+        if "start" not in state:
+            state["counters"] = get_call_counters()
+            state["start"] = get_time()
+
+    def get_phase(name, run):
+        def phase():
+            start_check()
+            if monitor is None:
+                return run()
+            try:
+                monitor.start_phase(name)
+                return run()
+            except CheckInterrupted as interruption:
+                record_phase(statistics, name, monitor.phase_start)
+                record_calls(statistics, state["counters"])
+                if statistics is not None:
+                    statistics["status"] = "unknown"
+                    statistics["interruption"] = {
+                        "reason": interruption.reason,
+                        "phase": interruption.phase}
+                    statistics["progress"] = dict(monitor.counters)
+                    statistics["time"] = get_time() - state["start"]
+                raise
+        return phase
+
+    def run_normalization():
+        report = {}
+        state["formula"] = normalize_formula(state["formula"], report)
+        record_phase(statistics, "normalization", state["start"])
+        if statistics is not None:
+            statistics["normalization"] = report
 
-    # Closure
-    closure = []
-    get_closure(formula, closure)
+    def run_closure():
+        # Closure
+        phase_start = get_time()
+        closure = []
+        get_closure(state["formula"], closure)
+        record_phase(statistics, "closure", phase_start)
+        record_closure(statistics, closure)
+        state["closure"] = closure
 
-    print("Closure: {} formulas".format(len(closure)))
-    for formula_closure in closure:
-        print(formula_closure.get_formula())
+        print("Closure: {} formulas".format(len(closure)))
+        for formula_closure in closure:
+            print(formula_closure.get_formula())
 
-    # All possible atoms
-    atoms = get_all_atoms(closure)
+    def run_all_atoms():
+        # All possible atoms
+        phase_start = get_time()
+        state["atoms"] = get_all_atoms(state["closure"], monitor)
+        record_phase(statistics, "all_atoms", phase_start)
 
-    # Model Checking Atoms
-    model_checking_atoms = get_model_checking_atoms(tcc_structure, atoms)
+    def run_model_checking_atoms():
+        # Model Checking Atoms
+        phase_start = get_time()
+        atoms = state["atoms"]
+        model_checking_atoms = get_model_checking_atoms(tcc_structure, atoms,
+                                                        state["closure"],
+                                                        monitor)
+        record_phase(statistics, "model_checking_atoms", phase_start)
+        record_atoms(statistics, atoms, model_checking_atoms)
+        state["model_checking_atoms"] = model_checking_atoms
 
-    for tcc_node in model_checking_atoms.keys():
-        tcc_atoms = model_checking_atoms.get(tcc_node)
-        print("Atom State {} ({})".format(tcc_node, len(tcc_atoms)))
+        for tcc_node in model_checking_atoms.keys():
+            tcc_atoms = model_checking_atoms.get(tcc_node)
+            print("Atom State {} ({})".format(tcc_node, len(tcc_atoms)))
 
-        for atom_index in tcc_atoms.keys():
-            print("Atom ", atom_index)
+            for atom_index in tcc_atoms.keys():
+                print("Atom ", atom_index)
 
-            for formula_atom in tcc_atoms.get(atom_index):
-                print(formula_atom.get_formula(), " | ", )
+                for formula_atom in tcc_atoms.get(atom_index):
+                    print(formula_atom.get_formula(), " | ", )
 
-            print("\n")
+                print("\n")
 
-    # Model Checking Graph
-    model_checking_graph = get_model_checking__graph(tcc_structure,
-                                                     model_checking_atoms)
-    print("Model Checking Graph: {} nodes".format(
-        max(model_checking_graph.keys())))
-    print(model_checking_graph)
+    def run_model_checking_graph():
+        # Model Checking Graph
+        phase_start = get_time()
+        model_checking_graph = get_model_checking__graph(
+            tcc_structure, state["model_checking_atoms"], monitor)
+        record_phase(statistics, "model_checking_graph", phase_start)
+        record_graph(statistics, model_checking_graph)
+        state["model_checking_graph"] = model_checking_graph
+        print("Model Checking Graph: {} nodes".format(
+            max(model_checking_graph.keys())))
+        print(model_checking_graph)
 
-    # Strongly Connected Components
-    strongly_connected_components = tarjan(model_checking_graph)
-    print("Strongly Connected Components: ")
-    print(strongly_connected_components)
+    def run_scc():
+        # Strongly Connected Components
+        phase_start = get_time()
+        cycle_core = get_cycle_core(state["model_checking_graph"])
+        record_trimming(statistics, state["model_checking_graph"], cycle_core)
+        if monitor is not None:
+            monitor.update(nodes=len(cycle_core))
+        if scc_processes is not None:
+            strongly_connected_components = \
+                get_strongly_connected_components(cycle_core, scc_processes)
+        elif monitor is None:
+            strongly_connected_components = tarjan(cycle_core)
+        else:
+            # The components are yielded one by one, so the monitor is
+            # updated between them
+            strongly_connected_components = []
+            for component in tarjan_iter(cycle_core):
+                strongly_connected_components.append(component)
+                monitor.update(components=len(strongly_connected_components))
+        if monitor is not None:
+            monitor.update(components=len(strongly_connected_components))
+        state["phase_start"] = record_phase(statistics, "scc", phase_start)
+        record_components(statistics, strongly_connected_components)
+        state["scc"] = strongly_connected_components
+        print("Strongly Connected Components: ")
+        print(strongly_connected_components)
 
-    model_checking_scc_subgraphs = get_model_checking_scc_subgraphs(
-        strongly_connected_components, tcc_structure, model_checking_atoms,
-        model_checking_graph)
-    print("Model Checking SCC Subgraphs:", len(model_checking_scc_subgraphs))
-    print(model_checking_scc_subgraphs)
+    def run_scc_checks():
+        formula = state["formula"]
+        model_checking_atoms = state["model_checking_atoms"]
+        model_checking_graph = state["model_checking_graph"]
 
-    # Self-Fulfilling SCC and Initial Nodes
-    initial_nodes = get_initial_nodes(tcc_structure, model_checking_atoms)
-    for scc_n, scc_graph in enumerate(model_checking_scc_subgraphs):
-        self_fulfilling_scc = is_self_fulfilling(scc_graph, initial_nodes,
-                                                 model_checking_atoms)
-        entail_formula = initial_nodes_entail_formula(scc_graph, initial_nodes,
-                                                      model_checking_atoms,
-                                                      formula)
+        model_checking_scc_subgraphs = get_model_checking_scc_subgraphs(
+            state["scc"], tcc_structure, model_checking_atoms,
+            model_checking_graph)
+        print("Model Checking SCC Subgraphs:",
+              len(model_checking_scc_subgraphs))
+        print(model_checking_scc_subgraphs)
 
-        print("SCC Graph", scc_n, ":")
-        print("is Self Fulfilling: ", self_fulfilling_scc)
-        print("Initial Nodes Entail Formula: ", entail_formula)
+        # Self-Fulfilling SCC and Initial Nodes
+        initial_nodes = get_initial_nodes(tcc_structure, model_checking_atoms)
+        scc_graph = find_self_fulfilling_scc(model_checking_scc_subgraphs,
+                                             initial_nodes,
+                                             model_checking_atoms, formula)
+        record_phase(statistics, "scc_checks", state["phase_start"])
 
-        if self_fulfilling_scc and entail_formula:
-            return True
+        if scc_graph is not None and witness is not None:
+            witness.update(get_lasso_witness(scc_graph, initial_nodes,
+                                             model_checking_graph,
+                                             model_checking_atoms, formula))
 
-    return False
+        record_calls(statistics, state["counters"])
+        if statistics is not None:
+            statistics["time"] = get_time() - state["start"]
+        return scc_graph is not None
 
+    phases = []
+    if normalize:
+        phases.append(("normalization", run_normalization))
+    phases.extend([("closure", run_closure),
+                   ("all_atoms", run_all_atoms),
+                   ("model_checking_atoms", run_model_checking_atoms),
+                   ("model_checking_graph", run_model_checking_graph),
+                   ("scc", run_scc),
+                   ("scc_checks", run_scc_checks)])
+    return [(name, get_phase(name, run)) for name, run in phases]
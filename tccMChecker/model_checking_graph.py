@@ -4,8 +4,34 @@ graph."""
 from __future__ import print_function
 
 import copy
+import threading
+from collections import deque
 
-from formula import Formula
+from domains import get_atom_mask
+from formula import Formula, get_formula_key
+
+
+class CallCounters(threading.local):
+    """
+    This class represents the number of calls of the functions in the hot
+    path of the algorithm. The counters are kept per thread, so the checks
+    that run at the same time in other threads are not counted.
+
+    """
+
+    def __init__(self):
+        """
+        Constructor method.
+
+        """
+        self.is_consistent = 0
+        self.is_in_atom = 0
+
+
+call_counters = CallCounters()
+
+# Number of atoms between two updates of the monitor in get_all_atoms
+MONITOR_INTERVAL = 1024
 
 
 def get_basic_formulas(closure):
@@ -114,13 +140,20 @@ def search_formulas(formulas, connective):
     return result
 
 
-def get_all_atoms(closure):
+def get_all_atoms(closure, monitor=None):
     """
     Returns all possible atoms of the closure.
 
     :param closure: Closure of a formula.
     :type closure: List of :py:class:`~formula.Formula`
 
+    :param monitor: Monitor that is updated with the number of formulas of
+        the closure added to the atoms (``formulas``) and of atoms that have
+        the current formula (``atoms``) after each formula and every
+        ``MONITOR_INTERVAL`` atoms (see
+        :py:class:`check_monitor.CheckMonitor`).
+    :type monitor: :py:class:`~check_monitor.CheckMonitor`
+
     :returns: List of all atoms of the closure.
     :rtype: List of lists of :py:class:`~formula.Formula`.
 
@@ -182,6 +215,14 @@ def get_all_atoms(closure):
             else:
                 atoms[index].append(basic_formulas[index_basic_formula])
             index_negative += 1
+            if monitor is not None and not (index + 1) % MONITOR_INTERVAL:
+                monitor.update(formulas=index_basic_formula, atoms=index + 1)
+        if monitor is not None:
+            monitor.update(formulas=index_basic_formula + 1, atoms=num_atoms)
+
+    # Masks of the propositions of the atoms, extended with each formula
+    bits = Formula.get_proposition_domains()["bits"]
+    masks = [get_atom_mask(atom, bits) for atom in atoms]
 
     # o~phi
     f_temps = search_formulas(basic_formulas, "o")
@@ -190,12 +231,18 @@ def get_all_atoms(closure):
             if formula not in atom:
                 atom.append(Formula({"o": {"~": formula.get_values()}}))
 
-    for formula in no_basic_formulas:
-        for atom in atoms:
-            if is_consistent(formula, atom):
+    for number, formula in enumerate(no_basic_formulas,
+                                     len(basic_formulas)):
+        for index, atom in enumerate(atoms):
+            if is_consistent(formula, atom, masks[index]):
                 atom.append(formula)
             else:
                 atom.append(formula.get_negation())
+            masks[index] |= get_atom_mask(atom[-1:], bits)
+            if monitor is not None and not (index + 1) % MONITOR_INTERVAL:
+                monitor.update(formulas=number, atoms=index + 1)
+        if monitor is not None:
+            monitor.update(formulas=number + 1, atoms=num_atoms)
 
     return atoms
 
@@ -229,6 +276,7 @@ def is_in_atom(formula, atom):
         :py:func:`closure.getClosure`, :py:class:`formula.Formula`,
         :py:func:`.getAllAtoms`
     """
+    call_counters.is_in_atom += 1
     for formulaAtom in atom:
         if formulaAtom.get_formula() == formula:
             return True
@@ -243,7 +291,7 @@ def clean_connector(formula):
     return Formula(formula_temp)
 
 
-def is_consistent(formula, atom):
+def is_consistent(formula, atom, atom_mask=None):
     """
     Checks if a formula is consistent with the set of formulas in an atom.
 
@@ -254,6 +302,10 @@ def is_consistent(formula, atom):
         closure.
     :type atom: List of :py:class:`~formula.Formula`.
 
+    :param atom_mask: Mask of the propositions of the atom (see
+        :py:func:`.proposition_consistent`).
+    :type atom_mask: Integer
+
     :returns: ``True`` if the formula is consistent with the set of formulas
         in the atom or ``False`` otherwise.
     :rtype: Boolean
@@ -278,36 +330,39 @@ def is_consistent(formula, atom):
         This function is based on the conditions shown in the definition 6.1
         of the thesis document.
     """
+    call_counters.is_consistent += 1
     formula = clean_connector(formula)
     print("verifying: ", formula.get_formula())
 
     if not is_in_atom(formula.get_negation().get_formula(), atom):
         if formula.get_connective() == "<>":  # <> rules
             if is_in_atom({"o": formula.get_formula()}, atom) or \
-                    is_consistent(Formula(formula.get_values()), atom):
+                    is_consistent(Formula(formula.get_values()), atom,
+                                  atom_mask):
                 return True
 
         elif formula.get_connective() == "[]":  # [] rules
             if is_in_atom({"o": formula.get_formula()}, atom) and \
-                    is_consistent(Formula(formula.get_values()), atom):
+                    is_consistent(Formula(formula.get_values()), atom,
+                                  atom_mask):
                 return True
 
         elif formula.get_connective() == "^":  # ^ rules
             subformulas = formula.get_subformulas()
-            if is_consistent(subformulas[0], atom) and \
-                    is_consistent(subformulas[1], atom):
+            if is_consistent(subformulas[0], atom, atom_mask) and \
+                    is_consistent(subformulas[1], atom, atom_mask):
                 return True
 
         elif formula.get_connective() == "v":  # v rules
             subformulas = formula.get_subformulas()
-            if is_consistent(subformulas[0], atom) or \
-                    is_consistent(subformulas[1], atom):
+            if is_consistent(subformulas[0], atom, atom_mask) or \
+                    is_consistent(subformulas[1], atom, atom_mask):
                 return True
 
         elif formula.is_proposition() or formula.get_connective() == "o" or \
                 formula.is_negative_next():
             if formula.is_proposition() and formula.get_connective() == "":
-                if proposition_consistent(formula, atom):
+                if proposition_consistent(formula, atom, atom_mask):
                     return True
 
             elif formula.is_proposition() and formula.get_connective() == "~":
@@ -366,7 +421,7 @@ def delete_atoms(atoms, index_list):
     return result[len(index_list):]
 
 
-def proposition_consistent(formula, atom):
+def proposition_consistent(formula, atom, atom_mask=None):
     """
     Checks if a proposition is consistent with the formulas of an atom.
 
@@ -376,6 +431,11 @@ def proposition_consistent(formula, atom):
     :param atom: Atom
     :type atom: List of :py:class:`~formula.Formula`
 
+    :param atom_mask: Mask of the propositions of the atom (see
+        :py:func:`domains.get_atom_mask`), kept up to date by the caller as
+        the atom is built. If it is not given, it is computed from the atom.
+    :type atom_mask: Integer
+
     :returns: ``True`` if the proposition is consistent with the atom or
         ``False`` otherwise.
     :rtype: Boolean.
@@ -405,16 +465,21 @@ def proposition_consistent(formula, atom):
     .. seealso::
         :py:func:`closure.getClosure`, :py:class:`formula.Formula`,
         :py:func:`.getAllAtoms`
-        
+
+    .. note::
+        The proposition is consistent if the mask of the propositions of the
+        atom has none of the bits of the exclusion mask of the proposition
+        (see :py:func:`domains.compile_domains`).
+
     """
     print("it is a proposition")
-    if formula.is_proposition() and (
-                formula.get_values() in formula.get_proposition_rules().keys()):
-        no_consistent_propositions = formula.get_consistent_propositions()
-        for no_consistent_proposition in no_consistent_propositions:
-            if is_in_atom(no_consistent_proposition, atom):
-                print("by", no_consistent_proposition)
-                return False
+    domains = Formula.get_proposition_domains()
+    if formula.is_proposition() and formula.get_values() in domains["masks"]:
+        if atom_mask is None:
+            atom_mask = get_atom_mask(atom, domains["bits"])
+        if atom_mask & domains["masks"][formula.get_values()]:
+            print("by the propositions excluded by", formula.get_values())
+            return False
         print("There are no inconsistencies, then it is consistent")
         return True
     return False
@@ -477,7 +542,116 @@ def get_total_nodes(graph):
     return total
 
 
-def get_model_checking_atoms(tcc_structure, atoms):
+def get_closure_propositions(closure):
+    """
+    Returns the propositions that appear in the formulas of a closure.
+
+    :param closure: Closure of a formula.
+    :type closure: List of :py:class:`~formula.Formula`
+
+    :returns: Set of propositions.
+    :rtype: Set of Strings
+
+    :Example:
+
+    >>> from tccMChecker.closure import *
+    >>> from tccMChecker.model_checking_graph import *
+    >>> phi = Formula({"<>": {"^":{"":"in=true","~":{"o":"x=2"}}}})
+    >>> closure = []
+    >>> get_closure(phi,closure)
+    >>> sorted(get_closure_propositions(closure))
+    ['in=true', 'x=2']
+
+    """
+    propositions = set()
+    for formula in closure:
+        value = list(formula.get_formula().values())[0]
+        if not isinstance(value, dict):
+            propositions.add(value)
+    return propositions
+
+
+def get_relevant_store(store, propositions):
+    """
+    Returns the formulas of the store of a tcc node that are relevant to a
+    closure (cone of influence).
+
+    A literal of the store is relevant if its proposition is in the closure,
+    or if it is a positive literal of another value of the same variable
+    (see :py:func:`domains.compile_domains`). The consistency check of any
+    other literal always succeeds and it does not change the consistency of
+    the formulas of the closure, provided that the literals of the store are
+    consistent among themselves. The formulas that are not literals are
+    always relevant, and so are the literals of their propositions.
+
+    :param store: Propositions (as formulas) in the store of the tcc node.
+    :type store: List of :py:class:`~formula.Formula`
+
+    :param propositions: Propositions of the closure (see
+        :py:func:`.get_closure_propositions`).
+    :type propositions: Set of Strings
+
+    :returns: The relevant formulas of the store, or ``None`` if the literals
+        of the store are not consistent or some of them is not in the domains
+        (in that case the whole store must be checked).
+    :rtype: List of :py:class:`~formula.Formula`
+
+    :Example:
+
+    >>> from tccMChecker.model_checking_graph import *
+    >>> store = [Formula({"": "da=5"}), Formula({"~": "da=10"}), Formula({"": "tc"})]
+    >>> for formula in get_relevant_store(store, set(["da=0"])):
+    ...     print(formula.get_formula())
+    ...
+    {'': 'da=5'}
+
+    """
+    def add_propositions(data):
+        for value in data.values():
+            if isinstance(value, dict):
+                add_propositions(value)
+            else:
+                propositions.add(value)
+
+    propositions = set(propositions)
+    literals = []
+    for formula in store:
+        connective, value = list(formula.get_formula().items())[0]
+        if connective in ("", "~") and not isinstance(value, dict):
+            literals.append((connective, value))
+        else:
+            add_propositions(formula.get_formula())
+
+    domains = Formula.get_proposition_domains()
+    excluding = set()
+    for proposition in propositions:
+        for rule in domains["rules"].get(proposition, []):
+            excluding.update(value for key, value in rule.items() if key == "")
+
+    positives = []
+    mask = 0
+    for connective, value in literals:
+        if value not in domains["bits"]:
+            return None
+        if connective == "":
+            positives.append(value)
+        mask |= 1 << (2 * domains["bits"][value] + int(connective == "~"))
+
+    for value in positives:
+        if mask & domains["masks"][value]:
+            return None
+
+    relevant_store = []
+    for formula in store:
+        connective, value = list(formula.get_formula().items())[0]
+        if (connective, value) not in literals or value in propositions or \
+                (connective == "" and value in excluding):
+            relevant_store.append(formula)
+    return relevant_store
+
+
+def get_model_checking_atoms(tcc_structure, atoms, closure=None,
+                             monitor=None):
     """
     Returns the atoms corresponding to the states of a tcc structure.
 
@@ -487,10 +661,26 @@ def get_model_checking_atoms(tcc_structure, atoms):
     :param atoms: List of all possible atoms of closure.
     :type atoms: List of atoms
 
+    :param closure: Closure of the formula. If it is given, only the formulas
+        of the stores that are relevant to the closure are checked (see
+        :py:func:`.get_relevant_store`), and the other ones are not added to
+        the atoms.
+    :type closure: List of :py:class:`~formula.Formula`
+
+    :param monitor: Monitor that is updated with the number of tcc nodes
+        processed (``tcc_nodes``) and of atoms kept (``atoms``) after each
+        tcc node (see :py:class:`check_monitor.CheckMonitor`).
+    :type monitor: :py:class:`~check_monitor.CheckMonitor`
+
     :returns: Dictionary that have the states of a tcc structure as keys, and a
         list of consistent atoms as values.
     :rtype: Dictionary
 
+    .. note::
+        The atoms are computed once for each distinct store (see
+        :py:func:`.get_store_key`). The tcc nodes with the same store get
+        their own numbers, starting from their offset, for the same atoms.
+
     :Example:
 
     >>> from tccMChecker.model_checking_graph import *
@@ -526,53 +716,118 @@ def get_model_checking_atoms(tcc_structure, atoms):
         :py:func:`closure.getClosure`, :py:class:`formula.Formula`,
         :py:func:`.getAllAtoms`
     """
+    propositions = None
+    if closure is not None:
+        propositions = get_closure_propositions(closure)
+
+    store_atoms = {}
     model_checking_atoms = {}
+    offset = 1
     for tcc_node in tcc_structure.keys():
         print("looking for proposition of the state {} of {}".format(
             tcc_node, tcc_structure.keys()))
-        atoms_node = copy.deepcopy(atoms)
-        propositions = tcc_structure.get(tcc_node).get("store")
+        store = tcc_structure.get(tcc_node).get("store")
+        if propositions is not None:
+            relevant_store = get_relevant_store(store, propositions)
+            if relevant_store is not None:
+                store = relevant_store
+
+        store_key = get_store_key(store)
+        if store_key not in store_atoms:
+            store_atoms[store_key] = get_node_atoms(store, atoms)
+        atoms_node = store_atoms[store_key]
+        model_checking_atoms[tcc_node] = list2dict(atoms_node, offset)
+        offset += len(atoms_node)
+        if monitor is not None:
+            monitor.update(tcc_nodes=len(model_checking_atoms),
+                           atoms=offset - 1)
 
-        for proposition in propositions:  # Propositions as formulas
-            index_atom = 0
-            l_delete_atoms = []
+    return model_checking_atoms
 
-            while index_atom < len(atoms_node):
-                atom = atoms_node[index_atom]
 
-                print("-------------------------------------------------------")
-                print("evaluating proposition: ", proposition.get_formula())
-                for f in atom:
-                    print(f.get_formula())
+def get_store_key(store):
+    """
+    Returns a hashable key of the store of a tcc node. Two stores with the
+    same formulas in the same order have the same key, and so the same atoms
+    (see :py:func:`.get_node_atoms`).
 
-                if is_consistent(proposition, atom):
-                    print("it is consistent")
+    :param store: Propositions (as formulas) in the store of the tcc node.
+    :type store: List of :py:class:`~formula.Formula`
+
+    :returns: Key of the store.
+    :rtype: Tuple
+
+    :Example:
 
-                    if proposition.get_connective() == "^":
-                        subformulas = proposition.get_subformulas()
+    >>> from tccMChecker.model_checking_graph import *
+    >>> get_store_key([Formula({"": "x=2"}), Formula({"~": "in=true"})])
+    ((('', 'x=2'),), (('~', 'in=true'),))
 
-                        if not is_in_atom(subformulas[0].get_formula(), atom):
-                            atoms_node[index_atom].append(
-                                clean_connector(subformulas[0]))
+    """
+    return tuple(get_formula_key(formula.get_formula()) for formula in store)
 
-                        if not is_in_atom(subformulas[1].get_formula(), atom):
-                            atoms_node[index_atom].append(
-                                clean_connector(subformulas[1]))
 
-                    if not is_in_atom(proposition.get_formula(), atom):
-                        atoms_node[index_atom].append(proposition)
-                else:
-                    print("it is not consistent")
-                    l_delete_atoms.append(index_atom)
+def get_node_atoms(store, atoms):
+    """
+    Returns the atoms that are consistent with the store of a tcc node.
 
-                index_atom += 1
+    :param store: Propositions (as formulas) in the store of the tcc node.
+    :type store: List of :py:class:`~formula.Formula`
 
-            atoms_node = delete_atoms(atoms_node, l_delete_atoms)
+    :param atoms: List of all possible atoms of closure.
+    :type atoms: List of atoms
 
-        model_checking_atoms[tcc_node] = list2dict(
-            atoms_node, get_total_nodes(model_checking_atoms) + 1)
+    :returns: A copy of the atoms that are consistent with every formula of
+        the store. The formulas of the store are added to the atoms.
+    :rtype: List of atoms
 
-    return model_checking_atoms
+    .. seealso::
+        :py:func:`.get_model_checking_atoms`
+    """
+    atoms_node = copy.deepcopy(atoms)
+    bits = Formula.get_proposition_domains()["bits"]
+    masks = [get_atom_mask(atom, bits) for atom in atoms_node]
+
+    for proposition in store:  # Propositions as formulas
+        index_atom = 0
+        l_delete_atoms = []
+
+        while index_atom < len(atoms_node):
+            atom = atoms_node[index_atom]
+
+            print("-------------------------------------------------------")
+            print("evaluating proposition: ", proposition.get_formula())
+            for f in atom:
+                print(f.get_formula())
+
+            if is_consistent(proposition, atom, masks[index_atom]):
+                print("it is consistent")
+                size = len(atom)
+
+                if proposition.get_connective() == "^":
+                    subformulas = proposition.get_subformulas()
+
+                    if not is_in_atom(subformulas[0].get_formula(), atom):
+                        atoms_node[index_atom].append(
+                            clean_connector(subformulas[0]))
+
+                    if not is_in_atom(subformulas[1].get_formula(), atom):
+                        atoms_node[index_atom].append(
+                            clean_connector(subformulas[1]))
+
+                if not is_in_atom(proposition.get_formula(), atom):
+                    atoms_node[index_atom].append(proposition)
+                masks[index_atom] |= get_atom_mask(atom[size:], bits)
+            else:
+                print("it is not consistent")
+                l_delete_atoms.append(index_atom)
+
+            index_atom += 1
+
+        atoms_node = delete_atoms(atoms_node, l_delete_atoms)
+        masks = delete_atoms(masks, l_delete_atoms)
+
+    return atoms_node
 
 
 def is_next_state(next_formulas, next_atom):
@@ -619,7 +874,8 @@ def is_next_state(next_formulas, next_atom):
     return True
 
 
-def get_model_checking__graph(tcc_structure, model_checking_atoms):
+def get_model_checking__graph(tcc_structure, model_checking_atoms,
+                              monitor=None):
     """
     Returns the model checking graph
 
@@ -629,7 +885,15 @@ def get_model_checking__graph(tcc_structure, model_checking_atoms):
     :param model_checking_atoms: Atoms of a tcc structure.
     :type model_checking_atoms: Dictionary
 
-    :returns: Structure representing the model checking graph.
+    :param monitor: Monitor that is updated with the number of tcc nodes
+        processed (``tcc_nodes``), of nodes of the graph (``nodes``) and of
+        edges built (``edges``) after each tcc node (see
+        :py:class:`check_monitor.CheckMonitor`).
+    :type monitor: :py:class:`~check_monitor.CheckMonitor`
+
+    :returns: Structure representing the model checking graph. The atoms of
+        a tcc node with the same formulas with next operator share the same
+        list of successors, which must not be modified in place.
     :rtype: Dictionary
 
     :Example:
@@ -663,19 +927,113 @@ def get_model_checking__graph(tcc_structure, model_checking_atoms):
         :py:func:`.getAllAtoms`
     """
     model_checking_graph = {}
-    for tcc_node in tcc_structure.keys():
+    total_edges = 0
+    for number, tcc_node in enumerate(tcc_structure.keys()):
         atoms_tcc_node = model_checking_atoms.get(tcc_node)
+        edges = tcc_structure[tcc_node].get("edges")
 
+        # the successors only depend on the formulas with next operator
+        successors = {}
         for index_n1 in atoms_tcc_node.keys():
-            atom_n1 = atoms_tcc_node.get(index_n1)
-            next_formulas = search_formulas(atom_n1, "o")
-            next_nodes = []
-
-            for next_tcc_node in tcc_structure[tcc_node].get("edges"):
-                atoms_next_tcc_node = model_checking_atoms.get(next_tcc_node)
-                for index_n2 in atoms_next_tcc_node.keys():
-                    atom_n2 = atoms_next_tcc_node.get(index_n2)
-                    if is_next_state(next_formulas, atom_n2):
-                        next_nodes.append(index_n2)
-            model_checking_graph[index_n1] = next_nodes
+            atom = atoms_tcc_node.get(index_n1)
+            next_key = frozenset(get_formula_key(formula.get_formula())
+                                 for formula in search_formulas(atom, "o"))
+            if next_key not in successors:
+                successors[next_key] = get_atom_successors(
+                    atom, edges, model_checking_atoms)
+            model_checking_graph[index_n1] = successors[next_key]
+            total_edges += len(model_checking_graph[index_n1])
+
+        if monitor is not None:
+            monitor.update(tcc_nodes=number + 1,
+                           nodes=len(model_checking_graph), edges=total_edges)
     return model_checking_graph
+
+
+def get_atom_successors(atom, next_tcc_nodes, model_checking_atoms):
+    """
+    Returns the model checking nodes that can follow an atom.
+
+    :param atom: Atom of a tcc node.
+    :type atom: List of :py:class:`~formula.Formula`
+
+    :param next_tcc_nodes: Successors of the tcc node of the atom.
+    :type next_tcc_nodes: List
+
+    :param model_checking_atoms: Atoms of a tcc structure.
+    :type model_checking_atoms: Dictionary
+
+    :returns: The numbers of the atoms of the successor tcc nodes that satisfy
+        the formulas with next operator of the atom.
+    :rtype: List of Integers
+
+    .. seealso::
+        :py:func:`.is_next_state`, :py:func:`.get_model_checking__graph`
+    """
+    next_formulas = search_formulas(atom, "o")
+    next_nodes = []
+
+    for next_tcc_node in next_tcc_nodes:
+        atoms_next_tcc_node = model_checking_atoms.get(next_tcc_node)
+        for index_n2 in atoms_next_tcc_node.keys():
+            atom_n2 = atoms_next_tcc_node.get(index_n2)
+            if is_next_state(next_formulas, atom_n2):
+                next_nodes.append(index_n2)
+    return next_nodes
+
+
+def get_cycle_core(model_checking_graph):
+    """
+    Returns the subgraph of a model checking graph whose nodes can lie on a
+    cycle of more than one node. The nodes without predecessors or without
+    successors (other than themselves) are removed one after the other,
+    since they are not in a non-trivial strongly connected component.
+
+    :param model_checking_graph: Model checking graph.
+    :type model_checking_graph: Dictionary
+
+    :returns: The remaining nodes and their successors among them.
+    :rtype: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.model_checking_graph import *
+    >>> get_cycle_core({1: [2], 2: [3, 4], 3: [2], 4: [4, 5], 5: []})
+    {2: [3], 3: [2]}
+
+    .. seealso::
+        :py:func:`parallel_scc.trim`
+    """
+    predecessors = dict((node, []) for node in model_checking_graph)
+    in_degrees = dict((node, 0) for node in model_checking_graph)
+    out_degrees = {}
+    for node, next_nodes in model_checking_graph.items():
+        out_degrees[node] = 0
+        for next_node in set(next_nodes):
+            if next_node != node:
+                predecessors[next_node].append(node)
+                in_degrees[next_node] += 1
+                out_degrees[node] += 1
+
+    removed = set(node for node in model_checking_graph
+                  if not in_degrees[node] or not out_degrees[node])
+    queue = deque(removed)
+    while queue:
+        node = queue.popleft()
+        for next_node in set(model_checking_graph[node]):
+            if next_node != node and next_node not in removed:
+                in_degrees[next_node] -= 1
+                if not in_degrees[next_node]:
+                    removed.add(next_node)
+                    queue.append(next_node)
+        for previous_node in predecessors[node]:
+            if previous_node not in removed:
+                out_degrees[previous_node] -= 1
+                if not out_degrees[previous_node]:
+                    removed.add(previous_node)
+                    queue.append(previous_node)
+
+    return dict((node, [next_node for next_node in next_nodes
+                        if next_node not in removed])
+                for node, next_nodes in model_checking_graph.items()
+                if node not in removed)
@@ -0,0 +1,210 @@
+"""This module contains a rewriting pass that normalizes and simplifies a
+temporal formula before its closure is generated. Each basic formula removed
+from the closure halves the number of atoms."""
+
+from __future__ import print_function
+
+from tccMChecker.closure import get_closure
+from tccMChecker.formula import Formula
+from tccMChecker.formula_parser import data_to_tree, tree_to_data, format_tree
+from tccMChecker.model_checking_graph import get_basic_formulas
+
+# Dual of each connective under negation
+_duals = {"^": "v", "v": "^", "<>": "[]", "[]": "<>"}
+
+
+def push_negations(tree, through_next=False):
+    r"""
+    Converts a syntax tree into negation normal form, i.e. the negations are
+    only applied to propositions (and to formulas with :math:`\circ` as main
+    connective).
+
+    :param tree: Syntax tree (see :py:func:`formula_parser.tree_to_data`).
+    :type tree: Tuple
+
+    :param through_next: If ``True``, :math:`\neg\circ\phi` is rewritten as
+        :math:`\circ\neg\phi`. By default it is kept, because the algorithm
+        treats :math:`\neg\circ\phi` as the negation of a basic formula.
+    :type through_next: Boolean
+
+    :returns: Syntax tree in negation normal form.
+    :rtype: Tuple
+
+    :Example:
+
+    >>> from tccMChecker.normalization import *
+    >>> push_negations(("~", ("[]", ("^", ("", "a"), ("~", ("", "b"))))))
+    ('<>', ('v', ('~', ('', 'a')), ('', 'b')))
+
+    """
+    connective = tree[0]
+    if connective == "":
+        return tree
+
+    if connective != "~":
+        return (connective,) + tuple(
+            push_negations(subtree, through_next) for subtree in tree[1:])
+
+    subtree = tree[1]
+    if subtree[0] == "":  # ~p
+        return tree
+    if subtree[0] == "~":  # ~~phi
+        return push_negations(subtree[1], through_next)
+    if subtree[0] == "o":  # ~o phi
+        if through_next:
+            return "o", push_negations(("~", subtree[1]), through_next)
+        return "~", push_negations(subtree, through_next)
+    return (_duals[subtree[0]],) + tuple(
+        push_negations(("~", operand), through_next)
+        for operand in subtree[1:])
+
+
+def get_operands(tree, connective):
+    r"""
+    Returns the operands of a chain of the same binary connective, e.g. the
+    operands of :math:`(a \wedge b) \wedge c` are :math:`a`, :math:`b` and
+    :math:`c`.
+
+    :param tree: Syntax tree.
+    :type tree: Tuple
+
+    :param connective: ``^`` or ``v``.
+    :type connective: String
+
+    :returns: List of syntax trees.
+    :rtype: List of Tuples
+
+    """
+    if tree[0] != connective:
+        return [tree]
+    return get_operands(tree[1], connective) + get_operands(tree[2], connective)
+
+
+def simplify_tree(tree):
+    r"""
+    Simplifies a syntax tree bottom-up:
+
+    * :math:`\diamondsuit\diamondsuit\phi` is rewritten as
+      :math:`\diamondsuit\phi` and :math:`\square\square\phi` as
+      :math:`\square\phi`.
+    * Repeated operands of a chain of :math:`\wedge` (or :math:`\vee`) are
+      removed, and the remaining operands are sorted by their text.
+
+    :param tree: Syntax tree.
+    :type tree: Tuple
+
+    :returns: Simplified syntax tree.
+    :rtype: Tuple
+
+    :Example:
+
+    >>> from tccMChecker.normalization import *
+    >>> simplify_tree(("<>", ("<>", ("^", ("", "b"), ("^", ("", "a"), ("", "b"))))))
+    ('<>', ('^', ('', 'a'), ('', 'b')))
+
+    """
+    connective = tree[0]
+    if connective == "":
+        return tree
+
+    if len(tree) == 2:
+        subtree = simplify_tree(tree[1])
+        if connective in ("<>", "[]") and subtree[0] == connective:
+            return subtree
+        return connective, subtree
+
+    operands = {}
+    for operand in get_operands(tree, connective):
+        operand = simplify_tree(operand)
+        for sub_operand in get_operands(operand, connective):
+            operands[format_tree(sub_operand)] = sub_operand
+
+    keys = sorted(operands.keys())
+    result = operands[keys[0]]
+    for key in keys[1:]:
+        result = (connective, result, operands[key])
+    return result
+
+
+def normalize_tree(tree):
+    """
+    Converts a syntax tree into negation normal form and simplifies it.
+
+    :param tree: Syntax tree.
+    :type tree: Tuple
+
+    :returns: Normalized syntax tree.
+    :rtype: Tuple
+
+    .. seealso::
+        :py:func:`.push_negations`, :py:func:`.simplify_tree`
+
+    """
+    return simplify_tree(push_negations(tree))
+
+
+def get_number_basic_formulas(formula):
+    """
+    Returns the number of basic formulas of the closure of a formula.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :returns: Number of basic formulas.
+    :rtype: Integer
+
+    """
+    closure = []
+    get_closure(formula, closure)
+    return len(get_basic_formulas(closure))
+
+
+def normalize_formula(formula, report=None):
+    r"""
+    Normalizes a formula before its closure is generated: negation normal
+    form, double negations, :math:`\diamondsuit\diamondsuit\phi \to
+    \diamondsuit\phi`, :math:`\square\square\phi \to \square\phi`, repeated
+    operands of :math:`\wedge` and :math:`\vee` and canonical order of the
+    operands.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param report: Empty dictionary to store the number of basic formulas of
+        the closure before (``basic_formulas_before``) and after
+        (``basic_formulas_after``) the normalization, and the number of basic
+        formulas removed (``removed_basic_formulas``).
+    :type report: Dictionary
+
+    :returns: The normalized formula.
+    :rtype: :py:class:`~formula.Formula`
+
+    :Example:
+
+    >>> from tccMChecker.normalization import *
+    >>> phi = Formula({"~": {"[]": {"~": {"^": {"": "tt", " ": "tt"}}}}})
+    >>> report = {}
+    >>> normalize_formula(phi, report).get_formula()
+    {'<>': 'tt'}
+    >>> report["removed_basic_formulas"]
+    1
+
+    The operands of :math:`\wedge` and :math:`\vee` with the same main
+    connective are kept (see :py:func:`formula_parser.binary_formula`):
+
+    >>> phi = Formula({"~": {"^": {"<>": "dd", "~": {"[]": "tt"}}}})
+    >>> normalize_formula(phi, report).get_formula()
+    {'v': {'[]': 'tt', ' []': {'~': 'dd'}}}
+    >>> report["removed_basic_formulas"]
+    0
+
+    """
+    normalized = Formula(tree_to_data(normalize_tree(
+        data_to_tree(formula.get_formula()))))
+
+    if report is not None:
+        report["basic_formulas_before"] = get_number_basic_formulas(formula)
+        report["basic_formulas_after"] = get_number_basic_formulas(normalized)
+        report["removed_basic_formulas"] = report["basic_formulas_before"] - \
+            report["basic_formulas_after"]
+    return normalized
@@ -0,0 +1,264 @@
+"""This module contains a parallel decomposition of a graph into strongly
+connected components (SCCs), based on the forward-backward algorithm with
+trimming [FHP00]_ [MLHP05]_. The subproblems are solved by a pool of processes
+that share the adjacency lists of the graph."""
+
+from __future__ import print_function
+
+import multiprocessing
+from collections import deque
+
+from tarjan import tarjan
+
+# Subproblems with at most this number of nodes are solved with Tarjan's
+# algorithm
+MIN_SUBPROBLEM_SIZE = 1000
+
+# Adjacency lists shared with the worker processes
+_shared_graph = {}
+
+
+def get_compact_graph(graph):
+    """
+    Returns the compact representation of a graph: its nodes are numbered
+    from ``0``, and the successors and the predecessors of the nodes are
+    stored in two arrays each (compressed sparse rows).
+
+    :param graph: Graph.
+    :type graph: Dictionary
+
+    :returns: A tuple with the list of the nodes (the node of each number),
+        and the offsets and the targets of the successors and of the
+        predecessors. The successors of the node ``i`` are
+        ``targets[offsets[i]:offsets[i + 1]]``.
+    :rtype: Tuple
+
+    :Example:
+
+    >>> from tccMChecker.parallel_scc import *
+    >>> nodes, offsets, targets, _, _ = get_compact_graph({3: [5], 5: [3, 5]})
+    >>> nodes, offsets, targets
+    ([3, 5], [0, 1, 3], [1, 0, 1])
+
+    """
+    nodes = set(graph.keys())
+    for next_nodes in graph.values():
+        nodes.update(next_nodes)
+    nodes = sorted(nodes)
+    numbers = dict((node, number) for number, node in enumerate(nodes))
+
+    predecessors = [[] for _ in nodes]
+    offsets = [0]
+    targets = []
+    for number, node in enumerate(nodes):
+        for next_node in graph.get(node, []):
+            targets.append(numbers[next_node])
+            predecessors[numbers[next_node]].append(number)
+        offsets.append(len(targets))
+
+    backward_offsets = [0]
+    backward_targets = []
+    for sources in predecessors:
+        backward_targets.extend(sources)
+        backward_offsets.append(len(backward_targets))
+    return nodes, offsets, targets, backward_offsets, backward_targets
+
+
+def init_worker(offsets, targets, backward_offsets, backward_targets):
+    """
+    Initializes a worker process with the shared arrays of the compact graph
+    (see :py:func:`.get_compact_graph`).
+
+    """
+    _shared_graph["forward"] = (offsets, targets)
+    _shared_graph["backward"] = (backward_offsets, backward_targets)
+
+
+def get_neighbours(node, direction):
+    """
+    Returns the successors (``forward``) or the predecessors (``backward``)
+    of a node of the shared compact graph.
+
+    :param node: Number of the node.
+    :type node: Integer
+
+    :param direction: ``forward`` or ``backward``.
+    :type direction: String
+
+    :returns: Numbers of the neighbours.
+    :rtype: List of Integers
+
+    """
+    offsets, targets = _shared_graph[direction]
+    return targets[offsets[node]:offsets[node + 1]]
+
+
+def trim(members):
+    """
+    Removes, one after the other, the nodes without predecessors or without
+    successors (other than themselves) in a subproblem. Each removed node is
+    a SCC.
+
+    :param members: Numbers of the nodes of the subproblem. The removed nodes
+        are deleted from the set.
+    :type members: Set of Integers
+
+    :returns: The removed nodes.
+    :rtype: List of Integers
+
+    """
+    degrees = {}
+    for direction in ("forward", "backward"):
+        degrees[direction] = dict(
+            (node, sum(1 for neighbour in get_neighbours(node, direction)
+                       if neighbour != node and neighbour in members))
+            for node in members)
+
+    queue = deque(node for node in members
+                  if not degrees["forward"][node] or
+                  not degrees["backward"][node])
+    removed = []
+    for node in queue:
+        members.discard(node)
+    while queue:
+        node = queue.popleft()
+        removed.append(node)
+        for direction, opposite in (("forward", "backward"),
+                                    ("backward", "forward")):
+            for neighbour in get_neighbours(node, opposite):
+                if neighbour in members and neighbour != node:
+                    degrees[direction][neighbour] -= 1
+                    if not degrees[direction][neighbour]:
+                        members.discard(neighbour)
+                        queue.append(neighbour)
+    return removed
+
+
+def get_reachable(pivot, members, direction):
+    """
+    Returns the nodes of a subproblem that are reachable from a node.
+
+    :param pivot: Number of the node where the search starts.
+    :type pivot: Integer
+
+    :param members: Numbers of the nodes of the subproblem.
+    :type members: Set of Integers
+
+    :param direction: ``forward`` (successors) or ``backward``
+        (predecessors).
+    :type direction: String
+
+    :returns: The reachable nodes (including the pivot).
+    :rtype: Set of Integers
+
+    """
+    reachable = set([pivot])
+    queue = deque([pivot])
+    while queue:
+        for neighbour in get_neighbours(queue.popleft(), direction):
+            if neighbour in members and neighbour not in reachable:
+                reachable.add(neighbour)
+                queue.append(neighbour)
+    return reachable
+
+
+def decompose(subproblem, min_size=MIN_SUBPROBLEM_SIZE):
+    """
+    Runs one step of the forward-backward algorithm on a subproblem: the
+    trivial SCCs are trimmed, and the SCC of a pivot is the intersection of
+    the nodes reachable from the pivot and the nodes that reach the pivot.
+    The rest of the nodes are split into two independent subproblems: the
+    nodes reachable from the pivot outside its SCC, and the other nodes.
+    Small subproblems are solved with Tarjan's algorithm.
+
+    :param subproblem: Numbers of the nodes of the subproblem.
+    :type subproblem: List of Integers
+
+    :param min_size: Size of the subproblems solved with Tarjan's algorithm.
+    :type min_size: Integer
+
+    :returns: A tuple with the SCCs found and the new subproblems.
+    :rtype: Tuple
+
+    """
+    members = set(subproblem)
+    components = [[node] for node in trim(members)]
+    if not members:
+        return components, []
+
+    if len(members) <= min_size:
+        subgraph = dict((node, [neighbour for neighbour in
+                                get_neighbours(node, "forward")
+                                if neighbour in members])
+                        for node in members)
+        components.extend(tarjan(subgraph))
+        return components, []
+
+    pivot = min(members)
+    forward = get_reachable(pivot, members, "forward")
+    backward = get_reachable(pivot, forward, "backward")
+    components.append(sorted(backward))
+
+    subproblems = [sorted(forward - backward),
+                   sorted(members - forward)]
+    return components, [nodes for nodes in subproblems if nodes]
+
+
+def get_strongly_connected_components(graph, processes=None,
+                                      min_size=MIN_SUBPROBLEM_SIZE):
+    """
+    Returns the SCCs of a graph, computed by a pool of processes.
+
+    :param graph: Graph.
+    :type graph: Dictionary
+
+    :param processes: Number of processes (by default, the number of CPUs).
+    :type processes: Integer
+
+    :param min_size: Size of the subproblems solved with Tarjan's algorithm.
+        If the graph is not larger, it is solved in the current process.
+    :type min_size: Integer
+
+    :returns: The nodes of each SCC, as returned by ``tarjan``. The
+        components are sorted by their smallest node.
+    :rtype: List of Lists
+
+    :Example:
+
+    >>> from tccMChecker.parallel_scc import *
+    >>> graph = {1: [2], 2: [1, 3], 3: [4], 4: [3], 5: [5, 1]}
+    >>> get_strongly_connected_components(graph, processes=2, min_size=1)
+    [[1, 2], [3, 4], [5]]
+
+    .. note::
+        The set of components is the same as the one of ``tarjan``, but not
+        their order, which is only used by
+        :py:func:`searching_algorithm.find_self_fulfilling_scc` to choose a
+        witness.
+
+    """
+    if len(graph) <= min_size:
+        return sorted(sorted(component) for component in tarjan(graph))
+
+    nodes, offsets, targets, backward_offsets, backward_targets = \
+        get_compact_graph(graph)
+    shared = [multiprocessing.RawArray("l", array)
+              for array in (offsets, targets, backward_offsets,
+                            backward_targets)]
+
+    pool = multiprocessing.Pool(processes, init_worker, shared)
+    try:
+        components = []
+        pending = deque([pool.apply_async(decompose, (list(range(len(nodes))),
+                                                      min_size))])
+        while pending:
+            found, subproblems = pending.popleft().get()
+            components.extend(found)
+            for subproblem in subproblems:
+                pending.append(pool.apply_async(decompose,
+                                                (subproblem, min_size)))
+    finally:
+        pool.terminate()
+
+    return sorted(sorted(nodes[number] for number in component)
+                  for component in components)
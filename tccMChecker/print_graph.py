@@ -1,11 +1,260 @@
 """
-This module contains the function that draws a graph in a .pdf file.
+This module contains the functions that draw a graph in a .pdf file or write
+it in the DOT language.
 """
 
-import pydot
+from collections import deque
 
+from tarjan import tarjan
+
+_colors = ["red", "blue", "orange", "violet", "red", "salmon2",
+           "deepskyblue", "burlywood2", "greenyellow", "darkseagreen",
+           "thistle2", "dodgerblue1", "darkolivegreen3", "chocolate",
+           "turquoise3", "steelblue3", "navy", "coral", "blanchedalmond",
+           "darkorange1", "goldenrod3", "firebrick", "chartreuse4",
+           "crimson", "darkorange1", "darkolivegreen4"]
+
+
+def get_color(key):
+    """
+    Returns the color of a node.
+
+    :param key: Number of the node, or of its tcc node.
+    :type key: Integer
+
+    :returns: Name of a Graphviz color.
+    :rtype: String
+
+    """
+    return _colors[hash(key) % len(_colors)]
+
+
+def get_atom_tcc_nodes(model_checking_atoms):
+    """
+    Returns the tcc node of each node of a model checking graph.
+
+    :param model_checking_atoms: Atoms of each tcc node (see
+        :py:func:`model_checking_graph.get_model_checking_atoms`).
+    :type model_checking_atoms: Dictionary
+
+    :returns: Dictionary with the nodes of the model checking graph as keys
+        and their tcc nodes as values.
+    :rtype: Dictionary
+
+    """
+    tcc_nodes = {}
+    for tcc_node, atoms_node in model_checking_atoms.items():
+        for node in atoms_node.keys():
+            tcc_nodes[node] = tcc_node
+    return tcc_nodes
+
+
+def get_sampled_graph(graph, initial_nodes, max_nodes):
+    """
+    Returns the subgraph of the first nodes reached by a breadth-first search
+    from the initial nodes.
+
+    :param graph: Graph.
+    :type graph: Dictionary
+
+    :param initial_nodes: Nodes where the search starts. If it is empty, the
+        search starts from the smallest node.
+    :type initial_nodes: List
+
+    :param max_nodes: Maximum number of nodes of the subgraph.
+    :type max_nodes: Integer
+
+    :returns: A tuple with the subgraph and the set of its nodes whose
+        successors were not all kept.
+    :rtype: Tuple
+
+    :Example:
+
+    >>> from tccMChecker.print_graph import *
+    >>> graph = {1: [2, 3], 2: [4], 3: [1], 4: [4]}
+    >>> get_sampled_graph(graph, [1], 3)
+    ({1: [2, 3], 2: [], 3: [1]}, set([2]))
 
-def draw_graph(graph, filename):
+    """
+    if not initial_nodes and graph:
+        initial_nodes = [min(graph.keys())]
+
+    kept = set()
+    queue = deque()
+    for node in initial_nodes:
+        if node not in kept and len(kept) < max_nodes:
+            kept.add(node)
+            queue.append(node)
+    while queue and len(kept) < max_nodes:
+        for next_node in graph.get(queue.popleft()):
+            if next_node not in kept and len(kept) < max_nodes:
+                kept.add(next_node)
+                queue.append(next_node)
+
+    subgraph = {}
+    truncated = set()
+    for node in kept:
+        subgraph[node] = [next_node for next_node in graph.get(node)
+                          if next_node in kept]
+        if len(subgraph[node]) != len(graph.get(node)):
+            truncated.add(node)
+    return subgraph, truncated
+
+
+def get_collapsed_graph(graph):
+    """
+    Returns the graph of the strongly connected components of a graph.
+
+    :param graph: Graph.
+    :type graph: Dictionary
+
+    :returns: A tuple with the graph of the components and the nodes of each
+        component. A component is numbered by its smallest node.
+    :rtype: Tuple
+
+    :Example:
+
+    >>> from tccMChecker.print_graph import *
+    >>> graph = {1: [2], 2: [1, 3], 3: [3]}
+    >>> get_collapsed_graph(graph)
+    ({1: [1, 3], 3: [3]}, {1: [1, 2], 3: [3]})
+
+    """
+    components = {}
+    component_of = {}
+    for component in tarjan(graph):
+        key = min(component)
+        components[key] = sorted(component)
+        for node in component:
+            component_of[node] = key
+
+    collapsed = dict((key, []) for key in components.keys())
+    for node, next_nodes in graph.items():
+        key = component_of[node]
+        for next_node in next_nodes:
+            next_key = component_of[next_node]
+            if (next_key != key or len(components[key]) > 1 or
+                    node in graph.get(node)) and \
+                    next_key not in collapsed[key]:
+                collapsed[key].append(next_key)
+    return collapsed, components
+
+
+def write_dot(graph, stream, model_checking_atoms=None, initial_nodes=None,
+              collapse_scc=False, max_nodes=None):
+    """
+    Writes a graph in the DOT language. The nodes and edges are written
+    directly to the stream, without building the graph in memory.
+
+    :param graph: Graph.
+    :type graph: Dictionary
+
+    :param stream: File (or any object with a ``write`` method) where the
+        graph is written.
+    :type stream: File
+
+    :param model_checking_atoms: Atoms of each tcc node (see
+        :py:func:`model_checking_graph.get_model_checking_atoms`). If it is
+        given, the nodes are colored by tcc node, and the tcc node is added to
+        their labels.
+    :type model_checking_atoms: Dictionary
+
+    :param initial_nodes: Initial nodes, drawn with a double circle.
+    :type initial_nodes: List
+
+    :param collapse_scc: If ``True``, each strongly connected component is
+        drawn as a single node (see :py:func:`.get_collapsed_graph`).
+    :type collapse_scc: Boolean
+
+    :param max_nodes: Maximum number of nodes to write. The nodes are sampled
+        around the initial nodes (see :py:func:`.get_sampled_graph`), and the
+        nodes with successors that were not kept are drawn dashed.
+    :type max_nodes: Integer
+
+    :Example:
+
+    >>> import sys
+    >>> from tccMChecker.print_graph import *
+    >>> write_dot({1: [2], 2: [1]}, sys.stdout, collapse_scc=True)
+    digraph G {
+    rankdir=LR;
+    node [shape=circle];
+    edge [arrowhead=vee];
+    "1" [label="{1, 2}", color=blue, fontcolor=blue];
+    "1" -> "1" [color=blue];
+    }
+
+    """
+    initial_nodes = list(initial_nodes or [])
+    truncated = set()
+    if max_nodes is not None and len(graph) > max_nodes:
+        graph, truncated = get_sampled_graph(graph, initial_nodes, max_nodes)
+    initial_nodes = set(node for node in initial_nodes if node in graph)
+
+    tcc_nodes = {}
+    if model_checking_atoms is not None:
+        tcc_nodes = get_atom_tcc_nodes(model_checking_atoms)
+
+    components = dict((node, [node]) for node in graph.keys())
+    if collapse_scc:
+        graph, components = get_collapsed_graph(graph)
+
+    stream.write("digraph G {\n")
+    stream.write("rankdir=LR;\n")
+    stream.write("node [shape=circle];\n")
+    stream.write("edge [arrowhead=vee];\n")
+
+    colors = {}
+    for node in sorted(graph.keys()):
+        members = components[node]
+        keys = set(tcc_nodes.get(member, member) for member in members) \
+            if tcc_nodes else set([node])
+        colors[node] = get_color(keys.pop()) if len(keys) == 1 else "black"
+
+        if collapse_scc:
+            label = "{" + ", ".join(str(member) for member in members) + "}"
+        else:
+            label = str(node)
+        if tcc_nodes:
+            label += "\\n" + ", ".join(sorted(
+                set(str(tcc_nodes.get(member)) for member in members)))
+
+        attributes = ['label="{}"'.format(label),
+                      "color={}".format(colors[node]),
+                      "fontcolor={}".format(colors[node])]
+        if initial_nodes.intersection(members):
+            attributes.append("shape=doublecircle")
+        if truncated.intersection(members):
+            attributes.append("style=dashed")
+        stream.write('"{}" [{}];\n'.format(node, ", ".join(attributes)))
+
+    for node in sorted(graph.keys()):
+        for next_node in graph.get(node):
+            stream.write('"{}" -> "{}" [color={}];\n'.format(
+                node, next_node, colors[node]))
+    stream.write("}\n")
+
+
+def save_dot(graph, path, **options):
+    """
+    Writes a graph in the DOT language to a file (see
+    :py:func:`.write_dot`).
+
+    :param graph: Graph.
+    :type graph: Dictionary
+
+    :param path: Path of the file.
+    :type path: String
+
+    :param options: Options of :py:func:`.write_dot`.
+    :type options: Dictionary
+
+    """
+    with open(path, "w") as stream:
+        write_dot(graph, stream, **options)
+
+
+def draw_graph(graph, filename, output_path='./graph_files/'):
     """
     Draws a graph and saves it to a .pdf file.
 
@@ -15,6 +264,9 @@ def draw_graph(graph, filename):
     :param filename: Filename.
     :type filename: String
 
+    :param output_path: Folder where the file is saved.
+    :type output_path: String
+
     :Example:
 
     >>> from tccMChecker.print_graph import *
@@ -28,17 +280,11 @@ def draw_graph(graph, filename):
         Graph drawn
 
     .. note::
-        The generated PDF file is saved in the folder ``graph_files``.
+        It requires ``pydot``, and it builds the whole graph in memory. For
+        large graphs, use :py:func:`.save_dot`.
 
     """
-    output_path = './graph_files/'
-
-    colors = ["red", "blue", "orange", "violet", "red", "salmon2",
-              "deepskyblue", "burlywood2", "greenyellow", "darkseagreen",
-              "thistle2", "dodgerblue1", "darkolivegreen3", "chocolate",
-              "turquoise3", "steelblue3", "navy", "coral", "blanchedalmond",
-              "darkorange1", "goldenrod3", "firebrick", "chartreuse4",
-              "crimson", "darkorange1", "darkolivegreen4"]
+    import pydot
 
     dot_graph = pydot.Dot(graph_type='digraph', rankdir='LR')
     dot_graph.set_node_defaults(shape='circle')
@@ -46,8 +292,8 @@ def draw_graph(graph, filename):
 
     nodes = {}
     for node in graph.keys():
-        nodes[node] = pydot.Node(str(node), color=colors[node % len(colors)],
-                                 fontcolor=colors[node % len(colors)])
+        nodes[node] = pydot.Node(str(node), color=get_color(node),
+                                 fontcolor=get_color(node))
         dot_graph.add_node(nodes[node])
 
     for node in graph.keys():
@@ -55,7 +301,7 @@ def draw_graph(graph, filename):
         if len(next_nodes) != 0:
             for next_node in next_nodes:
                 edge = pydot.Edge(nodes[node], nodes[next_node],
-                                  color=colors[node % len(colors)])
+                                  color=get_color(node))
                 dot_graph.add_edge(edge)
 
     dot_graph.write_pdf(output_path+filename+".pdf")
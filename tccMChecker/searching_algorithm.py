@@ -242,3 +242,213 @@ def initial_nodes_entail_formula(scc_graph, initial_nodes, model_checking_atoms,
                 return True
 
     return False
+
+
+def find_self_fulfilling_scc(scc_subgraphs, initial_nodes, model_checking_atoms,
+                             formula):
+    """
+    Returns the first SCC graph that is self-fulfilling and whose initial nodes
+    entail a temporal formula.
+
+    :param scc_subgraphs: SCC subgraphs of a model checking graph.
+    :type scc_subgraphs: List of Dictionaries
+
+    :param initial_nodes: Initial nodes of a model checking graph.
+    :type initial_nodes: List of Integers
+
+    :param model_checking_atoms: Model checking atoms
+    :type model_checking_atoms: List of atoms
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`.
+
+    :returns: The SCC graph found or ``None`` if there is no such SCC graph.
+    :rtype: Dictionary
+
+    .. seealso::
+        :py:func:`.get_model_checking_scc_subgraphs`,
+        :py:func:`.is_self_fulfilling`, :py:func:`.initial_nodes_entail_formula`
+
+    """
+    for scc_n, scc_graph in enumerate(scc_subgraphs):
+        self_fulfilling_scc = is_self_fulfilling(scc_graph, initial_nodes,
+                                                 model_checking_atoms)
+        entail_formula = initial_nodes_entail_formula(scc_graph, initial_nodes,
+                                                      model_checking_atoms,
+                                                      formula)
+
+        print("SCC Graph", scc_n, ":")
+        print("is Self Fulfilling: ", self_fulfilling_scc)
+        print("Initial Nodes Entail Formula: ", entail_formula)
+
+        if self_fulfilling_scc and entail_formula:
+            return scc_graph
+
+    return None
+
+
+def get_shortest_path(model_checking_graph, sources, targets, allowed=None):
+    """
+    Returns a shortest path, computed with a breadth-first search, from one of
+    the source nodes to one of the target nodes.
+
+    :param model_checking_graph: Model checking graph.
+    :type model_checking_graph: Dictionary
+
+    :param sources: Nodes where the path can start.
+    :type sources: List of Integers
+
+    :param targets: Nodes where the path can end.
+    :type targets: Set of Integers
+
+    :param allowed: Nodes that the path can visit. If ``None``, the path can
+        visit any node of the graph.
+    :type allowed: Set of Integers
+
+    :returns: The nodes of the path (source and target included) or ``None``
+        if there is no such path.
+    :rtype: List of Integers
+
+    :Example:
+
+    >>> from tccMChecker.searching_algorithm import *
+    >>> graph = {1: [2, 3], 2: [4], 3: [4], 4: [1]}
+    >>> get_shortest_path(graph, [1], set([4]))
+    [1, 2, 4]
+
+    """
+    parents = {}
+    queue = []
+    for source in sources:
+        if source not in parents:
+            parents[source] = None
+            queue.append(source)
+
+    index = 0
+    while index < len(queue):
+        node = queue[index]
+        index += 1
+        if node in targets:
+            path = []
+            while node is not None:
+                path.append(node)
+                node = parents[node]
+            path.reverse()
+            return path
+
+        for next_node in model_checking_graph.get(node, []):
+            if next_node not in parents and \
+                    (allowed is None or next_node in allowed):
+                parents[next_node] = node
+                queue.append(next_node)
+    return None
+
+
+def get_lasso_witness(scc_graph, initial_nodes, model_checking_graph,
+                      model_checking_atoms, formula):
+    r"""
+    Returns a lasso-shaped path of the model checking graph that satisfies a
+    formula: a prefix starting in an initial node that entails the formula,
+    followed by a cycle through a self-fulfilling SCC.
+
+    :param scc_graph: Self-fulfilling SCC graph.
+    :type scc_graph: Dictionary
+
+    :param initial_nodes: Initial nodes of the model checking graph.
+    :type initial_nodes: List of Integers
+
+    :param model_checking_graph: Model checking graph.
+    :type model_checking_graph: Dictionary
+
+    :param model_checking_atoms: Model checking atoms.
+    :type model_checking_atoms: Dictionary
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`.
+
+    :returns: A dictionary with the keys ``prefix`` and ``cycle``. Each one is
+        a list of tuples ``(tcc node, model checking node, atom)``. The last
+        node of the cycle goes back to its first node. The prefix is empty
+        when the initial node lies on the cycle. ``None`` is returned if the
+        SCC graph has no initial node entailing the formula.
+    :rtype: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.searching_algorithm import *
+    >>> scc_graph = find_self_fulfilling_scc(model_checking_scc_subgraphs, initial_nodes, model_checking_atoms, formula)
+    >>> witness = get_lasso_witness(scc_graph, initial_nodes, model_checking_graph, model_checking_atoms, formula)
+    >>> [(tcc_node, node) for (tcc_node, node, atom) in witness["prefix"]]
+    [(1, 3)]
+    >>> [(tcc_node, node) for (tcc_node, node, atom) in witness["cycle"]]
+    [(3, 11), (5, 13)]
+
+    .. note::
+        The prefix is a shortest path from the initial nodes to the SCC. The
+        cycle is built with shortest paths inside the SCC that visit, for each
+        formula :math:`\diamondsuit\phi` of the SCC, a node where
+        :math:`\phi` holds.
+
+    .. seealso::
+        :py:func:`.find_self_fulfilling_scc`, :py:func:`.get_shortest_path`
+
+    """
+    tcc_nodes = {}
+    for tcc_node in model_checking_atoms.keys():
+        for node in model_checking_atoms.get(tcc_node).keys():
+            tcc_nodes[node] = tcc_node
+
+    def get_step(node):
+        tcc_node = tcc_nodes[node]
+        return tcc_node, node, model_checking_atoms[tcc_node].get(node)
+
+    initial_nodes = set(initial_nodes)
+    scc_nodes = set()
+    for next_nodes in scc_graph.values():
+        scc_nodes.update(next_nodes)
+
+    sources = [node for node in scc_graph.keys() if node in initial_nodes and
+               is_in_atom(formula.get_formula(), get_step(node)[2])]
+    if not sources:
+        return None
+
+    prefix = get_shortest_path(model_checking_graph, sources, scc_nodes)
+    entry = prefix.pop()
+
+    # formulas <>phi of the SCC that the cycle has to fulfil
+    eventualities = {}
+    for node in scc_nodes:
+        if node not in initial_nodes:
+            for diamond_formula in search_formulas(get_step(node)[2], "<>"):
+                new_formula = Formula(diamond_formula.get_values())
+                key = repr(new_formula.get_formula())
+                targets = eventualities.setdefault(key, set())
+                if targets:
+                    continue
+                for node_scc in scc_nodes:
+                    if node_scc not in initial_nodes and \
+                            is_in_atom(new_formula.get_formula(),
+                                       get_step(node_scc)[2]):
+                        targets.add(node_scc)
+
+    cycle = [entry]
+    pending = [targets for targets in eventualities.values()
+               if targets and entry not in targets]
+    while pending:
+        all_targets = set()
+        for targets in pending:
+            all_targets.update(targets)
+        path = get_shortest_path(model_checking_graph, [cycle[-1]],
+                                 all_targets, scc_nodes)
+        cycle.extend(path[1:])
+        pending = [targets for targets in pending
+                   if not targets.intersection(path)]
+
+    # back to the entry node with a non-empty path
+    path = get_shortest_path(model_checking_graph,
+                             [node for node in model_checking_graph[cycle[-1]]
+                              if node in scc_nodes], set([entry]), scc_nodes)
+    cycle.extend(path[:-1])
+
+    return {"prefix": [get_step(node) for node in prefix],
+            "cycle": [get_step(node) for node in cycle]}
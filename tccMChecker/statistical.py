@@ -0,0 +1,343 @@
+"""This module contains a statistical model checking engine. It takes random
+lasso-shaped runs through the model checking graph, built one step at a time,
+and estimates the probability that a run satisfies the formula with a
+confidence interval [Wil27]_. The runs are spread over a pool of processes."""
+
+from __future__ import print_function
+
+import math
+import multiprocessing
+import os
+import random
+import sys
+
+from tccMChecker.check_statistics import get_time, record_closure
+from tccMChecker.closure import get_closure
+from tccMChecker.distributed import is_accepting
+from tccMChecker.model_checking_graph import get_all_atoms, \
+    get_closure_propositions, get_relevant_store, get_store_key, \
+    get_node_atoms, search_formulas, is_in_atom, is_next_state
+
+# Number of runs of each task of the pool
+RUNS_PER_TASK = 100
+
+# Random walker of each worker process
+_worker = {}
+
+
+def get_wilson_interval(successes, trials, z=1.96):
+    """
+    Returns the Wilson score interval of a proportion.
+
+    :param successes: Number of successes.
+    :type successes: Integer
+
+    :param trials: Number of trials.
+    :type trials: Integer
+
+    :param z: Quantile of the standard normal distribution of the confidence
+        level (``1.96`` for 95%).
+    :type z: Float
+
+    :returns: The lower and upper bounds of the interval.
+    :rtype: Tuple
+
+    :Example:
+
+    >>> from tccMChecker.statistical import *
+    >>> low, high = get_wilson_interval(0, 100)
+    >>> round(low, 4), round(high, 4)
+    (0.0, 0.037)
+
+    """
+    if not trials:
+        return 0.0, 1.0
+    proportion = float(successes) / trials
+    denominator = 1 + z * z / trials
+    center = (proportion + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(proportion * (1 - proportion) / trials +
+                           z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+class RandomWalker(object):
+    """
+    This class takes random runs through the model checking graph of a
+    formula and a tcc structure. Each run starts in an atom of an initial
+    tcc node that contains the formula, and goes on to a random atom of a
+    successor tcc node that satisfies its formulas with next operator (see
+    :py:func:`model_checking_graph.is_next_state`), until it reaches a node
+    of the run again.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    """
+
+    def __init__(self, formula, tcc_structure):
+        """
+        Constructor method.
+
+        """
+        self.__tcc_structure = tcc_structure
+
+        closure = []
+        get_closure(formula, closure)
+        self.__atoms = get_all_atoms(closure)
+        self.__propositions = get_closure_propositions(closure)
+        self.__eventualities = search_formulas(closure, "<>") or [None]
+        self.__store_atoms = {}
+        self.__tcc_atoms = {}
+        self.__successors = {}
+
+        self.__initial = []
+        for tcc_node, data in tcc_structure.items():
+            if data.get("initial"):
+                for index, atom in enumerate(self.get_tcc_node_atoms(
+                        tcc_node)):
+                    if is_in_atom(formula.get_formula(), atom):
+                        self.__initial.append((tcc_node, index))
+
+    def get_tcc_node_atoms(self, tcc_node):
+        """
+        Returns the atoms of a tcc node (see
+        :py:func:`model_checking_graph.get_node_atoms`), computed the first
+        time the tcc node is reached.
+
+        :param tcc_node: tcc node.
+
+        :returns: The atoms of the tcc node.
+        :rtype: List of atoms
+
+        """
+        if tcc_node not in self.__tcc_atoms:
+            store = self.__tcc_structure[tcc_node].get("store")
+            relevant_store = get_relevant_store(store, self.__propositions)
+            if relevant_store is not None:
+                store = relevant_store
+
+            store_key = get_store_key(store)
+            if store_key not in self.__store_atoms:
+                self.__store_atoms[store_key] = get_node_atoms(store,
+                                                               self.__atoms)
+            self.__tcc_atoms[tcc_node] = self.__store_atoms[store_key]
+        return self.__tcc_atoms[tcc_node]
+
+    def get_successors(self, node):
+        """
+        Returns the successors of a node of the model checking graph, computed
+        the first time the node is reached.
+
+        :param node: Tuple ``(tcc node, index of the atom)``.
+        :type node: Tuple
+
+        :returns: The successors of the node.
+        :rtype: List of Tuples
+
+        """
+        if node not in self.__successors:
+            tcc_node, index = node
+            next_formulas = search_formulas(
+                self.get_tcc_node_atoms(tcc_node)[index], "o")
+            successors = []
+            for next_tcc_node in self.__tcc_structure[tcc_node].get("edges"):
+                for next_index, next_atom in enumerate(
+                        self.get_tcc_node_atoms(next_tcc_node)):
+                    if is_next_state(next_formulas, next_atom):
+                        successors.append((next_tcc_node, next_index))
+            self.__successors[node] = successors
+        return self.__successors[node]
+
+    def walk(self, rng, max_length):
+        """
+        Takes a random run.
+
+        :param rng: Random number generator.
+        :type rng: :py:class:`random.Random`
+
+        :param max_length: Maximum number of nodes of the run.
+        :type max_length: Integer
+
+        :returns: A tuple with the outcome of the run (``satisfying``, if its
+            cycle fulfils every formula :math:`\\diamondsuit\\phi`,
+            ``not_satisfying``, ``dead_end`` if it reaches a node without
+            successors, or ``truncated`` if it is longer than
+            ``max_length``), and the run as a witness (see
+            :py:func:`searching_algorithm.get_lasso_witness`) when it is
+            ``satisfying``.
+        :rtype: Tuple
+
+        """
+        if not self.__initial:
+            return "dead_end", None
+
+        run = [rng.choice(self.__initial)]
+        positions = {run[0]: 0}
+        while True:
+            successors = self.get_successors(run[-1])
+            if not successors:
+                return "dead_end", None
+            node = rng.choice(successors)
+            if node in positions:
+                break
+            if len(run) == max_length:
+                return "truncated", None
+            positions[node] = len(run)
+            run.append(node)
+
+        cycle = run[positions[node]:]
+        if not all(any(is_accepting(self.get_tcc_node_atoms(tcc_node)[index],
+                                    eventuality)
+                       for tcc_node, index in cycle)
+                   for eventuality in self.__eventualities):
+            return "not_satisfying", None
+
+        def get_step(step):
+            return (step[0], step,
+                    self.get_tcc_node_atoms(step[0])[step[1]])
+
+        return "satisfying", {
+            "prefix": [get_step(step) for step in run[:positions[node]]],
+            "cycle": [get_step(step) for step in cycle]}
+
+
+def init_worker(formula, tcc_structure):
+    """
+    Initializes a worker process with a :py:class:`.RandomWalker`. The output
+    printed by the engine is discarded.
+
+    """
+    sys.stdout = open(os.devnull, "w")
+    _worker["walker"] = RandomWalker(formula, tcc_structure)
+
+
+def run_walks(task):
+    """
+    Takes some random runs in a worker process.
+
+    :param task: Tuple ``(seed, runs, max_length)``.
+    :type task: Tuple
+
+    :returns: A tuple with the number of runs of each outcome (see
+        :py:meth:`.RandomWalker.walk`) and the first satisfying run.
+    :rtype: Tuple
+
+    """
+    seed, runs, max_length = task
+    rng = random.Random(seed)
+    outcomes = {}
+    witness = None
+    for _ in range(runs):
+        outcome, run = _worker["walker"].walk(rng, max_length)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        if witness is None:
+            witness = run
+    return outcomes, witness
+
+
+def model_satisfies_property_statistical(formula, tcc_structure, runs=1000,
+                                         max_length=1000, processes=None,
+                                         seed=None, z=1.96, witness=None,
+                                         statistics=None):
+    """
+    Estimates if a model satisfies a formula with random runs (see
+    :py:class:`.RandomWalker`).
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param runs: Number of runs.
+    :type runs: Integer
+
+    :param max_length: Maximum number of nodes of a run.
+    :type max_length: Integer
+
+    :param processes: Number of processes (by default, the number of CPUs).
+    :type processes: Integer
+
+    :param seed: Seed of the random runs.
+    :type seed: Integer
+
+    :param z: Quantile of the confidence level (see
+        :py:func:`.get_wilson_interval`).
+    :type z: Float
+
+    :param witness: Empty dictionary to store the first satisfying run.
+    :type witness: Dictionary
+
+    :param statistics: Empty dictionary to store the number of runs of each
+        outcome (``outcomes``), the proportion of satisfying runs among the
+        runs that ended in a cycle (``probability``), its confidence interval
+        (``interval``) and the time of the check (``time``).
+    :type statistics: Dictionary
+
+    :returns: ``True`` if some run satisfies the formula, or ``False``
+        otherwise.
+    :rtype: Boolean
+
+    :Example:
+
+    >>> from tccMChecker.statistical import *
+    >>> from tccMChecker.formula import Formula
+    >>> formula = Formula({"<>": "da=10"})
+    >>> statistics = {}
+    >>> model_satisfies_property_statistical(formula, tcc_structure,
+    ...                                      runs=500, seed=1,
+    ...                                      statistics=statistics)
+    True
+    >>> statistics["outcomes"]
+    {'dead_end': 103, 'satisfying': 137, 'not_satisfying': 260}
+    >>> statistics["interval"]
+    (0.30000916309817716, 0.39313645851395074)
+
+    .. note::
+        As in :py:func:`model_checking_algorithm.model_satisfies_property`, the
+        formula is the negation of the property, so a satisfying run is a
+        counterexample of the property, and the probability is the one of
+        the runs that violate the property. Like the tableau engine, the
+        cycle can be reached through any number of edges. A result ``False``
+        only means that no counterexample was found.
+
+    """
+    start = get_time()
+    rng = random.Random(seed)
+    tasks = []
+    for first in range(0, runs, RUNS_PER_TASK):
+        tasks.append((rng.getrandbits(32), min(RUNS_PER_TASK, runs - first),
+                      max_length))
+
+    pool = multiprocessing.Pool(processes, init_worker,
+                                (formula, tcc_structure))
+    try:
+        results = pool.map(run_walks, tasks)
+    finally:
+        pool.terminate()
+
+    outcomes = {}
+    first_run = None
+    for task_outcomes, run in results:
+        for outcome, number in task_outcomes.items():
+            outcomes[outcome] = outcomes.get(outcome, 0) + number
+        if first_run is None:
+            first_run = run
+
+    if first_run is not None and witness is not None:
+        witness.update(first_run)
+    if statistics is not None:
+        closure = []
+        get_closure(formula, closure)
+        record_closure(statistics, closure)
+        satisfying = outcomes.get("satisfying", 0)
+        cycles = satisfying + outcomes.get("not_satisfying", 0)
+        statistics["outcomes"] = outcomes
+        statistics["probability"] = float(satisfying) / cycles if cycles \
+            else None
+        statistics["interval"] = get_wilson_interval(satisfying, cycles, z)
+        statistics["time"] = get_time() - start
+    return first_run is not None
@@ -0,0 +1,209 @@
+"""This module contains the functions to read and write tcc structures in JSON
+files, with the formulas of the stores written in text (see
+:py:mod:`formula_parser`)."""
+
+from __future__ import print_function
+
+import json
+
+from tccMChecker.domains import get_undeclared_propositions
+from tccMChecker.formula import Formula
+from tccMChecker.formula_parser import parse_formula, format_formula
+
+
+def get_node_key(key):
+    """
+    Returns the tcc node of a key of a JSON object, or of an edge. The keys
+    that are numbers are converted to integers.
+
+    :param key: Key of the JSON object.
+    :type key: String or Integer
+
+    :returns: The tcc node.
+    :rtype: Integer or String
+
+    """
+    try:
+        return int(key)
+    except ValueError:
+        return key
+
+
+def data_to_structure(data):
+    """
+    Builds a tcc structure from its JSON representation.
+
+    :param data: Dictionary with the tcc nodes as keys. Each tcc node has the
+        formulas of its store in text (``store``), its successors (``edges``),
+        if it is initial (``initial``, ``false`` by default) and its
+        ``normal`` and ``temporal`` processes (empty by default). The tcc
+        nodes can also be in the key ``nodes`` of a model (see
+        :py:func:`.load_model`).
+    :type data: Dictionary
+
+    :returns: tcc structure.
+    :rtype: Dictionary
+
+    :Example:
+
+    >>> from tccMChecker.structure_io import *
+    >>> tcc_structure = data_to_structure(
+    ...     {"1": {"store": ["tt", "~dd"], "edges": [1], "initial": True}})
+    >>> [formula.get_formula() for formula in tcc_structure[1]["store"]]
+    [{'': 'tt'}, {'~': 'dd'}]
+
+    """
+    if "nodes" in data and "edges" not in data["nodes"]:
+        data = data["nodes"]
+
+    tcc_structure = {}
+    for key, node_data in data.items():
+        tcc_structure[get_node_key(key)] = {
+            "store": [parse_formula(str(text))
+                      for text in node_data["store"]],
+            "normal": list(node_data.get("normal", [])),
+            "temporal": list(node_data.get("temporal", [])),
+            "edges": [get_node_key(edge) for edge in node_data["edges"]],
+            "initial": bool(node_data.get("initial", False))}
+    return tcc_structure
+
+
+def structure_to_data(tcc_structure):
+    """
+    Returns the JSON representation of a tcc structure (see
+    :py:func:`.data_to_structure`).
+
+    :param tcc_structure: tcc structure.
+    :type tcc_structure: Dictionary
+
+    :returns: Dictionary with the tcc nodes (as strings) as keys.
+    :rtype: Dictionary
+
+    """
+    data = {}
+    for tcc_node, node_data in tcc_structure.items():
+        data[str(tcc_node)] = {
+            "store": [format_formula(formula)
+                      for formula in node_data.get("store")],
+            "normal": list(node_data.get("normal", [])),
+            "temporal": list(node_data.get("temporal", [])),
+            "edges": list(node_data.get("edges")),
+            "initial": bool(node_data.get("initial"))}
+    return data
+
+
+def load_structure(path):
+    """
+    Reads a tcc structure from a JSON file (see
+    :py:func:`.data_to_structure`).
+
+    :param path: Path of the file.
+    :type path: String
+
+    :returns: tcc structure.
+    :rtype: Dictionary
+
+    """
+    with open(path) as structure_file:
+        return data_to_structure(json.load(structure_file))
+
+
+def data_to_domains(data):
+    """
+    Returns the domains of the variables of a model from their JSON
+    representation.
+
+    :param data: Dictionary with the values of each variable (``null`` for a
+        boolean proposition), or list of declarations in text (see
+        :py:func:`domains.parse_domain`).
+    :type data: Dictionary or List
+
+    :returns: Domains accepted by
+        :py:meth:`formula.Formula.set_proposition_domains`.
+    :rtype: Dictionary or String
+
+    :Example:
+
+    >>> from tccMChecker.structure_io import *
+    >>> print(data_to_domains(["in", "x in {1, 2}"]))
+    in
+    x in {1, 2}
+
+    """
+    if isinstance(data, list):
+        return "\n".join(data)
+    return data
+
+
+def load_model(path):
+    """
+    Reads a model from a JSON file: a tcc structure (see
+    :py:func:`.data_to_structure`), or an object with the domains of the
+    variables (``domains``, see :py:func:`.data_to_domains`) and the tcc
+    structure (``nodes``).
+
+    ``model.json``::
+
+        {"domains": ["in", "x in {1, 2}"],
+         "nodes": {"1": {"store": ["in", "x=1"], "edges": [1],
+                         "initial": true}}}
+
+    :param path: Path of the file.
+    :type path: String
+
+    :returns: A tuple with the tcc structure and the domains, or ``None`` if
+        the file has no domains.
+    :rtype: Tuple
+
+    """
+    with open(path) as model_file:
+        data = json.load(model_file)
+    domains = None
+    if "nodes" in data and "edges" not in data["nodes"]:
+        domains = data.get("domains")
+        if domains is not None:
+            domains = data_to_domains(domains)
+    return data_to_structure(data), domains
+
+
+def check_propositions(tcc_structure, formulas=()):
+    """
+    Checks that the propositions of the stores of a tcc structure and of some
+    formulas are declared in the domains of the formulas (see
+    :py:meth:`formula.Formula.set_proposition_domains`).
+
+    :param tcc_structure: tcc structure.
+    :type tcc_structure: Dictionary
+
+    :param formulas: Formulas.
+    :type formulas: List of :py:class:`~formula.Formula`
+
+    :raises ValueError: If some proposition is not declared.
+
+    """
+    datas = [formula.get_formula() for formula in formulas]
+    for node_data in tcc_structure.values():
+        datas.extend(formula.get_formula()
+                     for formula in node_data.get("store"))
+    undeclared = get_undeclared_propositions(
+        datas, Formula.get_proposition_domains())
+    if undeclared:
+        raise ValueError("undeclared propositions: {}".format(
+            ", ".join(undeclared)))
+
+
+def save_structure(tcc_structure, path):
+    """
+    Writes a tcc structure to a JSON file (see
+    :py:func:`.structure_to_data`).
+
+    :param tcc_structure: tcc structure.
+    :type tcc_structure: Dictionary
+
+    :param path: Path of the file.
+    :type path: String
+
+    """
+    with open(path, "w") as structure_file:
+        json.dump(structure_to_data(tcc_structure), structure_file,
+                  indent=2, sort_keys=True)
@@ -0,0 +1,671 @@
+"""This module contains a symbolic model checking engine. The atoms, the
+stores of the tcc nodes and the edges of the model checking graph are
+represented as binary decision diagrams (see :py:class:`bdd.BDD`) instead of
+being enumerated, and the strongly connected components are computed with
+fixpoints over sets of nodes."""
+
+from __future__ import print_function
+
+import math
+
+from tccMChecker.bdd import BDD, FALSE, TRUE
+from tccMChecker.check_statistics import get_time, record_phase, \
+    record_closure
+from tccMChecker.closure import get_closure
+from tccMChecker.formula import Formula, get_formula_key
+from tccMChecker.model_checking_graph import get_basic_formulas, \
+    get_no_basic_formulas, clean_connector
+
+
+def get_variable_order(basic_formulas):
+    """
+    Returns the order of the BDD variables of the basic formulas of a closure.
+
+    The basic formulas keep the order of the closure, which is a depth-first
+    traversal of the formula, so each :math:`\\circ\\phi` is close to the
+    basic formulas of :math:`\\phi`. Besides, the propositions of the same
+    variable of the model are placed together, because the store constraints
+    relate them.
+
+    :param basic_formulas: Basic formulas of a closure.
+    :type basic_formulas: List of :py:class:`~formula.Formula`
+
+    :returns: Indexes of the basic formulas, in the order of their variables.
+    :rtype: List of Integers
+
+    """
+    rules = Formula.get_proposition_domains()["rules"]
+    order = []
+    placed = set()
+    for index, formula in enumerate(basic_formulas):
+        if index in placed:
+            continue
+        order.append(index)
+        placed.add(index)
+
+        if formula.is_proposition():
+            group = [list(rule.values())[0]
+                     for rule in rules.get(formula.get_values(), [])]
+            for other_index, other in enumerate(basic_formulas):
+                if other_index not in placed and other.is_proposition() and \
+                        other.get_values() in group:
+                    order.append(other_index)
+                    placed.add(other_index)
+    return order
+
+
+def add_symbolic_formula(bdd, symbolic_atom, formula, condition):
+    """
+    Adds a formula to a symbolic atom.
+
+    :param bdd: BDD manager.
+    :type bdd: :py:class:`~bdd.BDD`
+
+    :param symbolic_atom: Symbolic atom, a dictionary with the formulas of the
+        atom (``formulas``) and its propositions (``literals``), each one with
+        the BDD of the condition over the basic formulas under which it is in
+        the atom.
+    :type symbolic_atom: Dictionary
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param condition: BDD of the condition under which the formula is in the
+        atom.
+    :type condition: Integer
+
+    """
+    data = formula.get_formula()
+    key = get_formula_key(data)
+    if key in symbolic_atom["formulas"]:
+        condition = bdd.disjunction(symbolic_atom["formulas"][key][1],
+                                    condition)
+    symbolic_atom["formulas"][key] = (data, condition)
+
+    if len(data) == 1:
+        connective, value = list(data.items())[0]
+        if not isinstance(value, dict) and connective.strip() in ("", "~"):
+            literal = (value, connective.strip() == "~")
+            symbolic_atom["literals"][literal] = bdd.disjunction(
+                symbolic_atom["literals"].get(literal, FALSE), condition)
+
+
+def copy_symbolic_atom(symbolic_atom):
+    """
+    Returns a copy of a symbolic atom.
+
+    :param symbolic_atom: Symbolic atom.
+    :type symbolic_atom: Dictionary
+
+    :returns: The copy of the symbolic atom.
+    :rtype: Dictionary
+
+    """
+    return {"formulas": dict(symbolic_atom["formulas"]),
+            "literals": dict(symbolic_atom["literals"])}
+
+
+def is_in_symbolic_atom(symbolic_atom, data):
+    """
+    Returns the condition under which a formula is in a symbolic atom (see
+    :py:func:`model_checking_graph.is_in_atom`).
+
+    :param symbolic_atom: Symbolic atom.
+    :type symbolic_atom: Dictionary
+
+    :param data: Structure representing a formula.
+    :type data: Dictionary
+
+    :returns: BDD of the condition.
+    :rtype: Integer
+
+    """
+    entry = symbolic_atom["formulas"].get(get_formula_key(data))
+    if entry is None:
+        return FALSE
+    return entry[1]
+
+
+def get_symbolic_consistency(bdd, formula, symbolic_atom):
+    """
+    Returns the condition under which a formula is consistent with a symbolic
+    atom. The rules are the ones of
+    :py:func:`model_checking_graph.is_consistent`.
+
+    :param bdd: BDD manager.
+    :type bdd: :py:class:`~bdd.BDD`
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param symbolic_atom: Symbolic atom.
+    :type symbolic_atom: Dictionary
+
+    :returns: BDD of the condition.
+    :rtype: Integer
+
+    """
+    formula = clean_connector(formula)
+    negation = is_in_symbolic_atom(symbolic_atom,
+                                   formula.get_negation().get_formula())
+    connective = formula.get_connective()
+
+    if connective == "<>":  # <> rules
+        condition = bdd.disjunction(
+            is_in_symbolic_atom(symbolic_atom, {"o": formula.get_formula()}),
+            get_symbolic_consistency(bdd, Formula(formula.get_values()),
+                                     symbolic_atom))
+
+    elif connective == "[]":  # [] rules
+        condition = bdd.conjunction(
+            is_in_symbolic_atom(symbolic_atom, {"o": formula.get_formula()}),
+            get_symbolic_consistency(bdd, Formula(formula.get_values()),
+                                     symbolic_atom))
+
+    elif connective == "^":  # ^ rules
+        subformulas = formula.get_subformulas()
+        condition = bdd.conjunction(
+            get_symbolic_consistency(bdd, subformulas[0], symbolic_atom),
+            get_symbolic_consistency(bdd, subformulas[1], symbolic_atom))
+
+    elif connective == "v":  # v rules
+        subformulas = formula.get_subformulas()
+        condition = bdd.disjunction(
+            get_symbolic_consistency(bdd, subformulas[0], symbolic_atom),
+            get_symbolic_consistency(bdd, subformulas[1], symbolic_atom))
+
+    elif formula.is_proposition() and connective == "":
+        condition = get_symbolic_proposition_consistency(bdd, formula,
+                                                         symbolic_atom)
+
+    elif formula.is_proposition() and connective == "~":
+        condition = TRUE
+
+    elif connective == "o" or formula.is_negative_next():
+        condition = is_in_symbolic_atom(symbolic_atom, formula.get_formula())
+
+    else:
+        condition = FALSE
+
+    return bdd.conjunction(bdd.negation(negation), condition)
+
+
+def get_symbolic_proposition_consistency(bdd, formula, symbolic_atom):
+    """
+    Returns the condition under which a proposition is consistent with a
+    symbolic atom (see :py:func:`model_checking_graph.proposition_consistent`).
+
+    :param bdd: BDD manager.
+    :type bdd: :py:class:`~bdd.BDD`
+
+    :param formula: Proposition
+    :type formula: :py:class:`~formula.Formula`
+
+    :param symbolic_atom: Symbolic atom.
+    :type symbolic_atom: Dictionary
+
+    :returns: BDD of the condition.
+    :rtype: Integer
+
+    """
+    domains = Formula.get_proposition_domains()
+    if formula.get_values() not in domains["masks"]:
+        return FALSE
+
+    mask = domains["masks"][formula.get_values()]
+    excluded = FALSE
+    for (proposition, negative), condition in \
+            symbolic_atom["literals"].items():
+        bit = domains["bits"].get(proposition)
+        if bit is not None and mask & (1 << (2 * bit + int(negative))):
+            excluded = bdd.disjunction(excluded, condition)
+    return bdd.negation(excluded)
+
+
+def get_symbolic_atom(bdd, closure, variables):
+    """
+    Returns the symbolic atom of a closure, i.e. the atoms of
+    :py:func:`model_checking_graph.get_all_atoms` as conditions over the
+    variables of the basic formulas.
+
+    :param bdd: BDD manager.
+    :type bdd: :py:class:`~bdd.BDD`
+
+    :param closure: Closure of a formula.
+    :type closure: List of :py:class:`~formula.Formula`
+
+    :param variables: BDD of the variable of each basic formula, in the order
+        of :py:func:`model_checking_graph.get_basic_formulas`.
+    :type variables: List of Integers
+
+    :returns: Symbolic atom.
+    :rtype: Dictionary
+
+    """
+    basic_formulas = get_basic_formulas(closure)
+    symbolic_atom = {"formulas": {}, "literals": {}}
+
+    for formula, variable in zip(basic_formulas, variables):
+        add_symbolic_formula(bdd, symbolic_atom, formula, variable)
+        add_symbolic_formula(bdd, symbolic_atom, formula.get_negation(),
+                             bdd.negation(variable))
+
+    # o~phi
+    for formula, variable in zip(basic_formulas, variables):
+        if formula.get_connective() == "o":
+            add_symbolic_formula(
+                bdd, symbolic_atom,
+                Formula({"o": {"~": formula.get_values()}}),
+                bdd.negation(variable))
+
+    for formula in get_no_basic_formulas(closure):
+        condition = get_symbolic_consistency(bdd, formula, symbolic_atom)
+        add_symbolic_formula(bdd, symbolic_atom, formula, condition)
+        add_symbolic_formula(bdd, symbolic_atom, formula.get_negation(),
+                             bdd.negation(condition))
+
+    return symbolic_atom
+
+
+def get_symbolic_node_atoms(bdd, store, symbolic_atom):
+    """
+    Returns the atoms that are consistent with the store of a tcc node (see
+    :py:func:`model_checking_graph.get_node_atoms`).
+
+    :param bdd: BDD manager.
+    :type bdd: :py:class:`~bdd.BDD`
+
+    :param store: Propositions (as formulas) in the store of the tcc node.
+    :type store: List of :py:class:`~formula.Formula`
+
+    :param symbolic_atom: Symbolic atom of the closure.
+    :type symbolic_atom: Dictionary
+
+    :returns: A tuple with the BDD of the atoms consistent with the store,
+        and the symbolic atom of the tcc node, where the formulas of the store
+        are added.
+    :rtype: Tuple
+
+    """
+    node_atom = copy_symbolic_atom(symbolic_atom)
+    constraint = TRUE
+    for proposition in store:
+        constraint = bdd.conjunction(constraint, get_symbolic_consistency(
+            bdd, proposition, node_atom))
+
+        if proposition.get_connective() == "^":
+            for subformula in proposition.get_subformulas():
+                add_symbolic_formula(bdd, node_atom,
+                                     clean_connector(subformula), TRUE)
+        add_symbolic_formula(bdd, node_atom, proposition, TRUE)
+    return constraint, node_atom
+
+
+def get_node_cube(bdd, levels, index):
+    """
+    Returns the BDD of the binary encoding of a tcc node.
+
+    :param bdd: BDD manager.
+    :type bdd: :py:class:`~bdd.BDD`
+
+    :param levels: Levels of the variables that encode the tcc nodes.
+    :type levels: List of Integers
+
+    :param index: Index of the tcc node.
+    :type index: Integer
+
+    :returns: BDD that is true only for the encoding of the tcc node.
+    :rtype: Integer
+
+    """
+    return bdd.cube(dict((level, bool((index >> bit) & 1))
+                         for bit, level in enumerate(levels)))
+
+
+def get_symbolic_model(closure, formula, tcc_structure):
+    r"""
+    Returns the symbolic model checking graph of a tcc structure.
+
+    A node of the model checking graph is encoded with the variables of the
+    index of its tcc node and one variable for each basic formula of the
+    closure. Each variable has a copy for the successor node, placed just
+    after it (see :py:func:`.get_variable_order`).
+
+    :param closure: Closure of the formula.
+    :type closure: List of :py:class:`~formula.Formula`
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc structure.
+    :type tcc_structure: Dictionary
+
+    :returns: A dictionary with the BDD manager (``bdd``), the levels of the
+        variables of a node (``current``) and of its successor (``next``), the
+        renaming between them (``to_next`` and ``to_current``), the BDDs of
+        the nodes (``states``), the initial nodes (``initial``), the nodes
+        whose atom contains the formula (``formula``) and the edges
+        (``transition``), and the pairs of BDDs of the nodes with a formula
+        :math:`\diamondsuit\phi` and of the nodes with :math:`\phi`
+        (``eventualities``).
+    :rtype: Dictionary
+
+    """
+    bdd = BDD()
+    tcc_nodes = sorted(tcc_structure.keys())
+    number_bits = max(1, int(math.ceil(math.log(max(len(tcc_nodes), 1), 2))))
+
+    node_levels = []
+    to_next = {}
+    for bit in range(number_bits):
+        level = bdd.add_variable("node{}".format(bit))
+        to_next[level] = bdd.add_variable("node{}'".format(bit))
+        node_levels.append(level)
+    next_node_levels = [to_next[level] for level in node_levels]
+
+    basic_formulas = get_basic_formulas(closure)
+    variables = [None] * len(basic_formulas)
+    for index in get_variable_order(basic_formulas):
+        level = bdd.add_variable("b{}".format(index))
+        to_next[level] = bdd.add_variable("b{}'".format(index))
+        variables[index] = bdd.get_variable(level)
+    to_current = dict((value, key) for key, value in to_next.items())
+
+    # Atoms of each tcc node
+    symbolic_atom = get_symbolic_atom(bdd, closure, variables)
+    node_atoms = {}
+    node_states = {}
+    states = FALSE
+    initial = FALSE
+    formula_states = FALSE
+    for index, tcc_node in enumerate(tcc_nodes):
+        constraint, node_atoms[tcc_node] = get_symbolic_node_atoms(
+            bdd, tcc_structure[tcc_node].get("store"), symbolic_atom)
+        node_states[tcc_node] = bdd.conjunction(
+            get_node_cube(bdd, node_levels, index), constraint)
+        states = bdd.disjunction(states, node_states[tcc_node])
+        if tcc_structure[tcc_node].get("initial"):
+            initial = bdd.disjunction(initial, node_states[tcc_node])
+        formula_states = bdd.disjunction(formula_states, bdd.conjunction(
+            node_states[tcc_node], is_in_symbolic_atom(
+                node_atoms[tcc_node], formula.get_formula())))
+
+    # <>phi and phi
+    eventualities = {}
+    for tcc_node in tcc_nodes:
+        for data, condition in node_atoms[tcc_node]["formulas"].values():
+            if list(data.keys()) == ["<>"]:
+                fulfilling = Formula(list(data.values())[0]).get_formula()
+                key = get_formula_key(fulfilling)
+                diamond_states = bdd.conjunction(node_states[tcc_node],
+                                                 condition)
+                if key in eventualities:
+                    diamond_states = bdd.disjunction(eventualities[key][0],
+                                                     diamond_states)
+                eventualities[key] = (diamond_states, fulfilling)
+    for key, (diamond_states, fulfilling) in list(eventualities.items()):
+        fulfilling_states = FALSE
+        for tcc_node in tcc_nodes:
+            fulfilling_states = bdd.disjunction(
+                fulfilling_states, bdd.conjunction(
+                    node_states[tcc_node], is_in_symbolic_atom(
+                        node_atoms[tcc_node], fulfilling)))
+        eventualities[key] = (diamond_states, fulfilling_states)
+
+    # Edges
+    next_states = {}
+    next_memberships = {}
+    next_relations = {}
+    transition = FALSE
+    for index, tcc_node in enumerate(tcc_nodes):
+        next_formulas = [(data, condition) for data, condition in
+                         node_atoms[tcc_node]["formulas"].values()
+                         if list(data.keys()) == ["o"]]
+        successors = FALSE
+
+        for next_tcc_node in tcc_structure[tcc_node].get("edges"):
+            if next_tcc_node not in next_states:
+                next_states[next_tcc_node] = bdd.rename(
+                    node_states[next_tcc_node], to_next)
+
+            targets = []
+            for data, condition in next_formulas:
+                next_data = Formula(list(data.values())[0]).get_formula()
+                key = (next_tcc_node, get_formula_key(next_data))
+                if key not in next_memberships:
+                    next_memberships[key] = bdd.rename(is_in_symbolic_atom(
+                        node_atoms[next_tcc_node], next_data), to_next)
+                targets.append((condition, next_memberships[key]))
+
+            targets = tuple(targets)
+            if targets not in next_relations:
+                relation = TRUE
+                for condition, target in targets:
+                    relation = bdd.conjunction(
+                        relation, bdd.implication(condition, target))
+                next_relations[targets] = relation
+
+            successors = bdd.disjunction(successors, bdd.conjunction(
+                next_states[next_tcc_node], next_relations[targets]))
+
+        transition = bdd.disjunction(transition, bdd.conjunction(
+            node_states[tcc_node], successors))
+
+    current = set(node_levels) | set(to_current.values())
+    return {"bdd": bdd, "current": frozenset(current),
+            "next": frozenset(to_current.keys()), "to_next": to_next,
+            "to_current": to_current, "node_levels": node_levels,
+            "next_node_levels": next_node_levels, "states": states,
+            "initial": initial, "formula": formula_states,
+            "transition": transition, "eventualities": eventualities}
+
+
+def get_successors(model, nodes):
+    """
+    Returns the successors of a set of nodes of a symbolic model checking
+    graph.
+
+    :param model: Symbolic model checking graph (see
+        :py:func:`.get_symbolic_model`).
+    :type model: Dictionary
+
+    :param nodes: BDD of the nodes.
+    :type nodes: Integer
+
+    :returns: BDD of the successors.
+    :rtype: Integer
+
+    """
+    bdd = model["bdd"]
+    image = bdd.and_exists(nodes, model["transition"], model["current"])
+    return bdd.rename(image, model["to_current"])
+
+
+def get_predecessors(model, nodes):
+    """
+    Returns the predecessors of a set of nodes of a symbolic model checking
+    graph.
+
+    :param model: Symbolic model checking graph.
+    :type model: Dictionary
+
+    :param nodes: BDD of the nodes.
+    :type nodes: Integer
+
+    :returns: BDD of the predecessors.
+    :rtype: Integer
+
+    """
+    bdd = model["bdd"]
+    return bdd.and_exists(bdd.rename(nodes, model["to_next"]),
+                          model["transition"], model["next"])
+
+
+def get_reachable(model, nodes, within, backward=False):
+    """
+    Returns the nodes reachable from a set of nodes without leaving a set of
+    allowed nodes (least fixpoint).
+
+    :param model: Symbolic model checking graph.
+    :type model: Dictionary
+
+    :param nodes: BDD of the nodes where the paths start.
+    :type nodes: Integer
+
+    :param within: BDD of the nodes that the paths can visit.
+    :type within: Integer
+
+    :param backward: If ``True``, returns the nodes that can reach the nodes.
+    :type backward: Boolean
+
+    :returns: BDD of the reachable nodes (the nodes included).
+    :rtype: Integer
+
+    """
+    bdd = model["bdd"]
+    image = get_predecessors if backward else get_successors
+    reached = nodes
+    frontier = nodes
+    while frontier != FALSE:
+        frontier = bdd.conjunction(
+            bdd.conjunction(image(model, frontier), within),
+            bdd.negation(reached))
+        reached = bdd.disjunction(reached, frontier)
+    return reached
+
+
+def get_cycle_nodes(model, nodes):
+    """
+    Returns the largest subset of a set of nodes where every node has a
+    predecessor and a successor in the subset (greatest fixpoint). It contains
+    every non-trivial strongly connected component of the nodes.
+
+    :param model: Symbolic model checking graph.
+    :type model: Dictionary
+
+    :param nodes: BDD of the nodes.
+    :type nodes: Integer
+
+    :returns: BDD of the subset.
+    :rtype: Integer
+
+    """
+    bdd = model["bdd"]
+    while True:
+        trimmed = bdd.conjunction(nodes, bdd.conjunction(
+            get_successors(model, nodes), get_predecessors(model, nodes)))
+        if trimmed == nodes:
+            return nodes
+        nodes = trimmed
+
+
+def is_symbolic_self_fulfilling(model, component):
+    """
+    Checks if a strongly connected component is self-fulfilling, i.e. each
+    formula :math:`\\diamondsuit\\phi` of its non-initial nodes has a
+    non-initial node with :math:`\\phi` (see
+    :py:func:`searching_algorithm.is_self_fulfilling`).
+
+    :param model: Symbolic model checking graph.
+    :type model: Dictionary
+
+    :param component: BDD of the nodes of the component.
+    :type component: Integer
+
+    :returns: ``True`` if the component is self-fulfilling or ``False``
+        otherwise.
+    :rtype: Boolean
+
+    """
+    bdd = model["bdd"]
+    nodes = bdd.conjunction(component, bdd.negation(model["initial"]))
+    for diamond_nodes, fulfilling_nodes in model["eventualities"].values():
+        if bdd.conjunction(nodes, diamond_nodes) != FALSE and \
+                bdd.conjunction(nodes, fulfilling_nodes) == FALSE:
+            return False
+    return True
+
+
+def model_satisfies_property_symbolic(formula, tcc_structure,
+                                      statistics=None):
+    """
+    Checks if a model satisfies a temporal formula with the symbolic engine.
+    The result is the one of
+    :py:func:`model_checking_algorithm.model_satisfies_property`, but the
+    atoms and the model checking graph are never enumerated.
+
+    The strongly connected components are computed one at a time, with a
+    forward and a backward reachability fixpoint from a node, starting from
+    the nodes that are initial nodes whose atom contains the formula or their
+    successors. The nodes that are not in a cycle are removed before.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param statistics: Empty dictionary to store the statistics of the
+        algorithm: the time of each phase (``phases``), the number of nodes of
+        the BDD manager (``bdd_nodes``) and of the edges (``transition_nodes``),
+        the number of nodes of the model checking graph (``graph_nodes``) and
+        the number of components examined (``components``).
+    :type statistics: Dictionary
+
+    :returns: ``True`` if the model satisfies the formula or ``False``
+        otherwise.
+    :rtype: Boolean
+
+    :Example:
+
+    >>> from tccMChecker.symbolic_engine import *
+    >>> formula = Formula({"<>": {"^": {"": "tt", "~": {"o": "da=0"}}}})
+    >>> model_satisfies_property_symbolic(formula, tcc_structure)
+    True
+
+    .. note::
+        As in :py:func:`model_checking_algorithm.model_satisfies_property`, the
+        formula is the negation of the property.
+
+    """
+    start = get_time()
+    phase_start = start
+
+    closure = []
+    get_closure(formula, closure)
+    phase_start = record_phase(statistics, "closure", phase_start)
+    record_closure(statistics, closure)
+
+    model = get_symbolic_model(closure, formula, tcc_structure)
+    phase_start = record_phase(statistics, "symbolic_model", phase_start)
+
+    bdd = model["bdd"]
+    entry_nodes = bdd.conjunction(model["initial"], model["formula"])
+    cycle_nodes = get_cycle_nodes(model, model["states"])
+    candidates = bdd.conjunction(
+        bdd.disjunction(entry_nodes, get_successors(model, entry_nodes)),
+        cycle_nodes)
+
+    found = False
+    components = 0
+    while candidates != FALSE and not found:
+        node = bdd.pick_cube(candidates, model["current"])
+        component = get_reachable(
+            model, node, get_reachable(model, node, cycle_nodes), True)
+        candidates = bdd.conjunction(candidates, bdd.negation(component))
+        components += 1
+
+        if component != node:  # non-trivial
+            found = is_symbolic_self_fulfilling(model, component) and \
+                bdd.conjunction(entry_nodes, bdd.disjunction(
+                    component, get_predecessors(model, component))) != FALSE
+    record_phase(statistics, "scc_checks", phase_start)
+
+    if statistics is not None:
+        statistics["bdd_nodes"] = bdd.get_node_count()
+        statistics["transition_nodes"] = bdd.size(model["transition"])
+        statistics["graph_nodes"] = bdd.count(model["states"],
+                                              model["current"])
+        statistics["components"] = components
+        statistics["time"] = get_time() - start
+    return found
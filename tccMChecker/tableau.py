@@ -0,0 +1,576 @@
+"""This module contains a model checking engine based on a tableau of the
+formula, built on the fly. Instead of generating every atom of the closure,
+the states of a generalized Buchi automaton of the formula are expanded only
+when they are reached in the product with the tcc structure."""
+
+from __future__ import print_function
+
+from collections import deque
+
+from tarjan import tarjan
+
+from tccMChecker.check_statistics import get_time, record_phase
+from tccMChecker.formula import Formula
+from tccMChecker.formula_parser import data_to_tree
+from tccMChecker.normalization import push_negations
+
+
+def get_negation_normal_form(formula):
+    r"""
+    Returns the syntax tree of a formula in negation normal form, where the
+    negations are only applied to propositions (:math:`\neg\circ\phi` is
+    rewritten as :math:`\circ\neg\phi`).
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :returns: Syntax tree (see :py:func:`formula_parser.tree_to_data`).
+    :rtype: Tuple
+
+    :Example:
+
+    >>> from tccMChecker.tableau import *
+    >>> get_negation_normal_form(Formula({"~": {"<>": {"o": "tt"}}}))
+    ('[]', ('o', ('~', ('', 'tt'))))
+
+    """
+    return push_negations(data_to_tree(formula.get_formula()), True)
+
+
+def is_literal(tree):
+    """
+    Checks if a syntax tree in negation normal form is a proposition or a
+    negated proposition.
+
+    :param tree: Syntax tree.
+    :type tree: Tuple
+
+    :returns: ``True`` if the tree is a literal or ``False`` otherwise.
+    :rtype: Boolean
+
+    """
+    return tree[0] == "" or (tree[0] == "~" and tree[1][0] == "")
+
+
+def get_literal_proposition(tree):
+    """
+    Returns the proposition of a literal.
+
+    :param tree: Literal.
+    :type tree: Tuple
+
+    :returns: The proposition.
+    :rtype: String
+
+    """
+    if tree[0] == "~":
+        return tree[1][1]
+    return tree[1]
+
+
+def get_literal_negation(tree):
+    """
+    Returns the negation of a literal.
+
+    :param tree: Literal.
+    :type tree: Tuple
+
+    :returns: The negated literal.
+    :rtype: Tuple
+
+    """
+    if tree[0] == "~":
+        return tree[1]
+    return "~", tree
+
+
+def expand_obligations(obligations, cache):
+    r"""
+    Expands a set of formulas that must hold in a state into the states of the
+    tableau that satisfy them [GPVW95]_.
+
+    A state is a tuple ``(old, next)`` with the formulas that hold in the state
+    (``old``) and the formulas that must hold in the following state
+    (``next``). The expansion uses the rules:
+
+    * :math:`\phi \wedge \psi`: :math:`\phi` and :math:`\psi` hold.
+    * :math:`\phi \vee \psi`: :math:`\phi` holds or :math:`\psi` holds.
+    * :math:`\circ\phi`: :math:`\phi` holds in the next state.
+    * :math:`\diamondsuit\phi`: :math:`\phi` holds, or
+      :math:`\diamondsuit\phi` holds in the next state.
+    * :math:`\square\phi`: :math:`\phi` holds and :math:`\square\phi` holds
+      in the next state.
+
+    The states with a proposition and its negation are discarded.
+
+    :param obligations: Formulas (syntax trees in negation normal form).
+    :type obligations: Frozenset of Tuples
+
+    :param cache: Dictionary where the expansions are kept. It is shared by
+        all the expansions of a formula.
+    :type cache: Dictionary
+
+    :returns: The states of the tableau.
+    :rtype: List of Tuples
+
+    :Example:
+
+    >>> from tccMChecker.tableau import *
+    >>> states = expand_obligations(frozenset([("<>", ("", "tt"))]), {})
+    >>> sorted(sorted(next) for old, next in states)
+    [[], [('<>', ('', 'tt'))]]
+
+    """
+    if obligations in cache:
+        return cache[obligations]
+
+    states = set()
+    pending = [(frozenset(), frozenset(), list(obligations))]
+    while pending:
+        old, next_formulas, new = pending.pop()
+        if not new:
+            states.add((old, next_formulas))
+            continue
+
+        formula = new[0]
+        new = new[1:]
+        if formula in old:
+            pending.append((old, next_formulas, new))
+            continue
+        old = old | frozenset([formula])
+        connective = formula[0]
+
+        if is_literal(formula):
+            if get_literal_negation(formula) not in old:
+                pending.append((old, next_formulas, new))
+
+        elif connective == "^":
+            pending.append((old, next_formulas, new + [formula[1],
+                                                       formula[2]]))
+
+        elif connective == "v":
+            pending.append((old, next_formulas, new + [formula[1]]))
+            pending.append((old, next_formulas, new + [formula[2]]))
+
+        elif connective == "o":
+            pending.append((old, next_formulas | frozenset([formula[1]]), new))
+
+        elif connective == "<>":
+            pending.append((old, next_formulas, new + [formula[1]]))
+            pending.append((old, next_formulas | frozenset([formula]), new))
+
+        elif connective == "[]":
+            pending.append((old, next_formulas | frozenset([formula]),
+                            new + [formula[1]]))
+
+        else:
+            raise ValueError("formula not in negation normal form: {}".format(
+                formula))
+
+    cache[obligations] = sorted(states, key=repr)
+    return cache[obligations]
+
+
+def get_eventualities(tree, eventualities):
+    r"""
+    Finds the formulas :math:`\diamondsuit\phi` of a syntax tree.
+
+    :param tree: Syntax tree.
+    :type tree: Tuple
+
+    :param eventualities: Empty list to store the formulas.
+    :type eventualities: List of Tuples
+
+    """
+    if tree[0] == "":
+        return
+    if tree[0] == "<>" and tree not in eventualities:
+        eventualities.append(tree)
+    for subtree in tree[1:]:
+        get_eventualities(subtree, eventualities)
+
+
+def is_accepting(state, eventuality):
+    r"""
+    Checks if a state of the tableau is in the acceptance set of a formula
+    :math:`\diamondsuit\phi`, i.e. the state does not have the formula or it
+    has :math:`\phi`.
+
+    :param state: State of the tableau.
+    :type state: Tuple
+
+    :param eventuality: Formula :math:`\diamondsuit\phi`.
+    :type eventuality: Tuple
+
+    :returns: ``True`` if the state is in the acceptance set or ``False``
+        otherwise.
+    :rtype: Boolean
+
+    """
+    return eventuality not in state[0] or eventuality[1] in state[0]
+
+
+def get_store_literals(store):
+    """
+    Returns the sets of literals that satisfy the store of a tcc node, i.e.
+    the disjunctive normal form of the conjunction of its formulas.
+
+    :param store: Propositions (as formulas) in the store of the tcc node.
+    :type store: List of :py:class:`~formula.Formula`
+
+    :returns: List of sets of literals (syntax trees). It is empty if the
+        store is not satisfiable.
+    :rtype: List of Frozensets
+
+    """
+    domains = Formula.get_proposition_domains()
+    conjunctions = [frozenset()]
+    for proposition in store:
+        tree = push_negations(data_to_tree(proposition.get_formula()), True)
+        conjunctions = [conjunction | literals for conjunction in conjunctions
+                        for literals in get_tree_literals(tree)]
+
+    # The propositions that are not in the domains are never consistent
+    return [literals for literals in conjunctions
+            if all(get_literal_proposition(literal) in domains["bits"]
+                   for literal in literals)
+            and are_literals_consistent(literals)]
+
+
+def get_tree_literals(tree):
+    """
+    Returns the disjunctive normal form of a propositional syntax tree in
+    negation normal form.
+
+    :param tree: Syntax tree.
+    :type tree: Tuple
+
+    :returns: List of sets of literals.
+    :rtype: List of Frozensets
+
+    """
+    if is_literal(tree):
+        return [frozenset([tree])]
+    if tree[0] == "^":
+        return [left | right for left in get_tree_literals(tree[1])
+                for right in get_tree_literals(tree[2])]
+    if tree[0] == "v":
+        return get_tree_literals(tree[1]) + get_tree_literals(tree[2])
+    raise ValueError("store formula is not propositional: {}".format(tree))
+
+
+def are_literals_consistent(literals):
+    """
+    Checks if a set of literals is consistent with the domains of the
+    variables of the model (see :py:func:`domains.compile_domains`): it has
+    no proposition together with its negation nor two values of the same
+    variable, and its propositions are legal propositions.
+
+    :param literals: Literals (syntax trees).
+    :type literals: Set of Tuples
+
+    :returns: ``True`` if the literals are consistent or ``False`` otherwise.
+    :rtype: Boolean
+
+    """
+    domains = Formula.get_proposition_domains()
+    mask = 0
+    for literal in literals:
+        bit = domains["bits"].get(get_literal_proposition(literal))
+        if bit is None:
+            if literal[0] == "":
+                return False
+        elif literal[0] == "":
+            mask |= 1 << (2 * bit)
+        else:
+            mask |= 1 << (2 * bit + 1)
+
+    for literal in literals:
+        if literal[0] == "" and mask & domains["masks"][literal[1]]:
+            return False
+    return True
+
+
+def get_product_graph(tree, tcc_structure, cache):
+    """
+    Builds the part of the product of the tableau of a formula and a tcc
+    structure that is reachable from the initial nodes. A node of the product
+    is a tcc node and a state of the tableau whose literals are consistent
+    with the store of the tcc node.
+
+    :param tree: Syntax tree of the formula in negation normal form.
+    :type tree: Tuple
+
+    :param tcc_structure: tcc structure.
+    :type tcc_structure: Dictionary
+
+    :param cache: Dictionary where the expansions of the tableau are kept
+        (see :py:func:`.expand_obligations`).
+    :type cache: Dictionary
+
+    :returns: A tuple with the graph (the successors of each product node),
+        the product nodes (a tuple ``(tcc node, state)`` for each number) and
+        the numbers of the initial product nodes.
+    :rtype: Tuple
+
+    """
+    store_literals = {}
+    compatible = {}
+
+    def is_compatible(tcc_node, state):
+        literals = frozenset(formula for formula in state[0]
+                             if is_literal(formula))
+        key = (tcc_node, literals)
+        if key not in compatible:
+            if tcc_node not in store_literals:
+                store_literals[tcc_node] = get_store_literals(
+                    tcc_structure[tcc_node].get("store"))
+            compatible[key] = any(are_literals_consistent(literals | store)
+                                  for store in store_literals[tcc_node])
+        return compatible[key]
+
+    numbers = {}
+    nodes = []
+    graph = {}
+    pending = []
+
+    def get_number(product_node):
+        if product_node not in numbers:
+            numbers[product_node] = len(nodes)
+            nodes.append(product_node)
+            graph[numbers[product_node]] = []
+            pending.append(product_node)
+        return numbers[product_node]
+
+    initial_nodes = []
+    initial_states = expand_obligations(frozenset([tree]), cache)
+    for tcc_node in tcc_structure.keys():
+        if tcc_structure[tcc_node].get("initial"):
+            for state in initial_states:
+                if is_compatible(tcc_node, state):
+                    initial_nodes.append(get_number((tcc_node, state)))
+
+    while pending:
+        tcc_node, state = pending.pop()
+        successors = graph[numbers[(tcc_node, state)]]
+        next_states = expand_obligations(state[1], cache)
+        for next_tcc_node in tcc_structure[tcc_node].get("edges"):
+            for next_state in next_states:
+                if is_compatible(next_tcc_node, next_state):
+                    successors.append(get_number((next_tcc_node, next_state)))
+
+    return graph, nodes, initial_nodes
+
+
+def find_accepting_component(graph, nodes, eventualities):
+    """
+    Returns a strongly connected component of the product graph with a cycle
+    that visits the acceptance set of every eventuality.
+
+    :param graph: Product graph.
+    :type graph: Dictionary
+
+    :param nodes: Product nodes (see :py:func:`.get_product_graph`).
+    :type nodes: List of Tuples
+
+    :param eventualities: Formulas :math:`\\diamondsuit\\phi` of the formula.
+    :type eventualities: List of Tuples
+
+    :returns: The numbers of the product nodes of the component, or ``None``
+        if there is no such component.
+    :rtype: List of Integers
+
+    """
+    for component in tarjan(graph):
+        if len(component) == 1 and component[0] not in graph[component[0]]:
+            continue  # trivial
+        if all(any(is_accepting(nodes[node][1], eventuality)
+                   for node in component) for eventuality in eventualities):
+            return component
+    return None
+
+
+def model_satisfies_property_tableau(formula, tcc_structure, witness=None,
+                                     statistics=None):
+    """
+    Checks if a model satisfies a temporal formula with the tableau engine.
+
+    The product of the tcc structure and the tableau of the formula is built
+    from the initial nodes, expanding each state of the tableau only when it
+    is reached. The model satisfies the formula if the product has a
+    reachable cycle that fulfills every formula :math:`\\diamondsuit\\phi`.
+
+    :param formula: Formula
+    :type formula: :py:class:`~formula.Formula`
+
+    :param tcc_structure: tcc Structure
+    :type tcc_structure: Dictionary
+
+    :param witness: Empty dictionary to store, when the result is ``True``, a
+        path from an initial node (``prefix``) to a cycle (``cycle``) that
+        satisfies the formula (see :py:func:`.get_tableau_witness`).
+    :type witness: Dictionary
+
+    :param statistics: Empty dictionary to store the statistics of the
+        algorithm: the time of each phase (``phases``), the number of states
+        of the tableau (``tableau_states``) and the number of nodes and edges
+        of the product (``graph_nodes`` and ``graph_edges``).
+    :type statistics: Dictionary
+
+    :returns: ``True`` if the model satisfies the formula or ``False``
+        otherwise.
+    :rtype: Boolean
+
+    :Example:
+
+    >>> from tccMChecker.tableau import *
+    >>> formula = Formula({"<>": {"^": {"": "tt", "~": {"o": "da=0"}}}})
+    >>> model_satisfies_property_tableau(formula, tcc_structure)
+    True
+
+    .. note::
+        As in :py:func:`model_checking_algorithm.model_satisfies_property`, the
+        formula is the negation of the property. Unlike that function, the
+        cycle can be reached from the initial nodes through any number of
+        edges, which is the usual semantics of LTL.
+
+    """
+    start = get_time()
+    phase_start = start
+
+    tree = get_negation_normal_form(formula)
+    eventualities = []
+    get_eventualities(tree, eventualities)
+
+    cache = {}
+    graph, nodes, initial_nodes = get_product_graph(tree, tcc_structure,
+                                                    cache)
+    phase_start = record_phase(statistics, "product_graph", phase_start)
+
+    component = find_accepting_component(graph, nodes, eventualities)
+    record_phase(statistics, "scc_checks", phase_start)
+
+    if component is not None and witness is not None:
+        witness.update(get_tableau_witness(graph, nodes, initial_nodes,
+                                           component, eventualities))
+
+    if statistics is not None:
+        statistics["tableau_states"] = len(set(
+            state for states in cache.values() for state in states))
+        statistics["graph_nodes"] = len(nodes)
+        statistics["graph_edges"] = sum(len(successors)
+                                        for successors in graph.values())
+        statistics["time"] = get_time() - start
+    return component is not None
+
+
+def get_tableau_witness(graph, nodes, initial_nodes, component,
+                        eventualities):
+    """
+    Returns a path of tcc nodes from an initial node to a cycle of an
+    accepting component of the product graph.
+
+    :param graph: Product graph.
+    :type graph: Dictionary
+
+    :param nodes: Product nodes.
+    :type nodes: List of Tuples
+
+    :param initial_nodes: Numbers of the initial product nodes.
+    :type initial_nodes: List of Integers
+
+    :param component: Numbers of the product nodes of the component.
+    :type component: List of Integers
+
+    :param eventualities: Formulas :math:`\\diamondsuit\\phi` of the formula.
+    :type eventualities: List of Tuples
+
+    :returns: A dictionary with the path to the component (``prefix``) and a
+        cycle that visits the acceptance set of every eventuality (``cycle``),
+        with the steps of :py:func:`searching_algorithm.get_lasso_witness`.
+        The steps have no model checking node nor atom.
+    :rtype: Dictionary
+
+    """
+    members = set(component)
+    parents = dict((node, None) for node in initial_nodes)
+    queue = deque(initial_nodes)
+    entry = None
+    while queue:
+        node = queue.popleft()
+        if node in members:
+            entry = node
+            break
+        for successor in graph[node]:
+            if successor not in parents:
+                parents[successor] = node
+                queue.append(successor)
+
+    prefix = []
+    node = parents[entry]
+    while node is not None:
+        prefix.append((nodes[node][0], None, None))
+        node = parents[node]
+    prefix.reverse()
+
+    targets = []
+    for eventuality in eventualities:
+        for node in component:
+            if is_accepting(nodes[node][1], eventuality):
+                targets.append(node)
+                break
+
+    cycle = []
+    current = entry
+    for target in targets:
+        if target != current:
+            path = get_component_path(graph, members, current, target)
+            cycle.extend((nodes[node][0], None, None) for node in path[:-1])
+            current = target
+    path = get_component_path(graph, members, current, entry)
+    cycle.extend((nodes[node][0], None, None) for node in path[:-1])
+    return {"prefix": prefix, "cycle": cycle}
+
+
+def get_component_path(graph, members, source, target):
+    """
+    Returns a shortest non-empty path between two nodes of a strongly
+    connected component.
+
+    :param graph: Product graph.
+    :type graph: Dictionary
+
+    :param members: Numbers of the product nodes of the component.
+    :type members: Set of Integers
+
+    :param source: Number of the first node.
+    :type source: Integer
+
+    :param target: Number of the last node.
+    :type target: Integer
+
+    :returns: The numbers of the nodes of the path (source and target
+        included).
+    :rtype: List of Integers
+
+    :raises ValueError: If there is no path from the source to the target in
+        the component.
+
+    """
+    parents = {}
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        for successor in graph[node]:
+            if successor in members and successor not in parents:
+                parents[successor] = node
+                if successor == target:
+                    path = [target, node]
+                    while node != source:
+                        node = parents[node]
+                        path.append(node)
+                    path.reverse()
+                    return path
+                queue.append(successor)
+    raise ValueError("no path from product node {} to product node {} in the "
+                     "component".format(source, target))